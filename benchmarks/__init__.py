@@ -0,0 +1,3 @@
+"""
+Бенчмарки конфигурационного транслятора.
+"""
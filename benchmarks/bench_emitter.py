@@ -0,0 +1,44 @@
+"""
+Сравнение вывода TOML: документ tomlkit (to_toml) против потокового
+TomlEmitter (write_toml).
+
+Запуск: python -m benchmarks.bench_emitter [число_блоков]
+"""
+import io
+import sys
+import time
+import tracemalloc
+from benchmarks.bench_lexer import make_source
+from src.lexer import Lexer
+from src.parser import Parser
+from src.transformer import ConfigTransformer
+
+
+def measure(emit):
+    tracemalloc.start()
+    start = time.perf_counter()
+    emit()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    transformer = ConfigTransformer()
+    config = transformer.ast_to_dict(Parser(Lexer(make_source(blocks)).tokenize()).parse())
+
+    def with_tomlkit():
+        io.StringIO().write(transformer.to_toml(config))
+
+    def with_emitter():
+        transformer.write_toml(config, io.StringIO())
+
+    for name, emit in (('tomlkit', with_tomlkit), ('TomlEmitter', with_emitter)):
+        elapsed, peak = measure(emit)
+        print(f"{name:>12}: {elapsed:.3f} с, пик памяти {peak / 1e6:.1f} МБ")
+
+
+if __name__ == '__main__':
+    main()
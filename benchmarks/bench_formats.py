@@ -0,0 +1,68 @@
+"""
+Запись большой вычисленной конфигурации в каждый формат вывода: время,
+пик памяти (tracemalloc) и размер файла. Для сравнения - json.dumps
+целиком и библиотека msgpack, если она установлена.
+
+Запуск: python -m benchmarks.bench_formats [число_ключей]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from benchmarks.generator import generate_config
+from src.formats import FORMATS
+from src.pipeline import _write_output, translate_source
+
+
+def measure(emit, path):
+    # Время - без tracemalloc, он замедляет выделение памяти в разы
+    start = time.perf_counter()
+    emit()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    emit()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, os.path.getsize(path)
+
+
+def main():
+    keys = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    config = translate_source(generate_config(keys, depth=3, expression_ratio=0.5))
+    print(f"{keys} ключей")
+
+    with tempfile.TemporaryDirectory() as directory:
+        runs = []
+        for name, output in FORMATS.items():
+            path = os.path.join(directory, 'out' + output.suffix)
+            runs.append((name, path, lambda name=name, path=path: _write_output(config, path, name)))
+
+        path = os.path.join(directory, 'dumps.json')
+
+        def with_dumps():
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(config, ensure_ascii=False, indent=2))
+        runs.append(('json.dumps', path, with_dumps))
+
+        try:
+            import msgpack
+        except ImportError:
+            msgpack = None
+        if msgpack is not None:
+            library_path = os.path.join(directory, 'library.msgpack')
+
+            def with_library():
+                with open(library_path, 'wb') as f:
+                    f.write(msgpack.packb(config, use_bin_type=True))
+            runs.append(('msgpack (библиотека)', library_path, with_library))
+
+        for name, path, emit in runs:
+            elapsed, peak, size = measure(emit, path)
+            print(f"{name:>22}: {elapsed * 1000:8.1f} мс, пик памяти {peak / 1e6:6.1f} МБ, "
+                  f"файл {size / 1e6:6.1f} МБ")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Память реестра конфигураций: N конфигураций из нескольких шаблонов с
+собственными заголовками, вычисленные обычным ConfigTransformer и через
+общий Interner. Размер считается по объектам с учётом общих один раз
+(deep_size) и по tracemalloc.
+
+Запуск: python -m benchmarks.bench_interning [число_конфигураций] [число_шаблонов]
+"""
+import gc
+import sys
+import time
+import tracemalloc
+from benchmarks.generator import generate_config
+from src.interning import Interner, deep_size
+from src.lexer import Lexer
+from src.parser import Parser
+from src.transformer import ConfigTransformer
+
+
+def load(asts, interner=None):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    configs = [ConfigTransformer(interner).ast_to_dict(ast) for ast in asts]
+    elapsed = time.perf_counter() - start
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return configs, elapsed, retained
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    templates = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    bodies = [generate_config(200, depth=2, seed=seed) for seed in range(templates)]
+    # Заголовок у каждой конфигурации свой; тела повторяются
+    asts = [Parser(Lexer(f'service = [[svc{index}]]; port = {8000 + index};\n'
+                         + bodies[index % templates]).tokenize()).parse()
+            for index in range(count)]
+
+    plain, plain_time, plain_traced = load(asts)
+    interner = Interner()
+    shared, shared_time, shared_traced = load(asts, interner)
+    assert shared == plain
+
+    plain_size = deep_size(plain)
+    shared_size = deep_size(shared)
+    print(f"{count} конфигураций из {templates} шаблонов; {interner.report()}")
+    print(f"без Interner: {plain_size / 2**20:8.1f} МБ объектов, {plain_traced / 2**20:8.1f} МБ "
+          f"по tracemalloc, вычисление (под tracemalloc) {plain_time * 1000:.0f} мс")
+    print(f"с Interner:   {shared_size / 2**20:8.1f} МБ объектов, {shared_traced / 2**20:8.1f} МБ "
+          f"по tracemalloc (с таблицей), вычисление (под tracemalloc) {shared_time * 1000:.0f} мс")
+    print(f"экономия: {plain_size / shared_size:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
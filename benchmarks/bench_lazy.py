@@ -0,0 +1,43 @@
+"""
+Доступ к одному ключу большой конфигурации: полная трансляция против
+LazyConfig (построение индекса, затем открытие с сохранённым индексом).
+
+Запуск: python -m benchmarks.bench_lazy [число_ключей]
+"""
+import os
+import sys
+import tempfile
+import time
+from benchmarks.generator import generate_config
+from src.lazy import LazyConfig
+from src.pipeline import read_config
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main():
+    keys = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'big.cfg')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(generate_config(keys, depth=4))
+
+        full, full_time = timed(lambda: read_config(path))
+        key = list(full)[len(full) // 2]
+        print(f"{os.path.getsize(path) / 1e6:.1f} МБ, ключ {key!r}")
+        print(f"полная трансляция:      {full_time * 1000:9.1f} мс")
+
+        for title in ('индекс строится', 'индекс с диска'):
+            config, open_time = timed(lambda: LazyConfig.open(path))
+            value, get_time = timed(lambda: config[key])
+            assert value == full[key]
+            print(f"LazyConfig, {title}: {open_time * 1000:9.1f} мс открытие + "
+                  f"{get_time * 1000:.1f} мс ключ ({config.evaluated} инструкций)")
+
+
+if __name__ == '__main__':
+    main()
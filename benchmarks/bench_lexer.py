@@ -0,0 +1,49 @@
+"""
+Сравнение пропускной способности режимов лексера (токенов в секунду).
+
+Запуск: python -m benchmarks.bench_lexer [число_блоков]
+"""
+import sys
+import time
+from src.lexer import Lexer
+
+
+def make_source(blocks: int) -> str:
+    parts = []
+    for i in range(blocks):
+        parts.append(
+            f"% блок номер {i}\n"
+            f"base_{i} = {i};\n"
+            f"section_{i} = @{{\n"
+            f"    name = [[секция {i}]];\n"
+            f"    enabled = true;\n"
+            f"    ratio = 0.{i};\n"
+            f"    port = $base_{i} 8000 +$;\n"
+            f"}};\n"
+        )
+    return ''.join(parts)
+
+
+def measure(source: str, mode: str, repeat: int = 3):
+    best = None
+    count = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = len(Lexer(source, mode=mode).tokenize())
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return count, best
+
+
+def main():
+    blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    source = make_source(blocks)
+    print(f"Размер входа: {len(source) / 1e6:.1f} млн символов")
+    for mode in Lexer.MODES:
+        count, elapsed = measure(source, mode)
+        print(f"{mode:>6}: {count} токенов за {elapsed:.3f} с "
+              f"({count / elapsed:,.0f} токенов/с)")
+
+
+if __name__ == '__main__':
+    main()
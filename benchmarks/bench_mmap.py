@@ -0,0 +1,54 @@
+"""
+Чтение и лексический анализ большого файла: текстом (read + decode) и
+через отображение в память с разбором байтов. Память меряется
+tracemalloc: отображённый файл в неё не попадает, декодированный текст -
+попадает.
+
+Запуск: python -m benchmarks.bench_mmap [число_ключей]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from benchmarks.generator import generate_config
+from src.lexer import Lexer, MappedSource
+
+
+def lex_text(path: str) -> int:
+    with open(path, encoding='utf-8') as f:
+        return len(Lexer(f.read()).tokenize_compact())
+
+
+def lex_mapped(path: str) -> int:
+    with MappedSource(path) as source:
+        return len(source.tokenize())
+
+
+def measure(function, path: str):
+    start = time.perf_counter()
+    function(path)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    function(path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    keys = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'big.cfg')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(generate_config(keys, depth=4, string_ratio=0.5))
+        print(f"Файл: {os.path.getsize(path) / 1e6:.1f} МБ, {keys} ключей")
+
+        for name, function in (('текст', lex_text), ('mmap', lex_mapped)):
+            elapsed, peak = measure(function, path)
+            print(f"{name:<6} {elapsed:.3f} с, пик памяти {peak / 1e6:.1f} МБ")
+
+
+if __name__ == '__main__':
+    main()
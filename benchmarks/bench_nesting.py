@@ -0,0 +1,82 @@
+"""
+Разбор и вычисление глубоко вложенных блоков: итеративный обход со
+стеком против прежнего рекурсивного. Рекурсивный вариант упирается в
+предел рекурсии, поэтому на больших глубинах замеряется только новый.
+
+Запуск: python -m benchmarks.bench_nesting [максимальная_глубина]
+"""
+import sys
+import time
+from benchmarks.generator import generate_config
+from src.lexer import Lexer
+from src.parser import AssignmentNode, BlockNode, Parser
+from src.transformer import ConfigTransformer
+
+
+class RecursiveParser(Parser):
+    """Прежний разбор блока: вызов parse_block на каждый уровень."""
+
+    def parse_block(self) -> BlockNode:
+        key, assignments = self.open_block()
+        while not self.check('RBRACE') and not self.is_at_end():
+            if self.current().type in ['NEWLINE', 'COMMENT']:
+                self.advance()
+            elif self.check_block():
+                assignments.append(self.parse_block())
+            elif self.check('IDENTIFIER') and self.peek_next() and self.peek_next().type == 'EQUALS':
+                assignments.append(self.parse_assignment())
+            else:
+                self.advance()
+        self.consume('RBRACE')
+        return BlockNode(key, assignments)
+
+
+class RecursiveTransformer(ConfigTransformer):
+    """Прежнее вычисление: блок обходится вызовом block_to_dict."""
+
+    def ast_to_dict(self, nodes):
+        result = {}
+        for node in nodes:
+            if isinstance(node, BlockNode):
+                value = self.block_to_dict(node)
+            elif isinstance(node, AssignmentNode):
+                value = self.node_to_value(node.value)
+            else:
+                continue
+            result[node.key] = value
+            self.evaluator.set_variable(node.key, value)
+        return result
+
+
+def nested_source(depth: int) -> str:
+    return ''.join(f"b{i} = @{{ v = {i}; " for i in range(depth)) + '};' * depth
+
+
+def run(parser_class, transformer_class, tokens) -> float:
+    start = time.perf_counter()
+    transformer_class().ast_to_dict(parser_class(tokens).parse())
+    return time.perf_counter() - start
+
+
+def main():
+    max_depth = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    cases = [('плоский файл, 20000 ключей', generate_config(20000, depth=0)),
+             ('глубина 16, 20000 ключей', generate_config(20000, depth=16))]
+    depth = 100
+    while depth <= max_depth:
+        cases.append((f'одна цепочка, глубина {depth}', nested_source(depth)))
+        depth *= 10
+
+    for name, source in cases:
+        tokens = Lexer(source).tokenize()
+        iterative = min(run(Parser, ConfigTransformer, tokens) for _ in range(3))
+        try:
+            recursive = min(run(RecursiveParser, RecursiveTransformer, tokens) for _ in range(3))
+            ratio = f"{recursive * 1000:8.1f} мс, x{recursive / iterative:.2f}"
+        except RecursionError:
+            ratio = 'RecursionError'
+        print(f"{name:<30} стек: {iterative * 1000:8.1f} мс   рекурсия: {ratio}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+"""
+Вычисление AST как есть против Optimizer + вычисления свёрнутого AST:
+свёртка делается один раз, вычисление свёрнутого AST - при каждом повторе.
+
+Запуск: python -m benchmarks.bench_optimizer [число_ключей]
+"""
+import sys
+import time
+from benchmarks.generator import generate_config
+from src.lexer import Lexer
+from src.optimizer import Optimizer
+from src.parser import Parser
+from src.transformer import ConfigTransformer
+
+
+def main():
+    keys = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    ast = Parser(Lexer(generate_config(keys, depth=3, expression_ratio=0.5)).tokenize()).parse()
+
+    start = time.perf_counter()
+    expected = ConfigTransformer().ast_to_dict(ast)
+    plain = time.perf_counter() - start
+
+    start = time.perf_counter()
+    optimizer = Optimizer()
+    optimized = optimizer.optimize(ast)
+    folded = time.perf_counter() - start
+    start = time.perf_counter()
+    result = ConfigTransformer().ast_to_dict(optimized)
+    evaluated = time.perf_counter() - start
+
+    assert result == expected
+    print(optimizer.report().splitlines()[0])
+    print(f"вычисление без оптимизатора: {plain * 1000:9.1f} мс")
+    print(f"оптимизатор + вычисление:    {folded * 1000:9.1f} + {evaluated * 1000:.1f} мс")
+
+
+if __name__ == '__main__':
+    main()
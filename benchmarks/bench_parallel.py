@@ -0,0 +1,39 @@
+"""
+Ускорение разбора одного большого файла в пуле процессов: лексер и
+парсер по частям (parse_parallel) против последовательного разбора.
+Вычисление в обоих случаях последовательное и в замер не входит.
+Ускорение ограничено сборкой AST из частей в основном процессе.
+
+Запуск: python -m benchmarks.bench_parallel [число_ключей] [процессов ...]
+"""
+import os
+import sys
+import time
+from benchmarks.generator import generate_config
+from src.lexer import Lexer
+from src.parallel import parse_parallel
+from src.parser import Parser
+
+
+def main():
+    keys = int(sys.argv[1]) if len(sys.argv) > 1 else 400000
+    cores = os.cpu_count() or 1
+    counts = [int(arg) for arg in sys.argv[2:]] or sorted({2, 4, cores})
+    source = generate_config(keys, depth=4)
+    print(f"{len(source) / 1e6:.1f} МБ, {keys} ключей, ядер: {cores}")
+
+    start = time.perf_counter()
+    expected = len(Parser(Lexer(source).tokenize()).parse())
+    serial = time.perf_counter() - start
+    print(f"{'последовательно':>16}: {serial:.3f} с")
+
+    for jobs in counts:
+        start = time.perf_counter()
+        ast = parse_parallel(source, jobs)
+        elapsed = time.perf_counter() - start
+        assert len(ast) == expected
+        print(f"{jobs:>16}: {elapsed:.3f} с, ускорение x{serial / elapsed:.2f}")
+
+
+if __name__ == '__main__':
+    main()
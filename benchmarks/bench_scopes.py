@@ -0,0 +1,55 @@
+"""
+Вычисление конфигурации с большим числом ключей и глубокой вложенностью:
+время на одну ссылку на переменную не должно расти с размером файла.
+
+Запуск: python -m benchmarks.bench_scopes [число_ключей] [глубина]
+"""
+import sys
+import time
+from src.lexer import Lexer
+from src.parser import Parser
+from src.transformer import ConfigTransformer
+
+
+def make_source(keys: int, depth: int) -> str:
+    """
+    Цепочки вложенных блоков глубиной depth. В каждом блоке есть ссылки на
+    соседние ключи и на глобальную константу, после каждой цепочки - ссылка
+    на неё по составному имени.
+    """
+    per_block = 10
+    blocks = max(1, keys // per_block)
+    lines = ['base = 1;']
+    level = 0
+    head = 0
+    for block in range(blocks):
+        if level == depth:
+            lines.append('};' * level)
+            lines.append(f'ref{head} = $b{head}.v1 1 +$;')
+            level = 0
+            head = block
+        lines.append(f'b{block} = @{{')
+        level += 1
+        lines.append(f'v0 = $base {block} +$;')
+        for i in range(1, per_block - 1):
+            lines.append(f'v{i} = $v{i - 1} 1 +$;')
+        lines.append('tail = $v0 base +$;')
+    lines.append('};' * level)
+    return '\n'.join(lines)
+
+
+def main():
+    keys = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    depth = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    for size in (keys // 10, keys // 2, keys):
+        ast = Parser(Lexer(make_source(size, depth)).tokenize()).parse()
+        start = time.perf_counter()
+        ConfigTransformer().ast_to_dict(ast)
+        elapsed = time.perf_counter() - start
+        print(f"{size:>8} ключей, глубина {depth}: {elapsed:.3f} с "
+              f"({elapsed / size * 1e6:.2f} мкс на ключ)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Время загрузки конфигурации при старте сервиса: повторный разбор TOML
+(tomllib и tomlkit) против двоичного снимка через mmap - с обращением
+к одному ключу и с полным разворачиванием.
+
+Запуск: python -m benchmarks.bench_snapshot [число_блоков]
+"""
+import os
+import sys
+import tempfile
+import time
+import tomllib
+import tomlkit
+from benchmarks.bench_lexer import make_source
+from src.lexer import Lexer
+from src.parser import Parser
+from src.pipeline import write_output
+from src.snapshot import load_snapshot
+from src.transformer import ConfigTransformer
+
+
+def best_of(load, repeat: int = 5) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        load()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    config = ConfigTransformer().ast_to_dict(Parser(Lexer(make_source(blocks)).tokenize()).parse())
+    key = f"section_{blocks // 2}"
+
+    with tempfile.TemporaryDirectory() as directory:
+        toml_path = os.path.join(directory, 'config.toml')
+        snapshot_path = os.path.join(directory, 'config.cfgsnap')
+        write_output(config, toml_path, 'toml')
+        write_output(config, snapshot_path, 'snapshot')
+        print(f"Размер: TOML {os.path.getsize(toml_path) / 1e6:.2f} МБ, "
+              f"снимок {os.path.getsize(snapshot_path) / 1e6:.2f} МБ")
+
+        def with_tomllib():
+            with open(toml_path, 'rb') as f:
+                return tomllib.load(f)[key]['port']
+
+        def with_tomlkit():
+            with open(toml_path, encoding='utf-8') as f:
+                return tomlkit.parse(f.read())[key]['port']
+
+        def snapshot_one_key():
+            return load_snapshot(snapshot_path)[key]['port']
+
+        def snapshot_no_verify():
+            return load_snapshot(snapshot_path, verify=False)[key]['port']
+
+        def snapshot_full():
+            return load_snapshot(snapshot_path).to_dict()[key]['port']
+
+        cases = (
+            ('tomllib', with_tomllib),
+            ('tomlkit', with_tomlkit),
+            ('снимок, один ключ', snapshot_one_key),
+            ('снимок без CRC', snapshot_no_verify),
+            ('снимок целиком', snapshot_full),
+        )
+        for name, load in cases:
+            repeat = 1 if load is with_tomlkit else 5
+            print(f"{name:>18}: {best_of(load, repeat) * 1000:.1f} мс")
+
+
+if __name__ == '__main__':
+    main()
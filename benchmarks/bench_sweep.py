@@ -0,0 +1,47 @@
+"""
+Перебор параметров: N отдельных трансляций шаблона против sweep() над
+столбцами NumPy. Нужен NumPy.
+
+Запуск: python -m benchmarks.bench_sweep [число_вариантов] [число_ключей]
+"""
+import random
+import sys
+import time
+from benchmarks.generator import generate_config
+from src.lexer import Lexer
+from src.parser import Parser
+from src.sweep import apply_overrides, sweep
+from src.transformer import ConfigTransformer
+
+
+def main():
+    variants = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    keys = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    source = generate_config(keys, depth=3, expression_ratio=0.5)
+    # Генератор определяет константы c0..c3, на которые ссылаются выражения
+    rows = [{f'c{index}': random.randint(1, 10000) for index in range(4)}
+            for _ in range(variants)]
+
+    start = time.perf_counter()
+    ast = Parser(Lexer(source).tokenize()).parse()
+    expected = [ConfigTransformer().ast_to_dict(apply_overrides(ast, row)) for row in rows]
+    scalar = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = sweep(source, rows)
+    vectorized = time.perf_counter() - start
+
+    start = time.perf_counter()
+    dicts = list(result.variants())
+    unpack = time.perf_counter() - start
+    assert dicts == expected
+
+    print(f"{variants} вариантов, {keys} ключей; выражений над столбцами: {result.vectorized}, "
+          f"поэлементно: {result.fallbacks}")
+    print(f"отдельные трансляции: {scalar * 1000:9.1f} мс")
+    print(f"sweep:                {vectorized * 1000:9.1f} мс "
+          f"(+ {unpack * 1000:.1f} мс на словари всех вариантов)")
+
+
+if __name__ == '__main__':
+    main()
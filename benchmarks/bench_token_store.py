@@ -0,0 +1,49 @@
+"""
+Сравнение памяти, занимаемой токенами: список объектов Token
+против компактного TokenStore.
+
+Запуск: python -m benchmarks.bench_token_store [число_блоков]
+"""
+import sys
+import tracemalloc
+from benchmarks.bench_lexer import make_source
+from src.lexer import Lexer
+
+
+class DictToken:
+    """Прежнее представление токена: объект с __dict__ и копией значения."""
+    def __init__(self, type, value, line, column):
+        self.type = type
+        self.value = value
+        self.line = line
+        self.column = column
+
+
+def measure(build):
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def main():
+    blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    source = make_source(blocks)
+    print(f"Размер входа: {len(source.encode('utf-8')) / 1e6:.1f} МБ")
+
+    variants = {
+        'Token с __dict__': lambda: [
+            DictToken(t.type, t.value, t.line, t.column)
+            for t in Lexer(source).tokenize()
+        ],
+        'Token с __slots__': lambda: Lexer(source).tokenize(),
+        'TokenStore': lambda: Lexer(source).tokenize_compact(),
+    }
+    for name, build in variants.items():
+        tokens, size = measure(build)
+        print(f"{name:>18}: {size / 1e6:8.2f} МБ ({size / len(tokens):.1f} байт/токен)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Повторные вычисления одного шаблона: полная трансляция на каждый набор
+значений против Translator.render, который пересчитывает только ключи,
+зависящие от заменённой константы. Последняя строка - те же render из
+нескольких потоков над одним Translator.
+
+Запуск: python -m benchmarks.bench_translator [число_ключей] [число_вызовов] [потоков]
+"""
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.generator import generate_config
+from src.lexer import Lexer
+from src.parser import Parser
+from src.sweep import apply_overrides
+from src.transformer import ConfigTransformer
+from src.translator import Translator
+
+
+def main():
+    keys = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    calls = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    threads = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    source = generate_config(keys, depth=3, expression_ratio=0.5)
+
+    start = time.perf_counter()
+    translator = Translator(source)
+    build = time.perf_counter() - start
+    print(f"{keys} ключей, {calls} вызовов; построение Translator: {build * 1000:.1f} мс")
+
+    # Генератор определяет константы c0..c3, на которые ссылаются выражения;
+    # для сравнения - вложенный ключ с наименьшим числом зависимых
+    paths = [path for path in translator._constants if '.' in path][-100:]
+    leaf = min(paths, key=lambda path: len(translator.affected([path])))
+    for path in ('c0', leaf):
+        rows = [{path: index} for index in range(calls)]
+        affected = len(translator.affected([path]))
+
+        start = time.perf_counter()
+        for row in rows[-10:]:
+            ast = Parser(Lexer(source).tokenize()).parse()
+            expected = ConfigTransformer().ast_to_dict(apply_overrides(ast, row))
+        full = (time.perf_counter() - start) / 10
+
+        start = time.perf_counter()
+        for row in rows:
+            result = translator.render(row)
+        render = (time.perf_counter() - start) / calls
+        assert result == expected
+
+        print(f"замена {path} (пересчёт {affected} ключей): трансляция {full * 1000:8.2f} мс, "
+              f"render {render * 1000:8.3f} мс на вызов")
+
+    rows = [{'c0': index} for index in range(calls)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(translator.render, rows))
+    parallel = (time.perf_counter() - start) / calls
+    print(f"render c0 в {threads} потоках: {parallel * 1000:8.3f} мс на вызов")
+
+
+if __name__ == '__main__':
+    main()
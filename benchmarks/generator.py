@@ -0,0 +1,77 @@
+"""
+Генератор синтетических конфигураций на входном языке: число ключей,
+глубина вложенности блоков, доля выражений и строк задаются отдельно.
+
+Запуск: python -m benchmarks.generator [число_ключей] [глубина] > file.cfg
+"""
+import random
+import sys
+
+_WORDS = ('сервер', 'база', 'кэш', 'очередь', 'host', 'port', 'engine', 'region')
+_OPERATORS = ('+', '-', '*', '/', 'mod')
+
+
+def generate_config(keys: int = 1000, depth: int = 1, expression_ratio: float = 0.2,
+                    string_ratio: float = 0.2, block_size: int = 10, seed: int = 0) -> str:
+    """
+    Текст конфигурации примерно с keys простыми ключами. При depth > 0
+    ключи лежат в цепочках вложенных блоков глубиной depth по block_size
+    ключей на уровень; при depth = 0 все ключи на верхнем уровне.
+    Выражения ссылаются на числовые константы верхнего уровня, определённые
+    выше, поэтому все они вычислимы при последовательном разборе.
+    """
+    rng = random.Random(seed)
+    lines = ['% синтетическая конфигурация']
+    constants = []
+    emitted = 0
+
+    def constant():
+        nonlocal emitted
+        name = f'c{len(constants)}'
+        lines.append(f'{name} = {rng.randint(1, 10000)};')
+        constants.append(name)
+        emitted += 1
+
+    def leaf(indent: str, name: str):
+        nonlocal emitted
+        roll = rng.random()
+        if roll < expression_ratio and constants:
+            operands = [rng.choice(constants) for _ in range(rng.randint(1, 3))]
+            program = operands[0]
+            for operand in operands[1:]:
+                program += f' {operand} {rng.choice(_OPERATORS)}'
+            value = f'${program} {rng.randint(1, 9)} +$'
+        elif roll < expression_ratio + string_ratio:
+            value = f'[[{rng.choice(_WORDS)} {rng.randint(0, 99999)}]]'
+        elif roll < expression_ratio + string_ratio + 0.1:
+            value = rng.choice(('true', 'false'))
+        else:
+            value = str(rng.randint(0, 100000))
+        lines.append(f'{indent}{name} = {value};')
+        emitted += 1
+
+    group = 0
+    while emitted < keys:
+        if depth <= 0 or len(constants) < 4 or rng.random() < 0.1:
+            if len(constants) < 4 or rng.random() < 0.5:
+                constant()
+            else:
+                leaf('', f'k{emitted}')
+            continue
+
+        for level in range(depth):
+            indent = '    ' * level
+            lines.append(f'{indent}g{group}_{level} = @{{')
+            for i in range(block_size):
+                leaf(indent + '    ', f'v{i}')
+        for level in reversed(range(depth)):
+            lines.append('    ' * level + '};')
+        group += 1
+
+    return '\n'.join(lines) + '\n'
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    nesting = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    sys.stdout.write(generate_config(count, nesting))
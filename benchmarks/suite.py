@@ -0,0 +1,163 @@
+"""
+Набор замеров масштабирования: полный конвейер и каждый этап на
+синтетических конфигурациях разного размера, вложенности и плотности
+выражений и строк. Результаты сравниваются с сохранённой базой; рост
+времени или памяти сверх порога считается регрессией (код выхода 1).
+
+Запуск:
+    python -m benchmarks.suite                    # сравнить с базой, если она есть
+    python -m benchmarks.suite --save-baseline    # записать новую базу
+    python -m benchmarks.suite --quick --threshold 0.3
+"""
+import argparse
+import io
+import json
+import math
+import os
+import sys
+from typing import Any, Dict, List, Tuple
+from benchmarks.generator import generate_config
+from src.emitter import write_toml
+from src.pipeline import translate_source
+from src.profiling import Profiler
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+STAGES = ('lex', 'parse', 'evaluate', 'emit')
+
+# Измерение -> (параметр генератора, значения, остальные параметры)
+DIMENSIONS = {
+    'keys': ('keys', (1000, 2000, 4000, 8000), {'depth': 1}),
+    'depth': ('depth', (1, 4, 16, 64), {'keys': 4000}),
+    'expressions': ('expression_ratio', (0.0, 0.25, 0.5, 0.9), {'keys': 4000, 'string_ratio': 0.05}),
+    'strings': ('string_ratio', (0.0, 0.25, 0.5, 0.9), {'keys': 4000, 'expression_ratio': 0.05}),
+}
+
+
+def measure(source: str, repeat: int) -> Dict[str, Any]:
+    """Лучшее время каждого этапа из repeat прогонов и пик памяти конвейера."""
+    best = {name: math.inf for name in STAGES}
+    for _ in range(repeat):
+        profiler = Profiler(memory=False)
+        _run(source, profiler)
+        for metrics in profiler.stages:
+            best[metrics.name] = min(best[metrics.name], metrics.seconds)
+
+    profiler = Profiler(memory=True)
+    _run(source, profiler)
+    total = sum(best.values())
+    return {
+        'chars': len(source),
+        'stages': best,
+        'total': total,
+        'chars_per_second': len(source) / total if total else 0.0,
+        'peak_bytes': max(metrics.peak_bytes for metrics in profiler.stages),
+    }
+
+
+def _run(source: str, profiler: Profiler):
+    config = translate_source(source, profiler=profiler)
+    with profiler.stage('emit'):
+        write_toml(config, io.StringIO())
+
+
+def run_suite(quick: bool = False, repeat: int = 3) -> Dict[str, Dict[str, Any]]:
+    results = {}
+    for dimension, (parameter, values, fixed) in DIMENSIONS.items():
+        for value in values:
+            params = dict(fixed)
+            params[parameter] = value
+            if quick:
+                params['keys'] = max(100, params.get('keys', 1000) // 8)
+            source = generate_config(**params)
+            result = measure(source, repeat)
+            result['dimension'] = dimension
+            result['value'] = value
+            result['keys'] = params['keys']
+            results[f'{dimension}={value}'] = result
+    return results
+
+
+def scaling_report(results: Dict[str, Dict[str, Any]]) -> str:
+    """
+    Таблицы по измерениям: время, время на ключ, а для числа ключей ещё и
+    показатель роста между соседними точками (log t2/t1 / log k2/k1):
+    около 1 - линейный рост, около 2 - квадратичный. В остальных
+    измерениях число ключей постоянно, квадратичность видна по мкс/ключ.
+    """
+    lines = []
+    for dimension in DIMENSIONS:
+        rows = [result for result in results.values() if result['dimension'] == dimension]
+        lines.append(f"\n== {dimension} ==")
+        lines.append(f"{'значение':>10} {'всего, мс':>10} {'мкс/ключ':>9} {'символов/с':>12} "
+                     f"{'память, МБ':>11} {'рост':>6}  этапы, мс")
+        previous = None
+        for result in rows:
+            growth = ''
+            if dimension == 'keys' and previous is not None and result['keys'] != previous[0]:
+                exponent = (math.log(result['total'] / previous[1]) /
+                            math.log(result['keys'] / previous[0]))
+                growth = f"{exponent:.2f}" + (' ⚠' if exponent > 1.3 else '')
+            previous = (result['keys'], result['total'])
+            stages = ' '.join(f"{name}={result['stages'][name] * 1000:.1f}" for name in STAGES)
+            lines.append(f"{result['value']:>10} {result['total'] * 1000:>10.1f} "
+                         f"{result['total'] / result['keys'] * 1e6:>9.1f} "
+                         f"{result['chars_per_second']:>12,.0f} "
+                         f"{result['peak_bytes'] / 1e6:>11.2f} {growth:>6}  {stages}")
+    return '\n'.join(lines)
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+            threshold: float) -> List[str]:
+    """Регрессии относительно базы: падение пропускной способности или рост памяти."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        checks: List[Tuple[str, float, float]] = [
+            ('пропускная способность', base['chars_per_second'], result['chars_per_second']),
+            ('пик памяти', result['peak_bytes'], base['peak_bytes']),
+        ]
+        for what, expected, actual in checks:
+            # expected / actual > 1 + threshold: стало медленнее или больше памяти
+            if actual > 0 and expected / actual > 1 + threshold:
+                regressions.append(f"{name}: {what} хуже базы в {expected / actual:.2f} раза")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Замеры масштабирования транслятора')
+    parser.add_argument('--quick', action='store_true', help='Уменьшенные размеры')
+    parser.add_argument('--repeat', type=int, default=3, help='Повторов на точку')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Допустимое ухудшение относительно базы (доля)')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='Файл базы')
+    parser.add_argument('--save-baseline', action='store_true', help='Записать результаты как базу')
+    parser.add_argument('--json', metavar='FILE', help='Записать результаты в JSON')
+    args = parser.parse_args()
+
+    results = run_suite(args.quick, args.repeat)
+    print(scaling_report(results))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\nБаза записана в {args.baseline}")
+        return
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print('\n❌ Регрессии:\n' + '\n'.join(regressions))
+            sys.exit(1)
+        print(f"\n✅ Регрессий сверх {args.threshold:.0%} нет")
+
+
+if __name__ == '__main__':
+    main()
@@ -5,5 +5,14 @@
 __version__ = '1.0.0'
 __author__ = 'Student'
 
-from .cli import main
-from .transformer import ConfigTransformer
\ No newline at end of file
+
+def __getattr__(name):
+    # Подмодули загружаются только по обращению: импорт пакета (его делает
+    # каждый запуск python -m src.cli) не должен тянуть конвейер и tomlkit
+    if name == 'main':
+        from .cli import main
+        return main
+    if name == 'ConfigTransformer':
+        from .transformer import ConfigTransformer
+        return ConfigTransformer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,147 @@
+"""
+Пакетная трансляция множества файлов в пуле процессов.
+"""
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+from .cache import TranslationCache
+from .pipeline import translate_file
+
+GLOB_CHARS = '*?['
+
+
+class BatchResult:
+    """Результат трансляции одного файла пакета."""
+    def __init__(self, input_path: str, output_path: str, seconds: float,
+                 error: Optional[str] = None, cached: bool = False):
+        self.input_path = input_path
+        self.output_path = output_path
+        self.seconds = seconds
+        self.error = error
+        self.cached = cached
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def __repr__(self):
+        status = 'ok' if self.ok else f'error={self.error!r}'
+        return f"BatchResult({self.input_path}, {status}, {self.seconds:.3f}s)"
+
+
+def collect_inputs(patterns: Iterable[str], output_dir: str,
+                   suffix: str = '.toml') -> List[Tuple[str, str]]:
+    """
+    Раскрывает каталоги (все *.cfg рекурсивно) и шаблоны glob в пары
+    (входной файл, выходной файл с расширением suffix). Для каталогов
+    сохраняется структура подкаталогов относительно него, для шаблонов -
+    относительно их части без подстановочных символов, чтобы файлы с
+    одинаковыми именами из разных подкаталогов не попадали в один выход.
+    """
+    pairs = {}
+    output_root = Path(output_dir)
+
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            for source in sorted(path.rglob('*.cfg')):
+                target = output_root / source.relative_to(path).with_suffix(suffix)
+                pairs.setdefault(str(source), str(target))
+            continue
+
+        if any(char in pattern for char in GLOB_CHARS):
+            base = _glob_base(pattern)
+            for source in sorted(glob.glob(pattern, recursive=True)):
+                target = output_root / Path(source).relative_to(base).with_suffix(suffix)
+                pairs.setdefault(source, str(target))
+        else:
+            target = output_root / path.with_suffix(suffix).name
+            pairs.setdefault(pattern, str(target))
+
+    return list(pairs.items())
+
+
+def _glob_base(pattern: str) -> Path:
+    """Каталог перед первой частью шаблона с подстановочными символами."""
+    parts = Path(pattern).parts
+    for index, part in enumerate(parts):
+        if any(char in part for char in GLOB_CHARS):
+            return Path(*parts[:index]) if index else Path('.')
+    return Path(pattern).parent
+
+
+def translate_one(pair: Tuple[str, str], stream: bool = False,
+                  cache: Optional[TranslationCache] = None, output_format: str = 'toml',
+                  mapped: bool = False) -> BatchResult:
+    """Транслирует один файл; ошибка записывается в результат, а не пробрасывается."""
+    input_path, output_path = pair
+    start = time.perf_counter()
+    cached = False
+    try:
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        cached = translate_file(input_path, output_path, stream=stream, cache=cache,
+                                output_format=output_format, mapped=mapped)
+        error = None
+    except Exception as e:
+        error = str(e) or type(e).__name__
+    return BatchResult(input_path, output_path, time.perf_counter() - start, error, cached)
+
+
+def run_batch(pairs: List[Tuple[str, str]], jobs: Optional[int] = None,
+              stream: bool = False, cache: Optional[TranslationCache] = None,
+              output_format: str = 'toml', mapped: bool = False) -> List[BatchResult]:
+    """
+    Транслирует пары файлов в пуле из jobs процессов (по умолчанию - по
+    числу ядер). Результаты возвращаются в порядке входных файлов; пары
+    с уже занятым выходным файлом сразу получают ошибку.
+    """
+    results: List[Optional[BatchResult]] = [None] * len(pairs)
+    pending = []
+    owners = {}
+    for index, (input_path, output_path) in enumerate(pairs):
+        # Два входа с одним выходом перезаписывали бы друг друга из разных
+        # процессов; транслируется только первый, остальные - ошибки
+        target = os.path.normcase(os.path.abspath(output_path))
+        if target in owners:
+            results[index] = BatchResult(input_path, output_path, 0.0,
+                                         f"Выходной файл {output_path} уже занят {owners[target]}")
+        else:
+            owners[target] = input_path
+            pending.append(index)
+
+    worker = partial(translate_one, stream=stream, cache=cache, output_format=output_format,
+                     mapped=mapped)
+    selected = [pairs[index] for index in pending]
+    if jobs == 1 or len(selected) <= 1:
+        done = [worker(pair) for pair in selected]
+    else:
+        workers = jobs or os.cpu_count() or 1
+        chunksize = max(1, len(selected) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            done = list(executor.map(worker, selected, chunksize=chunksize))
+
+    for index, result in zip(pending, done):
+        results[index] = result
+    return results
+
+
+def format_summary(results: List[BatchResult], elapsed: float) -> str:
+    lines = []
+    for result in results:
+        if result.ok:
+            source = ', из кэша' if result.cached else ''
+            lines.append(f"✅ {result.input_path} → {result.output_path} ({result.seconds * 1000:.1f} мс{source})")
+        else:
+            lines.append(f"❌ {result.input_path}: {result.error} ({result.seconds * 1000:.1f} мс)")
+
+    failed = sum(not result.ok for result in results)
+    cached = sum(result.cached for result in results)
+    lines.append(
+        f"Итого файлов: {len(results)}, успешно: {len(results) - failed}, "
+        f"с ошибками: {failed}, из кэша: {cached}, время: {elapsed:.2f} с"
+    )
+    return '\n'.join(lines)
@@ -0,0 +1,186 @@
+"""
+Дисковый кэш результатов трансляции с адресацией по содержимому.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+from . import __version__
+from .formats import CACHE_DIR_ENV, DEFAULT_MAX_BYTES
+
+_HASH_CHUNK = 1 << 20
+
+
+class TranslationCache:
+    """
+    Каталог с результатами трансляции. Ключ - SHA-256 от версии
+    транслятора, параметров и байтов входного файла; значение - готовый
+    TOML (или снимок) и, по желанию, промежуточный словарь в JSON. Записи пишутся
+    атомарно (временный файл и os.replace), при превышении max_bytes
+    удаляются давно не использованные.
+    """
+
+    def __init__(self, directory: Union[str, Path], max_bytes: int = DEFAULT_MAX_BYTES,
+                 store_dicts: bool = False):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.store_dicts = store_dicts
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._size = None
+
+    @staticmethod
+    def make_key(source: Union[bytes, Path, str], options: Optional[Dict[str, Any]] = None) -> str:
+        """Ключ по содержимому: bytes или путь к файлу (читается частями)."""
+        digest = hashlib.sha256()
+        digest.update(__version__.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(json.dumps(options or {}, sort_keys=True).encode('utf-8'))
+        digest.update(b'\0')
+        if isinstance(source, bytes):
+            digest.update(source)
+        else:
+            with open(source, 'rb') as f:
+                for chunk in iter(lambda: f.read(_HASH_CHUNK), b''):
+                    digest.update(chunk)
+        return digest.hexdigest()
+
+    def path_for(self, key: str, suffix: str = '.toml') -> Path:
+        return self.directory / key[:2] / (key + suffix)
+
+    # Чтение
+
+    def lookup(self, key: str, suffix: str = '.toml') -> Optional[Path]:
+        """Путь к записи, если она есть; отмечает запись как использованную."""
+        path = self.path_for(key, suffix)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def get(self, key: str) -> Optional[str]:
+        path = self.lookup(key)
+        if path is None:
+            return None
+        try:
+            return path.read_text(encoding='utf-8')
+        except FileNotFoundError:
+            # Запись удалили между проверкой и чтением
+            self.hits -= 1
+            self.misses += 1
+            return None
+
+    def get_dict(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self.lookup(key, '.json')
+        if path is None:
+            return None
+        try:
+            return json.loads(path.read_text(encoding='utf-8'))
+        except (FileNotFoundError, ValueError):
+            self.hits -= 1
+            self.misses += 1
+            return None
+
+    # Запись
+
+    def put(self, key: str, toml_text: str, config_dict: Optional[Dict[str, Any]] = None):
+        self._write(key, '.toml', toml_text.encode('utf-8'))
+        if config_dict is not None and self.store_dicts:
+            self.put_dict(key, config_dict)
+
+    def put_file(self, key: str, output_path: Union[str, Path], suffix: str = '.toml'):
+        """Кладёт в кэш уже записанный выходной файл, не читая его в память."""
+        self._write(key, suffix, source_path=output_path)
+
+    def put_dict(self, key: str, config_dict: Dict[str, Any]):
+        self._write(key, '.json', json.dumps(config_dict, ensure_ascii=False).encode('utf-8'))
+
+    def _write(self, key: str, suffix: str, data: bytes = None, source_path=None):
+        path = self.path_for(key, suffix)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                if source_path is not None:
+                    with open(source_path, 'rb') as source:
+                        shutil.copyfileobj(source, f)
+                else:
+                    f.write(data)
+            size = os.path.getsize(tmp_name)
+            os.replace(tmp_name, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_name)
+            except FileNotFoundError:
+                pass
+            raise
+
+        self.writes += 1
+        if self._size is None:
+            self._size = self._scan_size()
+        else:
+            self._size += size
+        if self._size > self.max_bytes:
+            self.evict()
+
+    # Вытеснение
+
+    def _entries(self):
+        if not self.directory.exists():
+            return []
+        entries = []
+        for path in self.directory.glob('*/*'):
+            if path.name.startswith('.tmp-'):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        """Удаляет самые давно использованные записи, пока кэш не влезет в max_bytes."""
+        entries = sorted(self._entries(), key=lambda entry: entry[0])
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.evictions += 1
+        self._size = total
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'writes': self.writes,
+            'evictions': self.evictions,
+        }
+
+    def __getstate__(self):
+        # В процессы пула передаётся только конфигурация кэша
+        return {
+            'directory': self.directory,
+            'max_bytes': self.max_bytes,
+            'store_dicts': self.store_dicts,
+        }
+
+    def __setstate__(self, state):
+        self.__init__(**state)
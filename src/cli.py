@@ -2,63 +2,276 @@
 Командный интерфейс для конфигурационного транслятора.
 """
 import argparse
+import json
+import os
 import sys
+import time
 from pathlib import Path
-from .lexer import Lexer
-from .parser import Parser
-from .transformer import ConfigTransformer
+from .formats import CACHE_DIR_ENV, DEFAULT_MAX_BYTES, OUTPUT_FORMATS
+
+# Режимы импортируются внутри своих веток: клиент --connect и --check не
+# должны платить за asyncio, tomlkit, кэш и пул процессов
 
 def main():
     parser = argparse.ArgumentParser(
-        description='Конвертер учебного конфигурационного языка в TOML'
+        description='Конвертер учебного конфигурационного языка в TOML, JSON и двоичные форматы'
     )
     parser.add_argument(
         '-i', '--input',
-        required=True,
         help='Входной файл .cfg'
     )
     parser.add_argument(
         '-o', '--output',
-        required=True,
-        help='Выходной файл .toml'
+        help='Выходной файл (.toml, .json, .msgpack или .cfgsnap - по --format)'
+    )
+    parser.add_argument(
+        '-f', '--format',
+        choices=sorted(OUTPUT_FORMATS),
+        default='toml',
+        help='Формат вывода: TOML, JSON, MessagePack или двоичный снимок для быстрой загрузки сервисами'
+    )
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='Потоковый разбор: файл читается частями, без загрузки целиком'
+    )
+    parser.add_argument(
+        '--mmap',
+        action='store_true',
+        help='Отображать файл в память и разбирать байты без декодирования текста целиком'
+    )
+    parser.add_argument(
+        '--parallel',
+        action='store_true',
+        help='Разбирать один большой файл по частям в --jobs процессах'
+    )
+    parser.add_argument(
+        '-b', '--batch',
+        nargs='+',
+        metavar='PATH',
+        help='Пакетный режим: файлы, каталоги или шаблоны glob с файлами .cfg'
+    )
+    parser.add_argument(
+        '-d', '--output-dir',
+        help='Каталог для результатов пакетного режима'
+    )
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=None,
+        help='Число процессов пакетного режима и --parallel (по умолчанию - по числу ядер)'
+    )
+    parser.add_argument(
+        '--cache-dir',
+        default=os.environ.get(CACHE_DIR_ENV),
+        help=f'Каталог кэша результатов (по умолчанию - из ${CACHE_DIR_ENV})'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Не использовать кэш результатов'
+    )
+    parser.add_argument(
+        '--cache-max-mb',
+        type=int,
+        default=DEFAULT_MAX_BYTES // (1024 * 1024),
+        help='Максимальный размер кэша в мегабайтах'
+    )
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='Следить за входными файлами и пересобирать только изменённые блоки'
+    )
+    parser.add_argument(
+        '--interval',
+        type=float,
+        default=0.5,
+        help='Период опроса файлов в режиме --watch, секунд'
+    )
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Вывести время, счётчики и пик памяти каждого этапа'
+    )
+    parser.add_argument(
+        '--profile-json',
+        metavar='FILE',
+        help='Записать метрики этапов в JSON (включает --profile без таблицы)'
+    )
+    parser.add_argument(
+        '--check',
+        action='store_true',
+        help='Только проверить -i: разобрать и вычислить без записи результата (-o не нужен)'
+    )
+    parser.add_argument(
+        '--lint',
+        action='store_true',
+        help='Вывести отчёт оптимизатора: свёрнутые выражения и неиспользуемые константы'
+    )
+    parser.add_argument(
+        '--serve',
+        metavar='SOCKET',
+        help='Запустить сервер трансляции на Unix-сокете'
+    )
+    parser.add_argument(
+        '--max-concurrency',
+        type=int,
+        default=None,
+        help='Число одновременных трансляций сервера (по умолчанию - по числу ядер)'
+    )
+    parser.add_argument(
+        '--connect',
+        metavar='SOCKET',
+        help='Транслировать -i в -o через запущенный сервер'
+    )
+    parser.add_argument(
+        '--stats',
+        action='store_true',
+        help='С --connect: вывести статистику сервера'
     )
     
     args = parser.parse_args()
     
+    if args.serve:
+        print(f'🚀 Сервер трансляции слушает {args.serve} (Ctrl+C - выход)')
+        from .daemon import serve
+        serve(args.serve, args.max_concurrency)
+        return
+    
+    if args.connect:
+        run_client_mode(args, parser)
+        return
+    
+    if args.stream and args.mmap:
+        parser.error('--stream и --mmap несовместимы')
+    if args.parallel and (args.stream or args.mmap or args.batch or args.watch):
+        parser.error('--parallel работает только с одним файлом без --stream, --mmap и --watch')
+    if args.jobs is not None and args.jobs < 1:
+        parser.error('--jobs должно быть положительным')
+    if args.check and (args.batch or args.watch):
+        parser.error('--check работает только с одним файлом -i без --batch и --watch')
+    
+    if args.batch:
+        if not args.output_dir:
+            parser.error('для пакетного режима нужен --output-dir')
+        if args.watch:
+            from .batch import collect_inputs
+            run_watch_mode(args, lambda: collect_inputs(args.batch, args.output_dir,
+                                                        OUTPUT_FORMATS[args.format]))
+        else:
+            run_batch_mode(args)
+        return
+    
+    if not args.input or not (args.output or args.check):
+        parser.error('нужны -i/--input и -o/--output (или --batch и --output-dir)')
+    
+    if args.watch:
+        run_watch_mode(args, lambda: [(args.input, args.output)])
+        return
+    
     # Проверяем существование входного файла
     input_path = Path(args.input)
     if not input_path.exists():
         print(f'❌ Ошибка: Файл {args.input} не найден', file=sys.stderr)
         sys.exit(1)
     
+    profiler = None
+    if args.profile or args.profile_json:
+        from .profiling import Profiler
+        profiler = Profiler()
+    
+    jobs = (args.jobs or os.cpu_count() or 1) if args.parallel else None
+    
     try:
-        # Читаем входной файл
-        with open(input_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Лексический анализ
-        lexer = Lexer(content)
-        tokens = lexer.tokenize()
-        
-        # Синтаксический анализ
-        parser = Parser(tokens)
-        ast = parser.parse()
-        
-        # Преобразование в словарь и TOML
-        transformer = ConfigTransformer()
-        config_dict = transformer.ast_to_dict(ast)
-        toml_content = transformer.to_toml(config_dict)
-        
-        # Записываем выходной файл
-        output_path = Path(args.output)
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(toml_content)
-        
-        print(f'✅ Конфигурация успешно преобразована в {args.output}')
-        
+        if args.lint:
+            from .pipeline import lint_file
+            print(lint_file(input_path).report(), file=sys.stderr)
+        if args.check:
+            run_check_mode(args, input_path, profiler, jobs)
+        else:
+            run_translate_mode(args, input_path, profiler, jobs)
     except Exception as e:
         print(f'❌ Ошибка преобразования: {e}', file=sys.stderr)
         sys.exit(1)
+    
+    if args.profile:
+        print(profiler.format_table(), file=sys.stderr)
+    if args.profile_json:
+        with open(args.profile_json, 'w', encoding='utf-8') as f:
+            f.write(profiler.to_json())
+
+def run_translate_mode(args, input_path, profiler, jobs):
+    from .pipeline import translate_file
+    cache = make_cache(args)
+    cached = translate_file(input_path, Path(args.output), stream=args.stream, cache=cache,
+                            output_format=args.format, profiler=profiler, mapped=args.mmap,
+                            jobs=jobs)
+    
+    source = ' (из кэша)' if cached else ''
+    print(f'✅ Конфигурация успешно преобразована в {args.output}{source}')
+
+def run_check_mode(args, input_path, profiler, jobs):
+    # Разбор и вычисление без вывода: ни tomlkit, ни кэш не загружаются
+    from .pipeline import read_config
+    config_dict = read_config(input_path, stream=args.stream, profiler=profiler,
+                              mapped=args.mmap, jobs=jobs)
+    print(f'✅ Конфигурация {args.input} корректна: ключей верхнего уровня - {len(config_dict)}')
+
+def make_cache(args):
+    if args.no_cache or not args.cache_dir:
+        return None
+    from .cache import TranslationCache
+    return TranslationCache(args.cache_dir, max_bytes=args.cache_max_mb * 1024 * 1024)
+
+def run_batch_mode(args):
+    from .batch import collect_inputs, format_summary, run_batch
+    pairs = collect_inputs(args.batch, args.output_dir, OUTPUT_FORMATS[args.format])
+    if not pairs:
+        print('❌ Ошибка: не найдено ни одного файла .cfg', file=sys.stderr)
+        sys.exit(1)
+    
+    start = time.perf_counter()
+    results = run_batch(pairs, jobs=args.jobs, stream=args.stream, cache=make_cache(args),
+                        output_format=args.format, mapped=args.mmap)
+    print(format_summary(results, time.perf_counter() - start))
+    
+    if any(not result.ok for result in results):
+        sys.exit(1)
+
+def run_client_mode(args, parser):
+    from .client import request
+    
+    if args.stats:
+        payload = {'op': 'stats'}
+    elif not args.input or not args.output:
+        parser.error('для --connect нужны -i/--input и -o/--output (или --stats)')
+    elif args.format != 'toml':
+        parser.error('сервер возвращает только TOML: --format несовместим с --connect')
+    else:
+        payload = {'op': 'translate', 'path': os.path.abspath(args.input)}
+    
+    try:
+        response = request(args.connect, payload)
+    except OSError as e:
+        print(f'❌ Ошибка: сервер {args.connect} недоступен: {e}', file=sys.stderr)
+        sys.exit(1)
+    
+    if args.stats:
+        print(json.dumps(response.get('stats'), ensure_ascii=False, indent=2))
+        return
+    if not response.get('ok'):
+        print(f'❌ Ошибка преобразования: {response.get("error")}', file=sys.stderr)
+        sys.exit(1)
+    
+    with open(args.output, 'w', encoding='utf-8') as f:
+        f.write(response['toml'])
+    print(f'✅ Конфигурация успешно преобразована в {args.output}')
+
+def run_watch_mode(args, collect):
+    from .watch import Watcher, print_update
+    print(f'👀 Наблюдение за изменениями (опрос раз в {args.interval} с, Ctrl+C - выход)')
+    Watcher(collect, interval=args.interval, on_update=print_update,
+            output_format=args.format).run()
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
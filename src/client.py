@@ -0,0 +1,31 @@
+"""
+Тонкий клиент сервера трансляции (daemon): обычный сокет без asyncio,
+чтобы вызов не платил за запуск цикла событий.
+"""
+import json
+import socket
+from typing import Any, Dict, Optional
+
+
+def encode_message(message: Dict[str, Any]) -> bytes:
+    return json.dumps(message, ensure_ascii=False).encode('utf-8') + b'\n'
+
+
+def request(socket_path: str, payload: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+    """Отправляет один запрос и ждёт ответ."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        sock.sendall(encode_message(payload))
+        with sock.makefile('rb') as f:
+            line = f.readline()
+    if not line:
+        raise ConnectionError('Сервер закрыл соединение без ответа')
+    return json.loads(line)
+
+
+def ping(socket_path: str) -> bool:
+    try:
+        return request(socket_path, {'op': 'ping'}, timeout=1.0).get('ok', False)
+    except OSError:
+        return False
@@ -0,0 +1,189 @@
+"""
+Долгоживущий сервер трансляции на Unix-сокете (asyncio).
+
+Протокол - JSON по строке на запрос и ответ:
+    {"op": "translate", "source": "..."}  или  {"op": "translate", "path": "..."}
+        -> {"ok": true, "toml": "..."}  /  {"ok": false, "error": "..."}
+    {"op": "stats"}  -> {"ok": true, "stats": {...}}
+    {"op": "ping"}   -> {"ok": true}
+Поле "id" запроса, если оно есть, возвращается в ответе. Клиент - в
+модуле client.
+"""
+import asyncio
+import io
+import json
+import math
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from .client import encode_message, ping
+from .emitter import write_toml
+from .evaluator import Evaluator
+from .modules import MODULES
+from .pipeline import translate_source
+
+# Предел длины строки запроса (исходник передаётся целиком)
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+LATENCY_WINDOW = 10000
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Перцентиль по ближайшему рангу для отсортированного списка."""
+    if not values:
+        return 0.0
+    return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+
+class TranslationServer:
+    """
+    Принимает запросы на трансляцию, пока процесс жив: импорт tomlkit,
+    кэш скомпилированных выражений и прочее состояние остаются тёплыми
+    между запросами. Трансляции выполняются в собственном пуле потоков,
+    не больше max_concurrency одновременно; остальные ждут в очереди.
+    """
+
+    def __init__(self, socket_path: str, max_concurrency: Optional[int] = None):
+        self.socket_path = socket_path
+        self.max_concurrency = max_concurrency or os.cpu_count() or 1
+        self.started = time.monotonic()
+        self.requests = 0
+        self.errors = 0
+        self.active = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self._server = None
+        self._limit = None
+        self._executor = None
+
+    async def start(self):
+        if os.path.exists(self.socket_path):
+            # Сокет от прошлого запуска: убираем, только если никто не слушает
+            if ping(self.socket_path):
+                raise RuntimeError(f"Сервер уже запущен на {self.socket_path}")
+            os.unlink(self.socket_path)
+        self._limit = asyncio.Semaphore(self.max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        self._server = await asyncio.start_unix_server(
+            self._handle_client, path=self.socket_path, limit=MAX_MESSAGE_BYTES)
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+            self._executor.shutdown(wait=False)
+            try:
+                os.unlink(self.socket_path)
+            except FileNotFoundError:
+                pass
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # Строка длиннее MAX_MESSAGE_BYTES
+                    writer.write(encode_message({'ok': False, 'error': 'Слишком длинный запрос'}))
+                    break
+                if not line:
+                    break
+                writer.write(encode_message(await self.handle(line)))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def handle(self, line: bytes) -> Dict[str, Any]:
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError('запрос должен быть объектом JSON')
+        except ValueError as e:
+            return {'ok': False, 'error': f'Некорректный запрос: {e}'}
+
+        op = request.get('op', 'translate')
+        if op == 'ping':
+            response = {'ok': True}
+        elif op == 'stats':
+            response = {'ok': True, 'stats': self.stats()}
+        elif op == 'translate':
+            response = await self._translate(request)
+        else:
+            response = {'ok': False, 'error': f'Неизвестная операция: {op}'}
+
+        if 'id' in request:
+            response['id'] = request['id']
+        return response
+
+    async def _translate(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        async with self._limit:
+            self.active += 1
+            start = time.perf_counter()
+            try:
+                toml_text = await asyncio.get_running_loop().run_in_executor(
+                    self._executor, translate_request, request)
+                response = {'ok': True, 'toml': toml_text}
+            except Exception as e:
+                self.errors += 1
+                response = {'ok': False, 'error': str(e) or type(e).__name__}
+            finally:
+                self.active -= 1
+            self.requests += 1
+            self.latencies.append(time.perf_counter() - start)
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+        cache = Evaluator.cache_info()
+        return {
+            'uptime': time.monotonic() - self.started,
+            'requests': self.requests,
+            'errors': self.errors,
+            'active': self.active,
+            'max_concurrency': self.max_concurrency,
+            'latency_ms': {
+                name: percentile(latencies, fraction) * 1000
+                for name, fraction in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99), ('max', 1.0))
+            },
+            'expression_cache': {'hits': cache.hits, 'misses': cache.misses,
+                                 'size': cache.currsize},
+            'include_cache': MODULES.stats(),
+        }
+
+
+def translate_request(request: Dict[str, Any]) -> str:
+    """Исходник из поля source или файла path -> текст TOML."""
+    path = request.get('path')
+    if 'source' in request:
+        content = request['source']
+    elif path is not None:
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+    else:
+        raise ValueError('нужно поле source или path')
+
+    # Подключаемые файлы ищутся от каталога path; их AST общий для всех
+    # запросов (modules.MODULES)
+    buffer = io.StringIO()
+    write_toml(translate_source(content, path=path), buffer)
+    return buffer.getvalue()
+
+
+def serve(socket_path: str, max_concurrency: Optional[int] = None):
+    """Запускает сервер до Ctrl+C."""
+    server = TranslationServer(socket_path, max_concurrency)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,175 @@
+"""
+Потоковый вывод TOML и JSON без построения промежуточного документа
+(tomlkit или строки json.dumps целиком).
+"""
+import re
+from json.encoder import encode_basestring
+from typing import Any, Dict, TextIO
+
+BARE_KEY = re.compile(r'[A-Za-z0-9_-]+')
+
+_ESCAPES = {
+    '"': '\\"',
+    '\\': '\\\\',
+    '\b': '\\b',
+    '\t': '\\t',
+    '\n': '\\n',
+    '\f': '\\f',
+    '\r': '\\r',
+}
+_NEEDS_ESCAPE = re.compile(r'["\\\x00-\x1f\x7f]')
+
+
+def _escape_char(match) -> str:
+    char = match.group()
+    return _ESCAPES.get(char) or f'\\u{ord(char):04x}'
+
+
+def format_string(value: str) -> str:
+    return '"' + _NEEDS_ESCAPE.sub(_escape_char, value) + '"'
+
+
+def format_key(key: str) -> str:
+    if BARE_KEY.fullmatch(key):
+        return key
+    return format_string(key)
+
+
+def format_value(value: Any) -> str:
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, str):
+        return format_string(value)
+    raise TypeError(f"Значение типа {type(value).__name__} нельзя записать в TOML")
+
+
+class TomlEmitter:
+    """
+    Пишет словарь конфигурации в поток в том же виде, что и tomlkit:
+    в каждой таблице сначала простые значения, затем вложенные таблицы
+    в порядке ключей; заголовок таблицы без значений, но с подтаблицами,
+    опускается; перед каждым заголовком, кроме первой строки, - пустая строка.
+    """
+
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+
+    def write(self, config: Dict[str, Any]):
+        write = self.stream.write
+        started = False
+        stack = [((), config)]
+
+        while stack:
+            path, table = stack.pop()
+            lines = []
+            subtables = []
+            for key, value in table.items():
+                if isinstance(value, dict):
+                    subtables.append((path + (format_key(key),), value))
+                else:
+                    lines.append(f"{format_key(key)} = {format_value(value)}\n")
+
+            if path and (lines or not subtables):
+                header = f"[{'.'.join(path)}]\n"
+                lines.insert(0, '\n' + header if started else header)
+            if lines:
+                write(''.join(lines))
+                started = True
+
+            stack.extend(reversed(subtables))
+
+
+def write_toml(config: Dict[str, Any], stream: TextIO):
+    TomlEmitter(stream).write(config)
+
+
+_INFINITY = float('inf')
+
+
+def format_json_value(value: Any) -> str:
+    """Простое значение так же, как json.dumps (NaN и Infinity - как там)."""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, str):
+        return encode_basestring(value)
+    if isinstance(value, int):
+        return int.__repr__(value)
+    if isinstance(value, float):
+        if value != value:
+            return 'NaN'
+        if value == _INFINITY:
+            return 'Infinity'
+        if value == -_INFINITY:
+            return '-Infinity'
+        return float.__repr__(value)
+    raise TypeError(f"Значение типа {type(value).__name__} нельзя записать в JSON")
+
+
+class JsonEmitter:
+    """
+    Пишет словарь конфигурации в поток как JSON, символ в символ как
+    json.dumps(config, ensure_ascii=False, indent=indent), и перевод
+    строки в конце. Обход по явному стеку: глубина вложенности не
+    ограничена рекурсией, как у json; текст уходит в поток частями.
+    """
+    # Сколько фрагментов копить перед записью в поток
+    CHUNK = 4096
+
+    def __init__(self, stream: TextIO, indent: int = 2):
+        self.stream = stream
+        self.indent = ' ' * indent
+
+    def write(self, config: Dict[str, Any]):
+        write = self.stream.write
+        if not config:
+            write('{}\n')
+            return
+
+        indent = self.indent
+        parts = ['{']
+        append = parts.append
+        # Закодированный ключ с разделителем: ключи повторяются
+        keys: Dict[str, str] = {}
+        # Итераторы открытых объектов; отступ ключей - по глубине стека
+        stack = [iter(config.items())]
+        prefix = '\n' + indent
+        while stack:
+            item = next(stack[-1], None)
+            if item is None:
+                stack.pop()
+                append('\n' + indent * len(stack) + '}')
+                prefix = ',\n' + indent * len(stack)
+                continue
+
+            key, value = item
+            encoded = keys.get(key)
+            if encoded is None:
+                encoded = keys[key] = encode_basestring(key) + ': '
+            cls = value.__class__
+            if cls is str:
+                append(prefix + encoded + encode_basestring(value))
+            elif cls is int:
+                append(prefix + encoded + int.__repr__(value))
+            elif isinstance(value, dict):
+                if value:
+                    append(prefix + encoded + '{')
+                    stack.append(iter(value.items()))
+                    prefix = '\n' + indent * len(stack)
+                    continue
+                append(prefix + encoded + '{}')
+            else:
+                append(prefix + encoded + format_json_value(value))
+            prefix = ',\n' + indent * len(stack)
+
+            if len(parts) >= self.CHUNK:
+                write(''.join(parts))
+                parts.clear()
+
+        append('\n')
+        write(''.join(parts))
+
+
+def write_json(config: Dict[str, Any], stream: TextIO):
+    JsonEmitter(stream).write(config)
@@ -9,9 +9,14 @@ class LexerError(ConfigError):
     """Ошибка лексического анализа."""
     def __init__(self, message, line, column):
         super().__init__(f"[Lexer] {message} (строка {line}, позиция {column})")
+        self.message = message
         self.line = line
         self.column = column
 
+    def __reduce__(self):
+        # Ошибка передаётся из процессов пула через pickle
+        return type(self), (self.message, self.line, self.column)
+
 class ParserError(ConfigError):
     """Ошибка синтаксического анализа."""
     def __init__(self, message, line=None):
@@ -19,8 +24,37 @@ class ParserError(ConfigError):
             super().__init__(f"[Parser] {message} (строка {line})")
         else:
             super().__init__(f"[Parser] {message}")
+        self.message = message
         self.line = line
 
+    def __reduce__(self):
+        return type(self), (self.message, self.line)
+
 class EvaluatorError(ConfigError):
     """Ошибка вычисления выражения."""
-    pass
\ No newline at end of file
+    pass
+
+class ExpressionError(EvaluatorError):
+    """Некорректная постфиксная программа, найденная до вычисления."""
+    def __init__(self, message, line, column):
+        super().__init__(f"[Expression] {message} (строка {line}, позиция {column})")
+        self.message = message
+        self.line = line
+        self.column = column
+
+    def __reduce__(self):
+        return type(self), (self.message, self.line, self.column)
+
+class DependencyCycleError(EvaluatorError):
+    """Циклическая зависимость между ключами."""
+    def __init__(self, cycle):
+        super().__init__("Циклическая зависимость: " + " -> ".join(cycle))
+        self.cycle = cycle
+
+class IncludeError(ConfigError):
+    """Подключаемый файл не найден или подключается циклически."""
+    pass
+
+class SnapshotError(ConfigError):
+    """Повреждённый или несовместимый двоичный снимок конфигурации."""
+    pass
@@ -1,69 +1,158 @@
 """
 Вычислитель выражений $...$
 """
+import operator
+import re
+from functools import lru_cache
+from typing import Any, List, Mapping, Optional, Tuple
+from .errors import EvaluatorError
+from .symbols import SymbolTable
+
+# Размер LRU-кэша скомпилированных выражений
+EXPRESSION_CACHE_SIZE = 4096
+
+# Коды операций постфиксной программы
+OP_CONST = 0
+OP_LOAD = 1
+OP_BINARY = 2
+
+# Литералы со знаком, как в README: одиночные + и - - операторы
+_INT_LITERAL = re.compile(r'[+-]?\d+')
+_FLOAT_LITERAL = re.compile(r'[+-]?(?:\d+\.\d*|\.\d+)')
+
+
+def _divide(a, b):
+    """Деление: целочисленное для целых, деление на ноль даёт 0."""
+    if b == 0:
+        return 0
+    if isinstance(a, int) and isinstance(b, int):
+        return a // b
+    return a / b
+
+
+def _modulo(a, b):
+    """Остаток от деления, по нулю даёт 0."""
+    if b == 0:
+        return 0
+    return a % b
+
+
+OPERATORS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': _divide,
+    'mod': _modulo,
+}
+
+
+def find_stack_error(expression: str) -> Optional[Tuple[Optional[int], str]]:
+    """
+    Проверяет постфиксную программу без вычисления: None, если операндов
+    хватает и остаётся ровно один результат (или программа пуста), иначе
+    (номер лексемы или None для выражения целиком, текст ошибки).
+    """
+    depth = 0
+    for index, word in enumerate(expression.split()):
+        if word in OPERATORS:
+            if depth < 2:
+                return index, "Недостаточно операндов для"
+            depth -= 1
+        else:
+            depth += 1
+    if depth > 1:
+        return None, "Лишние операнды в выражении"
+    return None
+
+
+class CompiledExpression:
+    """
+    Скомпилированное постфиксное выражение: список операций
+    (OP_CONST, значение), (OP_LOAD, имя), (OP_BINARY, функция).
+    """
+    __slots__ = ('source', 'code', 'names')
+
+    def __init__(self, source: str, code: List[Tuple[int, Any]]):
+        self.source = source
+        self.code = code
+        # Имена переменных, на которые ссылается выражение, в порядке появления
+        self.names = tuple(dict.fromkeys(arg for op, arg in code if op == OP_LOAD))
+
+    def evaluate(self, variables: Mapping[str, Any]) -> Any:
+        """
+        Выполняет программу. Неизвестное имя остаётся строкой, как и
+        раньше; нехватка операндов - ошибка EvaluatorError.
+        """
+        stack = []
+        push = stack.append
+        for op, arg in self.code:
+            if op == OP_CONST:
+                push(arg)
+            elif op == OP_LOAD:
+                push(variables.get(arg, arg))
+            else:
+                if len(stack) < 2:
+                    raise EvaluatorError(f"Недостаточно операндов в выражении: {self.source}")
+                b = stack.pop()
+                stack[-1] = arg(stack[-1], b)
+
+        return stack[0] if stack else 0
+
+    def __repr__(self):
+        return f"CompiledExpression({self.source!r})"
+
+
+@lru_cache(maxsize=EXPRESSION_CACHE_SIZE)
+def compile_expression(expression: str) -> CompiledExpression:
+    """Компилирует текст выражения; результат кэшируется по тексту."""
+    code = []
+    for token in expression.split():
+        if token in OPERATORS:
+            code.append((OP_BINARY, OPERATORS[token]))
+        elif _INT_LITERAL.fullmatch(token):
+            code.append((OP_CONST, int(token)))
+        elif _FLOAT_LITERAL.fullmatch(token):
+            code.append((OP_CONST, float(token)))
+        else:
+            code.append((OP_LOAD, token))
+    return CompiledExpression(expression, code)
+
+
 class Evaluator:
     def __init__(self):
-        self.variables = {}
-    
+        self.symbols = SymbolTable()
+
+    @property
+    def variables(self) -> dict:
+        """Снимок имён, видимых в текущей области."""
+        return self.symbols.visible()
+
     def evaluate_expression(self, expression: str, context: dict = None) -> any:
         """
-        Упрощенный evaluator для выражений вида $a b +$
-        В реальном проекте нужно реализовать полноценный парсер выражений.
+        Вычисляет постфиксное выражение вида $a b +$. Текст компилируется
+        один раз (compile_expression), переменные подставляются как
+        отдельные токены программы, а не заменой подстрок.
         """
         if context:
-            self.variables.update(context)
-        
-        # Простая замена переменных
-        for var_name, value in self.variables.items():
-            expression = expression.replace(var_name, str(value))
-        
-        # Упрощенная обработка
-        tokens = expression.split()
-        
-        # Если это просто число после замены
-        if len(tokens) == 1:
-            try:
-                if '.' in tokens[0]:
-                    return float(tokens[0])
-                return int(tokens[0])
-            except ValueError:
-                return tokens[0]
-        
-        # Базовая поддержка простых операций
-        stack = []
-        for token in tokens:
-            if token.isdigit() or (token.replace('.', '').isdigit() and token.count('.') == 1):
-                if '.' in token:
-                    stack.append(float(token))
-                else:
-                    stack.append(int(token))
-            elif token == '+':
-                b = stack.pop()
-                a = stack.pop()
-                stack.append(a + b)
-            elif token == '-':
-                b = stack.pop()
-                a = stack.pop()
-                stack.append(a - b)
-            elif token == '*':
-                b = stack.pop()
-                a = stack.pop()
-                stack.append(a * b)
-            elif token == '/':
-                b = stack.pop()
-                a = stack.pop()
-                if b != 0:
-                    stack.append(a / b)
-                else:
-                    stack.append(0)
-            else:
-                # Пробуем получить значение переменной
-                if token in self.variables:
-                    stack.append(self.variables[token])
-                else:
-                    stack.append(token)
-        
-        return stack[0] if stack else 0
-    
+            for name, value in context.items():
+                self.symbols.define(name, value)
+
+        return compile_expression(expression).evaluate(self.symbols)
+
+    def evaluate_compiled(self, compiled: CompiledExpression) -> Any:
+        """Выполняет уже скомпилированную программу (например, после Optimizer)."""
+        return compiled.evaluate(self.symbols)
+
     def set_variable(self, name: str, value):
-        self.variables[name] = value
\ No newline at end of file
+        self.symbols.define(name, value)
+
+    def push_scope(self):
+        self.symbols.push_scope()
+
+    def pop_scope(self):
+        self.symbols.pop_scope()
+
+    @staticmethod
+    def cache_info():
+        """Статистика кэша скомпилированных выражений (hits, misses, ...)."""
+        return compile_expression.cache_info()
@@ -0,0 +1,55 @@
+"""
+Форматы вывода и настройки кэша по умолчанию. Модуль без зависимостей,
+чтобы командная строка могла построить список вариантов, не загружая
+конвейер и кэш: модуль эмиттера импортируется только при записи.
+"""
+from typing import Any, Callable, Dict, NamedTuple, Tuple, Union
+
+# Эмиттер получает вычисленный словарь и открытый поток: текстовый
+# (UTF-8) или двоичный - по флагу binary формата
+Writer = Callable[[Dict[str, Any], Any], None]
+
+
+class OutputFormat(NamedTuple):
+    suffix: str
+    # 'модуль:функция' (модуль относительно пакета, если начинается с
+    # точки) или сама функция
+    writer: Union[str, Writer]
+    binary: bool = False
+
+
+FORMATS: Dict[str, OutputFormat] = {
+    'toml': OutputFormat('.toml', '.emitter:write_toml'),
+    'json': OutputFormat('.json', '.emitter:write_json'),
+    'msgpack': OutputFormat('.msgpack', '.packing:write_msgpack', binary=True),
+    'snapshot': OutputFormat('.cfgsnap', '.snapshot:write_snapshot', binary=True),
+}
+
+# Формат вывода -> расширение выходного файла
+OUTPUT_FORMATS = {name: output.suffix for name, output in FORMATS.items()}
+
+
+def register_format(name: str, suffix: str, writer: Union[str, Writer], binary: bool = False):
+    """Добавляет формат вывода; --format видит его, если регистрация прошла до разбора ключей."""
+    FORMATS[name] = OutputFormat(suffix, writer, binary)
+    OUTPUT_FORMATS[name] = suffix
+
+
+def load_writer(name: str) -> Tuple[Writer, bool]:
+    """Функция записи формата name и признак двоичного потока."""
+    try:
+        output = FORMATS[name]
+    except KeyError:
+        raise ValueError(f"Неизвестный формат вывода: {name}") from None
+
+    writer = output.writer
+    if isinstance(writer, str):
+        from importlib import import_module
+        module, _, attribute = writer.partition(':')
+        writer = getattr(import_module(module, __package__), attribute)
+    return writer, output.binary
+
+
+# Переменная окружения с каталогом кэша и его размер по умолчанию
+CACHE_DIR_ENV = 'CFG_TRANSLATOR_CACHE_DIR'
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
@@ -0,0 +1,256 @@
+"""
+Граф зависимостей между ключами конфигурации и ленивое вычисление по нему.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+from .errors import DependencyCycleError
+from .evaluator import compile_expression
+from .parser import ASTNode, AssignmentNode, BlockNode, ExpressionNode, ValueNode
+
+_VISITING = 1
+_DONE = 2
+
+
+class Definition:
+    """
+    Одно определение ключа. У блока есть members (определения в порядке
+    файла) и scope (имя -> определения этого имени в порядке связывания).
+    """
+    __slots__ = ('key', 'path', 'node', 'parent', 'seq',
+                 'members', 'scope', 'expression', 'refs', 'deps')
+
+    def __init__(self, key: str, path: str, node: Optional[ASTNode], parent: Optional['Definition']):
+        self.key = key
+        self.path = path
+        self.node = node
+        self.parent = parent
+        self.seq = -1            # момент связывания при последовательном вычислении
+        self.members = None
+        self.scope = None
+        self.expression = None   # CompiledExpression для ExpressionNode
+        self.refs = {}           # имя из выражения -> Definition или None
+        self.deps = []
+
+    @property
+    def is_block(self) -> bool:
+        return self.members is not None
+
+    def __repr__(self):
+        return f"Definition({self.path})"
+
+
+class DependencyGraph:
+    """
+    Граф зависимостей, построенный по ссылкам в выражениях $...$.
+
+    Имя разрешается так же, как при последовательном вычислении: к
+    последнему определению, связанному до ссылки, начиная с ближайшей
+    области видимости. Если такого нет, ссылка указывает вперёд - на
+    итоговое определение имени в ближайшей области, где оно есть; так
+    появляются циклы, о которых сообщает DependencyCycleError. При
+    forward_references=False такая ссылка не разрешается, и выражение,
+    как и при последовательном вычислении, видит вместо значения имя.
+
+    Значения вычисляются лениво, только для запрошенных ключей и их
+    зависимостей, в топологическом порядке, и запоминаются.
+    """
+
+    def __init__(self, nodes: Iterable[ASTNode], forward_references: bool = True):
+        self.forward_references = forward_references
+        self.root = Definition('', '', None, None)
+        self.root.members = []
+        self.root.scope = {}
+        self.definitions: Dict[str, Definition] = {}
+        self._memo: Dict[Definition, Any] = {}
+
+        self._build(nodes)
+        self._link()
+
+    # Построение
+
+    def _build(self, nodes: Iterable[ASTNode]):
+        seq = 0
+        stack = [(self.root, iter(nodes))]
+        while stack:
+            block, pending = stack[-1]
+            node = next(pending, None)
+
+            if node is None:
+                stack.pop()
+                if block is not self.root:
+                    # Блок связывается с именем после вычисления содержимого
+                    block.seq = seq
+                    seq += 1
+                    block.parent.scope.setdefault(block.key, []).append(block)
+                continue
+
+            members = _block_members(node)
+            if members is None and not isinstance(node, AssignmentNode):
+                continue
+
+            path = f"{block.path}.{node.key}" if block.path else node.key
+            definition = Definition(node.key, path, node, block)
+            block.members.append(definition)
+
+            if members is not None:
+                definition.members = []
+                definition.scope = {}
+                stack.append((definition, iter(members)))
+            else:
+                definition.seq = seq
+                seq += 1
+                block.scope.setdefault(node.key, []).append(definition)
+
+    def _link(self):
+        stack = [self.root]
+        while stack:
+            block = stack.pop()
+            for key, defs in block.scope.items():
+                if block is not self.root:
+                    self.definitions[f"{block.path}.{key}"] = defs[-1]
+                else:
+                    self.definitions[key] = defs[-1]
+            block.deps = [defs[-1] for defs in block.scope.values()]
+
+            for definition in block.members:
+                if definition.is_block:
+                    stack.append(definition)
+                elif isinstance(definition.node.value, ExpressionNode):
+                    expression = compile_expression(definition.node.value.expression)
+                    definition.expression = expression
+                    for name in expression.names:
+                        target = self._resolve(name, definition)
+                        definition.refs[name] = target
+                        if target is not None and target not in definition.deps:
+                            definition.deps.append(target)
+
+    def _resolve(self, name: str, definition: Definition) -> Optional[Definition]:
+        head, *parts = name.split('.')
+        target = None
+
+        # Последнее определение, связанное до ссылки
+        block = definition.parent
+        while block is not None and target is None:
+            for candidate in reversed(block.scope.get(head, ())):
+                if candidate.seq < definition.seq:
+                    target = candidate
+                    break
+            block = block.parent
+
+        # Ссылка вперёд: итоговое определение в ближайшей области
+        block = definition.parent if self.forward_references else None
+        while block is not None and target is None:
+            defs = block.scope.get(head)
+            if defs:
+                target = defs[-1]
+            block = block.parent
+
+        for part in parts:
+            if target is None or not target.is_block or part not in target.scope:
+                return None
+            target = target.scope[part][-1]
+        return target
+
+    # Порядок вычисления
+
+    def _topological(self, targets: Iterable[Definition], done) -> List[Definition]:
+        """Определения, нужные для targets и ещё не вычисленные, в порядке зависимостей."""
+        order = []
+        state = {}
+        for target in targets:
+            stack = [target]
+            while stack:
+                definition = stack[-1]
+                if definition in done or state.get(definition) == _DONE:
+                    stack.pop()
+                    continue
+
+                if definition not in state:
+                    state[definition] = _VISITING
+                    for dep in definition.deps:
+                        if dep in done or state.get(dep) == _DONE:
+                            continue
+                        if state.get(dep) == _VISITING:
+                            raise DependencyCycleError(self._cycle(stack, state, dep))
+                        stack.append(dep)
+                else:
+                    stack.pop()
+                    state[definition] = _DONE
+                    order.append(definition)
+        return order
+
+    @staticmethod
+    def _cycle(stack, state, dep) -> List[str]:
+        path = []
+        for definition in stack:
+            if state.get(definition) == _VISITING and definition not in path:
+                path.append(definition)
+        cycle = [definition.path or '<root>' for definition in path[path.index(dep):]]
+        return cycle + [dep.path]
+
+    def evaluation_order(self, paths: Optional[Iterable[str]] = None) -> List[str]:
+        """Порядок вычисления ключей paths (по умолчанию - всех) с проверкой циклов."""
+        targets = [self.root] if paths is None else [self.definition(p) for p in paths]
+        return [d.path for d in self._topological(targets, ()) if d is not self.root]
+
+    def order(self, definitions: Iterable[Definition]) -> List[Definition]:
+        """Определения definitions и всё, от чего они зависят, в порядке вычисления."""
+        return self._topological(definitions, ())
+
+    def dependencies(self, path: str) -> List[str]:
+        """Прямые зависимости ключа."""
+        return [dep.path for dep in self.definition(path).deps]
+
+    # Вычисление
+
+    def definition(self, path: str) -> Definition:
+        try:
+            return self.definitions[path]
+        except KeyError:
+            raise KeyError(f"Ключ {path} не определён") from None
+
+    def evaluate(self, definition: Definition, memo: Optional[Dict[Definition, Any]] = None) -> Any:
+        """Вычисляет определение и всё, от чего оно зависит, запоминая в memo."""
+        if memo is None:
+            memo = self._memo
+        for pending in self._topological([definition], memo):
+            memo[pending] = self.compute(pending, memo)
+        return memo[definition]
+
+    def get(self, path: str) -> Any:
+        return self.evaluate(self.definition(path))
+
+    def __getitem__(self, path: str) -> Any:
+        return self.get(path)
+
+    def __contains__(self, path: str) -> bool:
+        return path in self.definitions
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self.evaluate(self.root)
+
+    @staticmethod
+    def compute(definition: Definition, memo: Dict[Definition, Any]) -> Any:
+        """Значение одного определения; значения его зависимостей уже в memo."""
+        if definition.is_block:
+            return {key: memo[defs[-1]] for key, defs in definition.scope.items()}
+
+        value = definition.node.value
+        if isinstance(value, ValueNode):
+            return value.value
+        if definition.expression is not None:
+            env = {name: memo[target] for name, target in definition.refs.items() if target is not None}
+            try:
+                return definition.expression.evaluate(env)
+            except Exception:
+                # Как и ConfigTransformer, оставляем невычислимое выражение строкой
+                return f"${{{value.expression}}}"
+        return str(value)
+
+
+def _block_members(node: ASTNode) -> Optional[List[ASTNode]]:
+    """Содержимое блока для BlockNode или присваивания блока, иначе None."""
+    if isinstance(node, BlockNode):
+        return node.assignments
+    if isinstance(node, AssignmentNode) and isinstance(node.value, BlockNode):
+        return node.value.assignments
+    return None
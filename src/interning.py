@@ -0,0 +1,146 @@
+"""
+Общие строки и блоки для множества конфигураций, которые держатся в
+памяти одновременно (реестр сервисов): ключи и короткие строковые
+значения интернируются, одинаковые вычисленные блоки хранятся один раз.
+"""
+import sys
+from typing import Any, Dict, Iterable, Tuple
+
+# Строковые значения длиннее этого не интернируются: длинный текст редко
+# повторяется, а проверка стоит хеширования всей строки
+MAX_INTERNED_LENGTH = 64
+
+
+class FrozenDict(dict):
+    """
+    Блок конфигурации только для чтения. Подкласс dict, поэтому эмиттеры,
+    json и снимки принимают его как обычный словарь; изменяющие методы
+    вызывают TypeError, так как один объект может входить во многие
+    конфигурации.
+    """
+    __slots__ = ()
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Блок конфигурации общий и не изменяется")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __hash__(self):
+        return hash(tuple(self.items()))
+
+    def __reduce__(self):
+        # Стандартный протокол для подклассов dict заполняет объект через
+        # __setitem__
+        return FrozenDict, (dict(self),)
+
+    def __repr__(self):
+        return f"FrozenDict({dict.__repr__(self)})"
+
+
+class Interner:
+    """
+    Таблица общих блоков. block() возвращает для словаря с уже общими
+    вложенными блоками единственный FrozenDict с тем же содержимым:
+    ключи и значения сравниваются вместе с типом (1, 1.0 и true - разные
+    значения, как и 0.0 и -0.0), порядок ключей учитывается, потому что
+    от него зависит вывод.
+
+    Один Interner передаётся в ConfigTransformer (или read_config) для всех
+    загружаемых конфигураций; таблица держит все встреченные блоки, пока
+    не вызван clear().
+    """
+
+    def __init__(self, max_length: int = MAX_INTERNED_LENGTH):
+        self.max_length = max_length
+        self._blocks: Dict[Tuple, FrozenDict] = {}
+        self.requests = 0
+
+    @property
+    def unique(self) -> int:
+        return len(self._blocks)
+
+    def block(self, items: Dict[str, Any]) -> FrozenDict:
+        """Общий неизменяемый блок с содержимым items."""
+        self.requests += 1
+        signature = []
+        values = []
+        max_length = self.max_length
+        for key, value in items.items():
+            cls = value.__class__
+            if cls is str:
+                if len(value) <= max_length:
+                    value = sys.intern(value)
+                identity = value
+            elif cls is FrozenDict:
+                # Вложенный блок уже общий: сравниваем по объекту. Он жив,
+                # пока в таблице лежит содержащий его блок
+                identity = id(value)
+            elif cls is float and not value:
+                identity = str(value)
+            else:
+                identity = value
+            signature += (sys.intern(key), cls, identity)
+            values.append(value)
+
+        signature = tuple(signature)
+        shared = self._blocks.get(signature)
+        if shared is None:
+            shared = FrozenDict(zip(signature[0::3], values))
+            self._blocks[signature] = shared
+        return shared
+
+    def root(self, config: Dict[str, Any]) -> Dict[str, Any]:
+        """Верхний уровень остаётся изменяемым dict: интернируются только строки."""
+        max_length = self.max_length
+        return {sys.intern(key): sys.intern(value)
+                if value.__class__ is str and len(value) <= max_length else value
+                for key, value in config.items()}
+
+    def freeze(self, config: Dict[str, Any]) -> Dict[str, Any]:
+        """Словарь, построенный без Interner (кэш, Translator): блоки снизу вверх."""
+        # (итератор элементов, собираемый словарь, ключ блока у родителя)
+        stack = [(iter(config.items()), {}, None)]
+        while True:
+            items, target, key = stack[-1]
+            item = next(items, None)
+            if item is None:
+                stack.pop()
+                if not stack:
+                    return self.root(target)
+                stack[-1][1][key] = self.block(target)
+                continue
+            child_key, value = item
+            # Место ключа занимается сразу, чтобы сохранить порядок
+            target[child_key] = value
+            if isinstance(value, dict):
+                stack.append((iter(value.items()), {}, child_key))
+
+    def report(self) -> str:
+        shared = self.requests - self.unique
+        return f"Блоков: {self.requests}, уникальных: {self.unique}, заменено общими: {shared}"
+
+    def clear(self):
+        """Забывает таблицу; уже выданные блоки остаются общими."""
+        self._blocks.clear()
+        self.requests = 0
+
+
+def deep_size(objects: Iterable[Any]) -> int:
+    """
+    Память под объекты и всё, что в них вложено (sys.getsizeof), с учётом
+    общих объектов один раз - сколько на самом деле занимают конфигурации.
+    """
+    seen = set()
+    total = 0
+    stack = list(objects)
+    while stack:
+        value = stack.pop()
+        if id(value) in seen:
+            continue
+        seen.add(id(value))
+        total += sys.getsizeof(value)
+        if isinstance(value, dict):
+            stack.extend(value.keys())
+            stack.extend(value.values())
+    return total
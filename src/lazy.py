@@ -0,0 +1,258 @@
+"""
+Ленивый доступ к конфигурации: по тексту строится дешёвый индекс
+"ключ верхнего уровня -> участок текста", а разбор и вычисление идут
+только для запрошенных ключей и того, от чего они зависят.
+"""
+import json
+import os
+import re
+import tempfile
+from bisect import bisect_left
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional
+from .lexer import TOKEN_PATTERN, Lexer, iter_statement_spans
+from .modules import resolve_includes
+from .parser import ASTNode, Parser
+from .transformer import evaluate_statement, free_names
+
+INDEX_SUFFIX = '.idx'
+INDEX_VERSION = 1
+_INDEX_FIELDS = ('names', 'starts', 'ends', 'lines', 'ordinals')
+
+# Остаток участка после значения: разделители и комментарии
+_TAIL = re.compile(r'(?:[\s;]|%[^\n]*)*')
+_VALUE_TOKENS = {'STRING', 'EXPRESSION', 'NUMBER', 'BOOLEAN'}
+
+
+class LazyConfig(Mapping):
+    """
+    Конфигурация, которая вычисляет ключ при первом обращении и запоминает
+    значение: config['server']['port'] или config.lookup('server.port').
+
+    Индекс - инструкции верхнего уровня по порядку: ключ, участок текста и
+    номер инструкции в участке. Почти всегда участок - одна инструкция, и
+    ключ виден по первым токенам; остальные участки (с include, без
+    разделителей) разбираются при построении индекса. Инструкция
+    вычисляется с теми определениями имён из её выражений, что стоят выше
+    неё в файле, - как при последовательном вычислении.
+    """
+
+    def __init__(self, source: Optional[str] = None, path: Optional[str] = None,
+                 index: Optional[Dict[str, list]] = None):
+        self.path = path
+        self._source = source
+        self._parsed: Dict[int, List[ASTNode]] = {}
+        self.persistable = True
+        if index is None:
+            index = self._build_index()
+        # Параллельные списки по инструкциям: ключ, участок, строка его
+        # начала и номер инструкции в участке
+        self.names = index['names']
+        self.starts = index['starts']
+        self.ends = index['ends']
+        self.lines = index['lines']
+        self.ordinals = index['ordinals']
+        self._by_key: Dict[str, List[int]] = {}
+        for position, key in enumerate(self.names):
+            self._by_key.setdefault(key, []).append(position)
+        self._values: Dict[int, Any] = {}
+        self.evaluated = 0
+
+    @classmethod
+    def open(cls, path, persist: bool = True) -> 'LazyConfig':
+        """
+        Открывает файл. С persist индекс берётся из файла рядом с исходником
+        (путь + INDEX_SUFFIX), если тот совпадает по размеру и mtime, иначе
+        строится и сохраняется; текст при этом читается только при первом
+        обращении к значению.
+        """
+        path = os.fspath(path)
+        stat = os.stat(path)
+        signature = {'version': INDEX_VERSION, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        if persist:
+            index = _load_index(path + INDEX_SUFFIX, signature)
+            if index is not None:
+                return cls(path=path, index=index)
+
+        config = cls(_read(path), path)
+        if persist and config.persistable:
+            _save_index(path + INDEX_SUFFIX, signature, config)
+        return config
+
+    @property
+    def source(self) -> str:
+        if self._source is None:
+            self._source = _read(self.path)
+        return self._source
+
+    # Mapping
+
+    def __getitem__(self, key: str) -> Any:
+        positions = self._by_key.get(key)
+        if not positions:
+            raise KeyError(key)
+        return self._value(positions[-1])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._by_key)
+
+    def __len__(self) -> int:
+        return len(self._by_key)
+
+    def __contains__(self, key) -> bool:
+        return key in self._by_key
+
+    def lookup(self, path: str) -> Any:
+        """Значение по пути через точку: config.lookup('server.ssl.enabled')."""
+        head, *parts = path.split('.')
+        value = self[head]
+        for part in parts:
+            if not isinstance(value, dict):
+                raise KeyError(path)
+            value = value[part]
+        return value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: self[key] for key in self}
+
+    # Индекс
+
+    def _build_index(self):
+        source = self.source
+        index = {field: [] for field in _INDEX_FIELDS}
+        line = 1
+        counted = 0
+        for start, end in iter_statement_spans(source):
+            line += source.count('\n', counted, start)
+            counted = start
+            key = _simple_key(source, start, end)
+            if key is not None:
+                entries = [(key, 0)]
+            else:
+                nodes = self._parse(start, end, line)
+                entries = [(node.key, ordinal) for ordinal, node in enumerate(nodes)]
+            for key, ordinal in entries:
+                index['names'].append(key)
+                index['starts'].append(start)
+                index['ends'].append(end)
+                index['lines'].append(line)
+                index['ordinals'].append(ordinal)
+        return index
+
+    def _parse(self, start: int, end: int, line: int) -> List[ASTNode]:
+        nodes = self._parsed.get(start)
+        if nodes is not None:
+            return nodes
+        source = self.source
+        column = start - source.rfind('\n', 0, start)
+        parser = Parser(Lexer(source[start:end], line=line, column=column).tokenize())
+        nodes = parser.parse()
+        if parser.includes:
+            # Ключи зависят от подключённых файлов - такой индекс не сохраняем
+            nodes = list(resolve_includes(nodes, self.path))
+            self.persistable = False
+        if len(nodes) > 1:
+            self._parsed[start] = nodes
+        return nodes
+
+    # Вычисление
+
+    def _definition_before(self, name: str, position: int) -> Optional[int]:
+        positions = self._by_key.get(name)
+        if not positions:
+            return None
+        index = bisect_left(positions, position)
+        return positions[index - 1] if index else None
+
+    def _value(self, position: int) -> Any:
+        """Значение инструкции; зависимости вычисляются раньше, без рекурсии."""
+        stack = [position]
+        while stack:
+            current = stack[-1]
+            if current in self._values:
+                stack.pop()
+                continue
+
+            node = self._parse(self.starts[current], self.ends[current],
+                               self.lines[current])[self.ordinals[current]]
+            dependencies = {}
+            pending = []
+            for name in free_names(node):
+                definition = self._definition_before(name, current)
+                if definition is None:
+                    continue
+                if definition in self._values:
+                    dependencies[name] = self._values[definition]
+                else:
+                    pending.append(definition)
+            if pending:
+                stack.extend(pending)
+                continue
+
+            self._values[current] = evaluate_statement(node, dependencies, dependencies)
+            self.evaluated += 1
+            stack.pop()
+        return self._values[position]
+
+
+def _simple_key(source: str, start: int, end: int) -> Optional[str]:
+    """
+    Ключ участка из одной инструкции `имя = значение;` или `имя = @{...};`
+    по первым токенам; None, если участок нужно разобрать целиком.
+    """
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(source, start, end):
+        kind = match.lastgroup
+        if kind is None or kind == 'NEWLINE' or kind == 'COMMENT':
+            continue
+        tokens.append(match)
+        if len(tokens) == 3:
+            break
+
+    kinds = [match.lastgroup for match in tokens]
+    if len(kinds) < 2 or kinds[0] != 'IDENTIFIER':
+        return None
+    key = tokens[0].group('IDENTIFIER')
+    # Блок закрывается ровно в конце участка
+    if kinds[1] == 'LBRACE' or kinds[1:] == ['EQUALS', 'LBRACE']:
+        return key
+    if (len(kinds) == 3 and kinds[1] == 'EQUALS' and kinds[2] in _VALUE_TOKENS
+            and _TAIL.fullmatch(source, tokens[2].end(), end)):
+        return key
+    return None
+
+
+def _read(path: str) -> str:
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def _load_index(index_path: str, signature: Dict[str, int]):
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get('signature') != signature:
+        return None
+    return {field: data[field] for field in _INDEX_FIELDS}
+
+
+def _save_index(index_path: str, signature: Dict[str, int], config: LazyConfig):
+    """Атомарно пишет индекс; каталог только для чтения - не ошибка."""
+    data = {field: getattr(config, field) for field in _INDEX_FIELDS}
+    data['signature'] = signature
+    try:
+        fd, tmp_name = tempfile.mkstemp(dir=os.path.dirname(index_path) or '.', prefix='.tmp-')
+    except OSError:
+        return
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_name, index_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
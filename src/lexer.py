@@ -1,170 +1,644 @@
 """
 Лексер для разбора конфигурационного языка на токены.
 """
-from typing import List, Tuple, Optional
+from typing import Iterator, List, TextIO, Tuple, Optional
+import mmap
 import re
+from array import array
+from sys import intern
+from .errors import LexerError
+
+# Ключевые слова, которые лексер выделяет среди идентификаторов
+KEYWORDS = {
+    'true': 'BOOLEAN',
+    'false': 'BOOLEAN',
+}
+
+# Компактные коды типов токенов для TokenStore
+TOKEN_TYPES = (
+    'IDENTIFIER', 'EQUALS', 'LBRACE', 'RBRACE', 'STRING', 'EXPRESSION',
+    'NUMBER', 'BOOLEAN', 'SEMICOLON', 'EOF',
+)
+TYPE_CODES = {name: code for code, name in enumerate(TOKEN_TYPES)}
+
+
+def _keyword_groups(word_char: str = r'\w') -> str:
+    """Альтернативы шаблона для ключевых слов, сгруппированные по типу токена."""
+    words_by_type = {}
+    for word, token_type in KEYWORDS.items():
+        words_by_type.setdefault(token_type, []).append(re.escape(word))
+    return ''.join(
+        f"  | (?P<{token_type}>(?:{'|'.join(words)})(?!{word_char}))\n"
+        for token_type, words in words_by_type.items()
+    )
+
+
+# Единый шаблон для однопроходного лексера: именованные альтернативы
+# перечислены в том же порядке, в котором их проверяет посимвольный разбор.
+# Пробелы и разделители ';' поглощаются префиксом каждого совпадения.
+TOKEN_PATTERN = re.compile(r'''
+    [ \t;]*
+    (?:
+    (?P<NEWLINE>\n)
+  | (?P<COMMENT>%[^\n]*)
+  | \[\[(?P<STRING>.*?)\]\]
+  | \$(?P<EXPRESSION>[^$]*)\$
+  | (?P<LBRACE>@\{)
+  | (?P<RBRACE>\};)
+  | (?P<EQUALS>=)
+  | (?P<NUMBER>\d[\d.]*)
+''' + _keyword_groups() + r'''
+  | (?P<IDENTIFIER>[^\W\d]\w*)
+  | (?P<UNTERMINATED>\[\[|\$)
+  | (?P<MISMATCH>.)
+    )?
+''', re.VERBOSE | re.DOTALL)
+
+# Тот же шаблон для байтов UTF-8. Байтовый \w знает только ASCII, поэтому
+# имя или число с не-ASCII байтами выделяется в WIDE и разбирается после
+# декодирования;
+# многобайтовые последовательности не содержат ASCII-байтов, так что
+# разделители [[, ]], $ и ; внутри них не находятся.
+BYTES_TOKEN_PATTERN = re.compile(rb'''
+    [ \t;]*
+    (?:
+    (?P<NEWLINE>\n)
+  | (?P<COMMENT>%[^\n]*)
+  | \[\[(?P<STRING>.*?)\]\]
+  | \$(?P<EXPRESSION>[^$]*)\$
+  | (?P<LBRACE>@\{)
+  | (?P<RBRACE>\};)
+  | (?P<EQUALS>=)
+  | (?P<NUMBER>\d[\d.]*+(?![\x80-\xff]))
+''' + _keyword_groups(r'[\w\x80-\xff]').encode() + rb'''
+  | (?P<IDENTIFIER>[A-Za-z_]\w*+(?![\x80-\xff]))
+  | (?P<WIDE>[\w\x80-\xff][\w\x80-\xff.]*+)
+  | (?P<UNTERMINATED>\[\[|\$)
+  | (?P<MISMATCH>.)
+    )?
+''', re.VERBOSE | re.DOTALL)
+
+IDENTIFIER_PATTERN = re.compile(r'[^\W\d]\w*')
+
+# Байты продолжения UTF-8 (10xxxxxx) не начинают новый символ
+_CONTINUATION_BYTES = bytes(range(0x80, 0xc0))
+_NON_ASCII = re.compile(rb'[\x80-\xff]')
+
+# Длина открывающего разделителя для токенов, значение которых его не включает
+_DELIMITER_WIDTH = {'STRING': 2, 'EXPRESSION': 1}
+
+
+# Шаблон быстрого поиска границ инструкций верхнего уровня: учитывает
+# строки, выражения и комментарии, внутри которых ';' и '@{' не считаются.
+BOUNDARY_PATTERN = re.compile(r'''
+    \[\[.*?\]\]
+  | \$[^$]*\$
+  | %[^\n]*
+  | (?P<OPEN>@\{)
+  | (?P<CLOSE>\};)
+  | (?P<END>;)
+  | (?P<UNTERMINATED>\[\[|\$)
+''', re.VERBOSE | re.DOTALL)
+
+
+def split_statements(source: str) -> List[Tuple[int, int]]:
+    """
+    Делит текст на участки, заканчивающиеся ';' или '};' на верхнем уровне
+    вложенности, не выполняя полного лексического разбора. Каждый участок
+    разбирается независимо и даёт ноль или больше инструкций; вместе
+    участки покрывают весь текст.
+    """
+    return list(iter_statement_spans(source))
+
+
+def iter_statement_spans(source: str, start: int = 0) -> Iterator[Tuple[int, int]]:
+    """Участки split_statements, начиная с границы участка start."""
+    depth = 0
+    for match in BOUNDARY_PATTERN.finditer(source, start):
+        kind = match.lastgroup
+        if kind is None:
+            continue
+        if kind == 'UNTERMINATED':
+            # Ошибку сообщит лексер при разборе последнего участка
+            break
+        if kind == 'OPEN':
+            depth += 1
+            continue
+        if kind == 'CLOSE':
+            depth = max(depth - 1, 0)
+        if depth == 0:
+            yield start, match.end()
+            start = match.end()
+
+    if start < len(source):
+        yield start, len(source)
+
 
 class Token:
+    __slots__ = ('type', 'value', 'line', 'column')
+
     def __init__(self, type: str, value: str, line: int, column: int):
         self.type = type
         self.value = value
         self.line = line
         self.column = column
-    
+
     def __repr__(self):
         return f"Token({self.type}, {repr(self.value)}, line={self.line})"
 
+
+class TokenView:
+    """Токен, хранящийся в TokenStore: поля читаются из колонок по запросу."""
+    __slots__ = ('store', 'index')
+
+    def __init__(self, store: 'TokenStore', index: int):
+        self.store = store
+        self.index = index
+
+    @property
+    def type(self) -> str:
+        return TOKEN_TYPES[self.store.types[self.index]]
+
+    @property
+    def value(self) -> str:
+        return self.store.value(self.index)
+
+    @property
+    def line(self) -> int:
+        return self.store.lines[self.index]
+
+    @property
+    def column(self) -> int:
+        return self.store.columns[self.index]
+
+    def __repr__(self):
+        return f"Token({self.type}, {repr(self.value)}, line={self.line})"
+
+
+class TokenStore:
+    """
+    Компактное хранилище токенов: тип - однобайтовый код, границы значения
+    и позиция - в колонках array. Значение вырезается из исходного текста
+    только при обращении, поэтому на токен приходится около 25 байт.
+    """
+    __slots__ = ('source', 'types', 'starts', 'ends', 'lines', 'columns')
+
+    def __init__(self, source):
+        self.source = source
+        self.types = array('B')
+        self.starts = array('q')
+        self.ends = array('q')
+        self.lines = array('I')
+        self.columns = array('I')
+
+    def append(self, token_type: str, start: int, end: int, line: int, column: int):
+        self.types.append(TYPE_CODES[token_type])
+        self.starts.append(start)
+        self.ends.append(end)
+        self.lines.append(line)
+        self.columns.append(column)
+
+    def value(self, index: int) -> str:
+        return self.source[self.starts[index]:self.ends[index]]
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def __getitem__(self, index: int) -> TokenView:
+        if index < 0:
+            index += len(self.types)
+        if not 0 <= index < len(self.types):
+            raise IndexError('индекс токена вне диапазона')
+        return TokenView(self, index)
+
+    def __iter__(self) -> Iterator[TokenView]:
+        for index in range(len(self.types)):
+            yield TokenView(self, index)
+
+
+class ByteTokenStore(TokenStore):
+    """
+    TokenStore над байтами UTF-8 (bytes или mmap): границы значений - в
+    байтах, значение декодируется только при обращении к нему. Переводы
+    строк в значениях приводятся к \n, как при чтении в текстовом режиме.
+    """
+    __slots__ = ()
+
+    def value(self, index: int) -> str:
+        text = self.source[self.starts[index]:self.ends[index]].decode('utf-8')
+        if '\r' in text:
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        return text
+
+
+def _char_count(data: bytes) -> int:
+    """Число символов в байтах UTF-8: байты продолжения не считаются."""
+    if data.isascii():
+        return len(data)
+    return len(data.translate(None, _CONTINUATION_BYTES))
+
+
+def scan_bytes_spans(buffer, line: int = 1) -> Iterator[Tuple[str, int, int, int, int]]:
+    """
+    Разбирает байты UTF-8 (bytes или mmap) по BYTES_TOKEN_PATTERN и выдаёт
+    то же, что RegexScanner.scan_spans: границы значений - в байтах, позиция
+    в строке - в символах. Декодируются только не-ASCII имена.
+    """
+    line_start = 0
+    # Ближайший не-ASCII байт: до него позиция в строке равна числу байтов
+    wide = -1
+    # Последняя посчитанная точка строки с многобайтовым текстом: (байт,
+    # символ), чтобы длинная строка не пересчитывалась с начала
+    mark_byte = mark_char = 0
+
+    def column(position: int) -> int:
+        nonlocal wide, mark_byte, mark_char
+        if wide < line_start:
+            found = _NON_ASCII.search(buffer, line_start)
+            wide = found.start() if found else len(buffer)
+        if position <= wide:
+            return position - line_start + 1
+        if mark_byte < line_start or mark_byte > position:
+            mark_byte, mark_char = line_start, 0
+        mark_char += _char_count(buffer[mark_byte:position])
+        mark_byte = position
+        return mark_char + 1
+
+    for match in BYTES_TOKEN_PATTERN.finditer(buffer):
+        kind = match.lastgroup
+
+        if kind == 'NEWLINE':
+            line += 1
+            line_start = match.end()
+            continue
+        if kind is None or kind == 'COMMENT' or kind == 'MISMATCH':
+            continue
+
+        value_start, value_end = match.span(kind)
+        start = value_start - _DELIMITER_WIDTH.get(kind, 0)
+        if kind == 'UNTERMINATED':
+            what = 'Незакрытая строка' if buffer[start:start + 1] == b'[' else 'Незакрытое выражение'
+            raise LexerError(what, line, column(start))
+
+        if kind == 'WIDE':
+            yield from _split_wide(buffer[value_start:value_end].decode('utf-8'),
+                                   value_start, line, column(start))
+            continue
+
+        if wide >= start:
+            yield kind, value_start, value_end, line, start - line_start + 1
+        else:
+            yield kind, value_start, value_end, line, column(start)
+
+        # Строки и выражения могут занимать несколько строк
+        if kind == 'STRING' or kind == 'EXPRESSION':
+            last_newline = buffer.rfind(b'\n', value_start, value_end)
+            if last_newline >= 0:
+                line += buffer[value_start:value_end].count(b'\n')
+                line_start = last_newline + 1
+
+
+def _split_wide(text: str, offset: int, line: int, column: int) -> Iterator[Tuple[str, int, int, int, int]]:
+    """
+    Имя или число с не-ASCII символами. Если оно не подходит под правило имени
+    текстового лексера (например, содержит «—»), разбирает его текстовым
+    шаблоном, чтобы результат совпадал с режимом 'regex'.
+    """
+    if IDENTIFIER_PATTERN.fullmatch(text):
+        yield 'IDENTIFIER', offset, offset + len(text.encode('utf-8')), line, column
+        return
+    for match in TOKEN_PATTERN.finditer(text):
+        kind = match.lastgroup
+        if kind is None or kind == 'MISMATCH':
+            continue
+        start, end = match.span(kind)
+        byte_start = offset + len(text[:start].encode('utf-8'))
+        yield kind, byte_start, byte_start + len(text[start:end].encode('utf-8')), line, column + start
+
+
+class MappedSource:
+    """
+    Файл конфигурации, отображённый в память. Лексер работает прямо с
+    байтами: текст целиком не декодируется и не копируется, а значения
+    токенов декодируются при обращении. Токены ссылаются на отображение,
+    поэтому закрывать его можно только после разбора.
+    """
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            try:
+                self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Пустой файл нельзя отобразить
+                self.buffer = b''
+
+    def tokenize(self) -> ByteTokenStore:
+        store = ByteTokenStore(self.buffer)
+        append = store.append
+        for kind, start, end, line, column in scan_bytes_spans(self.buffer):
+            append(kind, start, end, line, column)
+        return store
+
+    def close(self):
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class RegexScanner:
+    """
+    Однопроходный разбор по TOKEN_PATTERN с сохранением состояния между
+    вызовами scan(): текст может поступать частями.
+    """
+    def __init__(self, line: int = 1, line_start: int = 0):
+        self.line = line
+        self.line_start = line_start  # абсолютное смещение начала строки
+        self.stop = 0                 # позиция в буфере, где разбор остановился
+
+    def scan(self, buffer: str, pos: int = 0, base: int = 0, final: bool = True) -> Iterator[Token]:
+        """Выдаёт токены buffer начиная с pos (см. scan_spans)."""
+        for kind, start, end, line, column in self.scan_spans(buffer, pos, base, final):
+            value = buffer[start:end]
+            if kind == 'IDENTIFIER':
+                # Имена повторяются во всех конфигурациях: одна строка на имя
+                value = intern(value)
+            yield Token(kind, value, line, column)
+
+    def scan_spans(self, buffer: str, pos: int = 0, base: int = 0,
+                   final: bool = True) -> Iterator[Tuple[str, int, int, int, int]]:
+        """
+        Выдаёт (тип, начало значения, конец значения, строка, позиция) для
+        токенов buffer начиная с pos; base - абсолютное смещение buffer[0].
+        Если final ложно, совпадение, упирающееся в конец буфера, может быть
+        неполным: разбор останавливается перед ним (позиция в self.stop).
+        """
+        line = self.line
+        line_start = self.line_start - base
+        end = len(buffer)
+        self.stop = end
+
+        for match in TOKEN_PATTERN.finditer(buffer, pos):
+            kind = match.lastgroup
+
+            if not final and (match.end() == end or kind == 'UNTERMINATED'):
+                self.stop = match.start()
+                break
+
+            if kind == 'NEWLINE':
+                line += 1
+                line_start = match.end()
+                continue
+            if kind is None or kind == 'COMMENT' or kind == 'MISMATCH':
+                continue
+
+            value_start, value_end = match.span(kind)
+            start = value_start - _DELIMITER_WIDTH.get(kind, 0)
+            if kind == 'UNTERMINATED':
+                what = 'Незакрытая строка' if buffer[start] == '[' else 'Незакрытое выражение'
+                raise LexerError(what, line, start - line_start + 1)
+
+            yield kind, value_start, value_end, line, start - line_start + 1
+
+            # Строки и выражения могут занимать несколько строк
+            if kind == 'STRING' or kind == 'EXPRESSION':
+                last_newline = buffer.rfind('\n', value_start, value_end)
+                if last_newline >= 0:
+                    line += buffer.count('\n', value_start, value_end)
+                    line_start = last_newline + 1
+
+        self.line = line
+        self.line_start = line_start + base
+
+
+def tokenize_stream(stream: TextIO, chunk_size: int = 1 << 16) -> Iterator[Token]:
+    """
+    Потоковый режим: читает текст из stream частями и выдаёт токены по мере
+    разбора. Незавершённый на границе части токен ([[...]], $...$, имя,
+    число) переносится в следующую часть, так что в памяти держится только
+    текущий фрагмент.
+    """
+    scanner = RegexScanner()
+    buffer = ''
+    base = 0
+    read_size = chunk_size
+
+    while True:
+        chunk = stream.read(read_size)
+        final = not chunk
+        buffer += chunk
+        yield from scanner.scan(buffer, 0, base, final)
+        if final:
+            return
+
+        stop = scanner.stop
+        # Длинный токен не поместился в буфер - читаем больше, чтобы
+        # не пересканировать его начало на каждой части
+        read_size = chunk_size if stop else max(chunk_size, len(buffer))
+        base += stop
+        buffer = buffer[stop:]
+
+
 class Lexer:
-    def __init__(self, source: str):
+    """
+    Лексер поддерживает два режима:
+    'regex' - однопроходный разбор по единому скомпилированному шаблону;
+    'scan' - исходный посимвольный разбор (эталон для сравнения).
+    """
+    MODES = ('regex', 'scan')
+
+    def __init__(self, source: str, mode: str = 'regex', line: int = 1, column: int = 1):
+        if mode not in self.MODES:
+            raise ValueError(f"Неизвестный режим лексера: {mode}")
         self.source = source
+        self.mode = mode
         self.position = 0
-        self.line = 1
-        self.column = 1
+        # Позиция начала текста: фрагмент файла можно разбирать отдельно
+        self.line = line
+        self.column = column
         self.tokens = []
-    
+
     def tokenize(self) -> List[Token]:
+        if self.mode == 'regex':
+            return self.tokenize_regex()
+        return self.tokenize_scan()
+
+    def tokenize_regex(self) -> List[Token]:
+        """Разбирает исходный текст за один проход по TOKEN_PATTERN."""
+        scanner = RegexScanner(self.line, self.position - self.column + 1)
+        self.tokens.extend(scanner.scan(self.source, self.position))
+        self.position = len(self.source)
+        self.line = scanner.line
+        self.column = self.position - scanner.line_start + 1
+        return self.tokens
+
+    def tokenize_compact(self) -> TokenStore:
+        """Разбирает исходный текст в компактное хранилище TokenStore."""
+        store = TokenStore(self.source)
+        scanner = RegexScanner(self.line, self.position - self.column + 1)
+        append = store.append
+        for kind, start, end, line, column in scanner.scan_spans(self.source, self.position):
+            append(kind, start, end, line, column)
+        return store
+
+    def tokenize_scan(self) -> List[Token]:
+        """Посимвольный разбор исходного текста."""
         while self.position < len(self.source):
             char = self.source[self.position]
-            
+
             # Пропускаем пробелы
             if char in ' \t':
                 self.advance()
                 continue
-            
+
             # Пропускаем комментарии
             if char == '%':
                 self.skip_comment()
                 continue
-            
+
             # Новая строка
             if char == '\n':
-                self.line += 1
-                self.column = 1
-                self.advance()
+                self.newline()
                 continue
-            
+
             # Строки [[...]]
-            if self.match('[['):
+            if self.source.startswith('[[', self.position):
                 self.read_string()
                 continue
-            
+
             # Выражения $...$
             if char == '$':
                 self.read_expression()
                 continue
-            
+
             # Блоки @{
-            if self.match('@{'):
+            if self.source.startswith('@{', self.position):
                 self.add_token('LBRACE', '@{')
+                self.advance(2)
                 continue
-            
+
             # Конец блока };
-            if self.match('};'):
+            if self.source.startswith('};', self.position):
                 self.add_token('RBRACE', '};')
+                self.advance(2)
                 continue
-            
+
             # Присваивание =
             if char == '=':
                 self.add_token('EQUALS', '=')
+                self.advance()
                 continue
-            
-            # Конец инструкции ;
+
+            # Конец инструкции ; - только разделитель, токен не создаётся
             if char == ';':
-                self.add_token('SEMICOLON', ';')
+                self.advance()
                 continue
-            
+
             # Числа
             if char.isdigit():
                 self.read_number()
                 continue
-            
-            # Идентификаторы (ключи)
+
+            # Идентификаторы (ключи) и булевы значения
             if char.isalpha() or char == '_':
                 self.read_identifier()
                 continue
-            
-            # Булевы значения
-            if self.match('true') or self.match('false'):
-                value = 'true' if self.source.startswith('true', self.position - 4) else 'false'
-                self.add_token('BOOLEAN', value)
-                continue
-            
+
             self.advance()
-        
+
         return self.tokens
-    
+
     def advance(self, n=1):
         self.position += n
         self.column += n
-    
+
+    def newline(self):
+        self.position += 1
+        self.line += 1
+        self.column = 1
+
     def match(self, pattern: str) -> bool:
         if self.source.startswith(pattern, self.position):
             self.advance(len(pattern))
             return True
         return False
-    
+
     def skip_comment(self):
         while self.position < len(self.source) and self.source[self.position] != '\n':
             self.advance()
-    
+
     def read_string(self):
-        start = self.position
         start_line = self.line
         start_col = self.column
-        
+
         # Пропускаем [[
         self.advance(2)
-        
+        start = self.position
+
         # Читаем до ]]
-        while self.position < len(self.source) - 1:
-            if self.source[self.position:self.position+2] == ']]':
-                value = self.source[start+2:self.position]
+        while self.position < len(self.source):
+            if self.source.startswith(']]', self.position):
+                value = self.source[start:self.position]
                 self.advance(2)  # Пропускаем ]]
                 self.add_token('STRING', value, start_line, start_col)
                 return
-            self.advance()
-    
+            if self.source[self.position] == '\n':
+                self.newline()
+            else:
+                self.advance()
+
+        raise LexerError("Незакрытая строка", start_line, start_col)
+
     def read_expression(self):
-        start = self.position
         start_line = self.line
         start_col = self.column
-        
+
         self.advance()  # Пропускаем $
-        
+        start = self.position
+
         # Читаем до $
         while self.position < len(self.source):
             if self.source[self.position] == '$':
-                value = self.source[start+1:self.position]
+                value = self.source[start:self.position]
                 self.advance()  # Пропускаем $
                 self.add_token('EXPRESSION', value, start_line, start_col)
                 return
-            self.advance()
-    
+            if self.source[self.position] == '\n':
+                self.newline()
+            else:
+                self.advance()
+
+        raise LexerError("Незакрытое выражение", start_line, start_col)
+
     def read_number(self):
         start = self.position
         start_line = self.line
         start_col = self.column
-        
+
         while self.position < len(self.source) and (self.source[self.position].isdigit() or self.source[self.position] == '.'):
             self.advance()
-        
+
         value = self.source[start:self.position]
         self.add_token('NUMBER', value, start_line, start_col)
-    
+
     def read_identifier(self):
         start = self.position
         start_line = self.line
         start_col = self.column
-        
+
         while self.position < len(self.source) and (self.source[self.position].isalnum() or self.source[self.position] == '_'):
             self.advance()
-        
-        value = self.source[start:self.position]
-        self.add_token('IDENTIFIER', value, start_line, start_col)
-    
+
+        value = intern(self.source[start:self.position])
+        self.add_token(KEYWORDS.get(value, 'IDENTIFIER'), value, start_line, start_col)
+
     def add_token(self, token_type: str, value: str, line=None, column=None):
         if line is None:
             line = self.line
         if column is None:
             column = self.column
-        self.tokens.append(Token(token_type, value, line, column))
\ No newline at end of file
+        self.tokens.append(Token(token_type, value, line, column))
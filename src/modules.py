@@ -0,0 +1,126 @@
+"""
+Подключаемые файлы (`include [[путь]];`): кэш их разобранных AST и
+подстановка подключённых инструкций на место директивы.
+"""
+import hashlib
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from .errors import IncludeError
+from .lexer import Lexer
+from .parser import ASTNode, BlockNode, IncludeNode, Parser
+
+# Файл, изменённый позже этого срока назад, сверяется по содержимому:
+# в пределах точности mtime запись того же размера не видна по stat
+_RACY_NS = 2 * 10 ** 9
+
+
+class ModuleCache:
+    """
+    Разобранные подключаемые файлы в памяти процесса: в пакете или в
+    сервере каждый общий фрагмент разбирается один раз. Кэшируется AST, а не
+    словарь: выражения фрагмента могут ссылаться на константы подключающего
+    файла. Запись проверяется по mtime и размеру, а если они изменились или
+    файл изменён только что - по SHA-256 содержимого.
+    """
+
+    def __init__(self):
+        self.entries: Dict[str, Tuple[int, int, bytes, List[ASTNode]]] = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, path: str) -> List[ASTNode]:
+        stat = os.stat(path)
+        with self.lock:
+            entry = self.entries.get(path)
+        if (entry is not None and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size
+                and time.time_ns() - stat.st_mtime_ns > _RACY_NS):
+            with self.lock:
+                self.hits += 1
+            return entry[3]
+
+        with open(path, 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha256(data).digest()
+        fresh = entry is None or entry[2] != digest
+        ast = Parser(Lexer(data.decode('utf-8')).tokenize()).parse() if fresh else entry[3]
+
+        with self.lock:
+            self.entries[path] = (stat.st_mtime_ns, stat.st_size, digest, ast)
+            if fresh:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return ast
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self.entries)}
+
+
+# Общий кэш процесса
+MODULES = ModuleCache()
+
+
+def resolve_includes(nodes: Iterable[ASTNode], path: Optional[str] = None,
+                     modules: Optional[ModuleCache] = None,
+                     included: Optional[List[str]] = None) -> Iterator[ASTNode]:
+    """
+    Выдаёт инструкции верхнего уровня, подставляя вместо каждой директивы
+    include инструкции подключённого файла (и так далее вглубь). Пути
+    берутся от каталога файла с директивой; для path=None - от текущего
+    каталога. Блоки с подключениями внутри пересобираются, исходный AST
+    и AST из кэша не меняются. В included дописываются пути подключённых
+    файлов. Работает лениво, поэтому подходит и для потокового разбора.
+    """
+    modules = modules or MODULES
+    chain = [os.path.realpath(path)] if path is not None else []
+    base = os.path.dirname(chain[0]) if chain else os.getcwd()
+
+    # (итератор узлов, список собираемого блока или None для верхнего
+    # уровня, каталог для путей, что сделать по окончании: выдать готовый
+    # блок верхнего уровня или снять файл с цепочки подключений)
+    stack = [(iter(nodes), None, base, None)]
+    while stack:
+        pending, target, base, finish = stack[-1]
+        node = next(pending, None)
+
+        if node is None:
+            stack.pop()
+            if isinstance(finish, BlockNode):
+                yield finish
+            elif finish is not None:
+                chain.pop()
+            continue
+
+        if isinstance(node, IncludeNode):
+            file = os.path.realpath(os.path.join(base, node.path))
+            if file in chain:
+                cycle = chain[chain.index(file):] + [file]
+                raise IncludeError("Циклическое подключение: " +
+                                   " -> ".join(os.path.basename(item) for item in cycle))
+            try:
+                ast = modules.load(file)
+            except OSError as e:
+                raise IncludeError(f"Не удалось подключить {node.path} (строка {node.line}): "
+                                   f"{e.strerror or e}") from e
+            if included is not None:
+                included.append(file)
+            chain.append(file)
+            stack.append((iter(ast), target, os.path.dirname(file), file))
+        elif isinstance(node, BlockNode):
+            block = BlockNode(node.key, [])
+            if target is not None:
+                target.append(block)
+            stack.append((iter(node.assignments), block.assignments, base,
+                          block if target is None else None))
+        elif target is None:
+            yield node
+        else:
+            target.append(node)
@@ -0,0 +1,237 @@
+"""
+Оптимизация AST перед вычислением: свёртка констант, подстановка значений
+известных имён в выражения и статическая проверка постфиксных программ.
+"""
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from .evaluator import (OP_BINARY, OP_CONST, OP_LOAD, CompiledExpression,
+                        compile_expression, find_stack_error)
+from .parser import ASTNode, AssignmentNode, BlockNode, ExpressionNode, ValueNode
+from .symbols import SymbolTable
+
+# Значение имени известно только при вычислении
+_DYNAMIC = object()
+
+
+class Optimizer:
+    """
+    Проходит инструкции в порядке вычисления с теми же областями видимости
+    (SymbolTable), что и Evaluator, и знает, какие имена к каждому
+    выражению уже связаны с постоянными значениями. Выражение из одних
+    констант становится ValueNode; в остальных ссылки на константы и
+    постоянные подвыражения заменяются значениями, так что при вычислении
+    остаётся только то, что зависит от неизвестных заранее имён.
+
+    Результат совпадает с вычислением исходного AST: в том числе выражение,
+    которое при вычислении упало бы, сворачивается в строку "${...}".
+    Исходные узлы не меняются (AST подключённых файлов общий).
+
+    Свёртка стоит столько же, сколько само вычисление, поэтому окупается,
+    когда один AST вычисляется многократно, а при разовой трансляции
+    конвейер её не запускает. Некорректные программы отклоняет уже Parser.
+    """
+
+    def __init__(self):
+        self.folded = 0
+        self.inlined = 0
+        self.dynamic = 0
+        # Константы верхнего уровня в порядке определения и отметки о
+        # ссылках на них; переопределённое имя - новая константа
+        self.constants: List[str] = []
+        self.used: List[bool] = []
+        self._current: Dict[str, int] = {}
+
+    def optimize(self, nodes: Iterable[ASTNode]) -> List[ASTNode]:
+        return list(self.iter_optimize(nodes))
+
+    def iter_optimize(self, nodes: Iterable[ASTNode]) -> Iterator[ASTNode]:
+        """Выдаёт инструкции верхнего уровня по одной, подходит для потока."""
+        # Значение имени, _DYNAMIC или словарь определений блока
+        symbols = SymbolTable()
+        # (итератор содержимого, собираемый список, исходный узел блока)
+        stack = [(iter(nodes), None, None)]
+        while stack:
+            pending, target, block = stack[-1]
+            node = next(pending, None)
+
+            if node is None:
+                stack.pop()
+                if not stack:
+                    break
+                members = {name: symbols.bindings[name][-1] for name in symbols.frames[-1]}
+                symbols.pop_scope()
+                self._define(symbols, block.key, members)
+                rebuilt = _rebuild_block(block, target)
+                if stack[-1][1] is None:
+                    yield rebuilt
+                else:
+                    stack[-1][1].append(rebuilt)
+                continue
+
+            inner = _block_of(node)
+            if inner is not None:
+                symbols.push_scope()
+                stack.append((iter(inner.assignments), [], node))
+                continue
+
+            if isinstance(node, AssignmentNode):
+                value = node.value
+                if isinstance(value, ExpressionNode):
+                    value = self._expression(value, symbols)
+                    if value is not node.value:
+                        node = AssignmentNode(node.key, value)
+                self._define(symbols, node.key,
+                             value.value if isinstance(value, ValueNode) else _DYNAMIC)
+            if target is None:
+                yield node
+            else:
+                target.append(node)
+
+    @property
+    def unused(self) -> List[str]:
+        """Константы верхнего уровня, на которые не ссылается ни одно выражение."""
+        return [name for name, used in zip(self.constants, self.used) if not used]
+
+    def report(self) -> str:
+        lines = [f"Свёрнуто выражений: {self.folded}, подставлено ссылок: {self.inlined}, "
+                 f"вычисляются при трансляции: {self.dynamic}"]
+        unused = self.unused
+        if unused:
+            lines.append("Не используются в выражениях: " + ", ".join(unused))
+        return '\n'.join(lines)
+
+    def _define(self, symbols: SymbolTable, name: str, value: Any):
+        symbols.define(name, value)
+        if symbols.depth:
+            return
+        if isinstance(value, dict):
+            self._current.pop(name, None)
+        else:
+            self._current[name] = len(self.constants)
+            self.constants.append(name)
+            self.used.append(False)
+
+    def _resolve(self, name: str, symbols: SymbolTable) -> Any:
+        """Значение имени, как его найдёт Evaluator, или _DYNAMIC."""
+        head = name.partition('.')[0]
+        index = self._current.get(head)
+        if index is not None and len(symbols.bindings[head]) == 1:
+            self.used[index] = True
+        value = symbols.get(name, _DYNAMIC)
+        # Блок целиком как операнд - не константа
+        return _DYNAMIC if isinstance(value, dict) else value
+
+    def _expression(self, node: ExpressionNode, symbols: SymbolTable) -> ASTNode:
+        program = node.compiled or compile_expression(node.expression)
+
+        # Обычный случай - все имена известны: программа просто выполняется
+        bindings = symbols.bindings
+        stack = []
+        push = stack.append
+        loads = 0
+        for op, arg in program.code:
+            if op == OP_CONST:
+                push(arg)
+            elif op == OP_LOAD:
+                values = bindings.get(arg)
+                if values is None or len(values) == 1:
+                    value = self._resolve(arg, symbols)
+                else:
+                    value = values[-1]
+                if value is _DYNAMIC or isinstance(value, dict):
+                    break
+                push(value)
+                loads += 1
+            else:
+                if len(stack) < 2:
+                    break
+                b = stack.pop()
+                try:
+                    stack[-1] = arg(stack[-1], b)
+                except Exception:
+                    break
+        else:
+            if len(stack) <= 1:
+                self.folded += 1
+                self.inlined += loads
+                return ValueNode(stack[0] if stack else 0)
+
+        return self._partial(node, program, symbols)
+
+    def _partial(self, node: ExpressionNode, program: CompiledExpression,
+                 symbols: SymbolTable) -> ASTNode:
+        """Подстановка известных значений в программу с неизвестными именами."""
+        problem = find_stack_error(node.expression)
+        if problem is not None:
+            raise node.error(*problem)
+
+        code = []
+        # Для каждого операнда на стеке: известно ли его значение (тогда
+        # это последняя OP_CONST в code)
+        known: List[bool] = []
+        loads = 0
+        inlined = 0
+        for op, arg in program.code:
+            if op == OP_BINARY:
+                if known[-1] and known[-2]:
+                    try:
+                        value = arg(code[-2][1], code[-1][1])
+                    except Exception:
+                        # Упадёт и при вычислении - оставляем операцию
+                        pass
+                    else:
+                        code[-2:] = [(OP_CONST, value)]
+                        known.pop()
+                        continue
+                code.append((op, arg))
+                known.pop()
+                known[-1] = False
+            elif op == OP_LOAD:
+                value = self._resolve(arg, symbols)
+                if value is _DYNAMIC:
+                    code.append((op, arg))
+                    known.append(False)
+                    loads += 1
+                else:
+                    code.append((OP_CONST, value))
+                    known.append(True)
+                    inlined += 1
+            else:
+                code.append((op, arg))
+                known.append(True)
+
+        self.inlined += inlined
+        if not loads:
+            self.folded += 1
+            if not known:
+                return ValueNode(0)
+            if known[0]:
+                return ValueNode(code[0][1])
+            # Осталась операция над константами, которая не выполняется
+            return ValueNode(f"${{{node.expression}}}")
+
+        self.dynamic += 1
+        if not inlined and len(code) == len(program.code):
+            return node
+        optimized = ExpressionNode(node.expression, node.line, node.column)
+        optimized.compiled = CompiledExpression(node.expression, code)
+        return optimized
+
+
+def optimize(nodes: Iterable[ASTNode]) -> List[ASTNode]:
+    """AST после Optimizer, без отчёта."""
+    return Optimizer().optimize(nodes)
+
+
+def _block_of(node: ASTNode) -> Optional[BlockNode]:
+    if isinstance(node, BlockNode):
+        return node
+    if isinstance(node, AssignmentNode) and isinstance(node.value, BlockNode):
+        return node.value
+    return None
+
+
+def _rebuild_block(node: ASTNode, assignments: List[ASTNode]) -> ASTNode:
+    block = BlockNode(_block_of(node).key, assignments)
+    if isinstance(node, AssignmentNode):
+        return AssignmentNode(node.key, block)
+    return block
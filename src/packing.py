@@ -0,0 +1,230 @@
+"""
+Компактный двоичный вывод в формате MessagePack (https://msgpack.org):
+таблица - map, ключ и строка - str, числа - самым коротким подходящим
+int или float 64. Файл читается любой библиотекой MessagePack; здесь же
+есть load_msgpack для тех, кто её не подключает.
+"""
+import io
+import struct
+from typing import Any, BinaryIO, Dict, Tuple
+
+_UINT8 = struct.Struct('>B')
+_UINT16 = struct.Struct('>H')
+_UINT32 = struct.Struct('>I')
+_UINT64 = struct.Struct('>Q')
+_INT8 = struct.Struct('>b')
+_INT16 = struct.Struct('>h')
+_INT32 = struct.Struct('>i')
+_INT64 = struct.Struct('>q')
+_FLOAT32 = struct.Struct('>f')
+_FLOAT64 = struct.Struct('>d')
+
+_NIL = 0xc0
+_FALSE = 0xc2
+_TRUE = 0xc3
+
+
+def _map_header(size: int) -> bytes:
+    if size < 16:
+        return bytes((0x80 | size,))
+    if size < 0x10000:
+        return b'\xde' + _UINT16.pack(size)
+    return b'\xdf' + _UINT32.pack(size)
+
+
+def pack_string(value: str) -> bytes:
+    data = value.encode('utf-8')
+    size = len(data)
+    if size < 32:
+        return bytes((0xa0 | size,)) + data
+    if size < 0x100:
+        return b'\xd9' + _UINT8.pack(size) + data
+    if size < 0x10000:
+        return b'\xda' + _UINT16.pack(size) + data
+    return b'\xdb' + _UINT32.pack(size) + data
+
+
+def pack_int(value: int) -> bytes:
+    if 0 <= value < 0x80:
+        return bytes((value,))
+    if -32 <= value < 0:
+        return bytes((value & 0xff,))
+    if value > 0:
+        if value < 0x100:
+            return b'\xcc' + _UINT8.pack(value)
+        if value < 0x10000:
+            return b'\xcd' + _UINT16.pack(value)
+        if value < 0x100000000:
+            return b'\xce' + _UINT32.pack(value)
+        if value < 0x10000000000000000:
+            return b'\xcf' + _UINT64.pack(value)
+    else:
+        if value >= -0x80:
+            return b'\xd0' + _INT8.pack(value)
+        if value >= -0x8000:
+            return b'\xd1' + _INT16.pack(value)
+        if value >= -0x80000000:
+            return b'\xd2' + _INT32.pack(value)
+        if value >= -0x8000000000000000:
+            return b'\xd3' + _INT64.pack(value)
+    raise ValueError(f"Целое {value} не помещается в 64 бита MessagePack")
+
+
+def pack_value(value: Any) -> bytes:
+    """Простое значение конфигурации (не таблица)."""
+    if isinstance(value, bool):
+        return b'\xc3' if value else b'\xc2'
+    if isinstance(value, int):
+        return pack_int(value)
+    if isinstance(value, float):
+        return b'\xcb' + _FLOAT64.pack(value)
+    if isinstance(value, str):
+        return pack_string(value)
+    raise TypeError(f"Значение типа {type(value).__name__} нельзя записать в MessagePack")
+
+
+class MsgpackEmitter:
+    """
+    Пишет словарь конфигурации в двоичный поток по мере обхода (явный
+    стек): число записей map известно из словаря, поэтому документ целиком
+    не собирается. Закодированные ключи запоминаются - они повторяются.
+    """
+    # Сколько байт копить перед записью в поток
+    CHUNK = 1 << 16
+
+    def __init__(self, stream: BinaryIO):
+        self.stream = stream
+
+    def write(self, config: Dict[str, Any]):
+        write = self.stream.write
+        keys: Dict[str, bytes] = {}
+        buffer = bytearray(_map_header(len(config)))
+        stack = [iter(config.items())]
+        while stack:
+            item = next(stack[-1], None)
+            if item is None:
+                stack.pop()
+                continue
+
+            key, value = item
+            encoded = keys.get(key)
+            if encoded is None:
+                encoded = keys[key] = pack_string(key)
+            buffer += encoded
+
+            # Короткие строки и малые целые - самые частые значения
+            cls = value.__class__
+            if cls is str:
+                data = value.encode('utf-8')
+                if len(data) < 32:
+                    buffer.append(0xa0 | len(data))
+                    buffer += data
+                else:
+                    buffer += pack_string(value)
+            elif cls is int:
+                if 0 <= value < 0x80:
+                    buffer.append(value)
+                else:
+                    buffer += pack_int(value)
+            elif isinstance(value, dict):
+                buffer += _map_header(len(value))
+                stack.append(iter(value.items()))
+            else:
+                buffer += pack_value(value)
+
+            if len(buffer) >= self.CHUNK:
+                write(buffer)
+                buffer = bytearray()
+        write(buffer)
+
+
+def write_msgpack(config: Dict[str, Any], stream: BinaryIO):
+    MsgpackEmitter(stream).write(config)
+
+
+def dump_msgpack(config: Dict[str, Any]) -> bytes:
+    buffer = io.BytesIO()
+    write_msgpack(config, buffer)
+    return buffer.getvalue()
+
+
+# Чтение
+
+# Код -> (структура длины или значения, вид)
+_FIXED = {
+    0xca: (_FLOAT32, 'value'), 0xcb: (_FLOAT64, 'value'),
+    0xcc: (_UINT8, 'value'), 0xcd: (_UINT16, 'value'),
+    0xce: (_UINT32, 'value'), 0xcf: (_UINT64, 'value'),
+    0xd0: (_INT8, 'value'), 0xd1: (_INT16, 'value'),
+    0xd2: (_INT32, 'value'), 0xd3: (_INT64, 'value'),
+    0xd9: (_UINT8, 'str'), 0xda: (_UINT16, 'str'), 0xdb: (_UINT32, 'str'),
+    0xde: (_UINT16, 'map'), 0xdf: (_UINT32, 'map'),
+}
+_CONSTANTS = {_NIL: None, _FALSE: False, _TRUE: True}
+_NO_KEY = object()
+
+
+def _read(data: bytes, position: int) -> Tuple[Any, int, int]:
+    """(значение, позиция после него, число записей map или -1)."""
+    code = data[position]
+    position += 1
+    if code < 0x80:
+        return code, position, -1
+    if code >= 0xe0:
+        return code - 0x100, position, -1
+    if code < 0x90:
+        return {}, position, code & 0x0f
+    if 0xa0 <= code < 0xc0:
+        size = code & 0x1f
+    elif code in _CONSTANTS:
+        return _CONSTANTS[code], position, -1
+    elif code in _FIXED:
+        fmt, kind = _FIXED[code]
+        (value,) = fmt.unpack_from(data, position)
+        position += fmt.size
+        if kind == 'value':
+            return value, position, -1
+        if kind == 'map':
+            return {}, position, value
+        size = value
+    else:
+        raise ValueError(f"Неподдерживаемый код MessagePack 0x{code:02x}")
+
+    end = position + size
+    if end > len(data):
+        raise ValueError("Данные MessagePack обрываются внутри строки")
+    return data[position:end].decode('utf-8'), end, -1
+
+
+def load_msgpack(data: bytes) -> Dict[str, Any]:
+    """Словарь конфигурации из вывода write_msgpack (map со строковыми ключами)."""
+    data = bytes(data)
+    try:
+        result, position, count = _read(data, 0)
+        if count < 0:
+            raise ValueError("Корень MessagePack должен быть map")
+
+        # [словарь, сколько записей осталось, прочитанный ключ]
+        stack = [[result, count, _NO_KEY]] if count else []
+        while stack:
+            frame = stack[-1]
+            value, position, count = _read(data, position)
+            if frame[2] is _NO_KEY:
+                if not isinstance(value, str):
+                    raise ValueError("Ключ map в MessagePack должен быть строкой")
+                frame[2] = value
+                continue
+
+            frame[0][frame[2]] = value
+            frame[2] = _NO_KEY
+            frame[1] -= 1
+            if count > 0:
+                stack.append([value, count, _NO_KEY])
+            while stack and not stack[-1][1]:
+                stack.pop()
+    except (IndexError, struct.error):
+        raise ValueError("Данные MessagePack обрываются") from None
+
+    if position != len(data):
+        raise ValueError("Лишние данные после MessagePack")
+    return result
@@ -0,0 +1,156 @@
+"""
+Параллельный разбор одного большого файла: текст делится на части по
+границам инструкций верхнего уровня, части разбираются в пуле процессов,
+а инструкции собираются в исходном порядке. Вычисление остаётся
+последовательным, поэтому семантика констант не меняется.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+from .errors import ConfigError
+from .lexer import Lexer, Token, iter_statement_spans
+from .parser import ASTNode, AssignmentNode, BlockNode, ExpressionNode, IncludeNode, Parser, ValueNode
+
+# Части меньше этого размера не окупают передачу между процессами
+MIN_CHUNK_CHARS = 1 << 16
+
+# Теги плоской записи AST для передачи между процессами
+_VALUE, _EXPRESSION, _BLOCK, _END, _INCLUDE = range(5)
+
+
+def split_chunks(source: str, parts: int,
+                 min_chars: int = MIN_CHUNK_CHARS) -> List[Tuple[int, int, int, int]]:
+    """
+    Делит текст примерно на parts частей из целых участков
+    iter_statement_spans (строки, выражения и комментарии учитываются).
+    Возвращает (начало, конец, строка, позиция) для каждой части.
+    """
+    target = max(min_chars, len(source) // max(parts, 1) + 1)
+    chunks = []
+    line = 1
+    counted = 0
+    chunk_start = 0
+    for _, end in iter_statement_spans(source):
+        if end - chunk_start < target and end < len(source):
+            continue
+        line += source.count('\n', counted, chunk_start)
+        counted = chunk_start
+        column = chunk_start - source.rfind('\n', 0, chunk_start)
+        chunks.append((chunk_start, end, line, column))
+        chunk_start = end
+    return chunks
+
+
+class ChunkOverrun(Exception):
+    """Разбор части заглянул за её конец: граница разрезала инструкцию."""
+
+
+class _ChunkParser(Parser):
+    """
+    Parser для части текста. Нестрогий Parser за концом части решил бы
+    иначе, чем на всём тексте (`a = ;` взял бы значением следующий токен),
+    поэтому любой взгляд за конец - ChunkOverrun.
+    """
+
+    def peek(self, offset: int) -> Optional[Token]:
+        token = super().peek(offset)
+        if token is None:
+            raise ChunkOverrun()
+        return token
+
+    def parse_value(self) -> ASTNode:
+        if self.is_at_end():
+            raise ChunkOverrun()
+        return super().parse_value()
+
+
+def parse_chunk(task: Tuple[str, int, int]) -> List[ASTNode]:
+    """Разбирает часть текста; позиция нужна для строк и столбцов в ошибках."""
+    text, line, column = task
+    return _ChunkParser(Lexer(text, line=line, column=column).tokenize()).parse()
+
+
+def parse_chunk_flat(task: Tuple[str, int, int]) -> list:
+    """parse_chunk для процесса пула: AST возвращается в записи encode_nodes."""
+    return encode_nodes(parse_chunk(task))
+
+
+def encode_nodes(nodes: List[ASTNode]) -> list:
+    """
+    Плоская запись AST, которую строит Parser: тег, имя и значение подряд в
+    одном списке, блок закрывается тегом _END. Такой список pickle передаёт
+    в разы быстрее дерева объектов и без рекурсии на глубоких блоках.
+    """
+    flat = []
+    stack = [iter(nodes)]
+    while stack:
+        node = next(stack[-1], None)
+        if node is None:
+            stack.pop()
+            if stack:
+                flat.append(_END)
+        elif isinstance(node, BlockNode):
+            flat += (_BLOCK, node.key)
+            stack.append(iter(node.assignments))
+        elif isinstance(node, IncludeNode):
+            flat += (_INCLUDE, node.path, node.line)
+        elif isinstance(node.value, ExpressionNode):
+            value = node.value
+            flat += (_EXPRESSION, node.key, value.expression, value.line, value.column)
+        else:
+            flat += (_VALUE, node.key, node.value.value)
+    return flat
+
+
+def decode_nodes(flat: list, ast: List[ASTNode]):
+    """Восстанавливает узлы из записи encode_nodes и дописывает их в ast."""
+    stack = [ast]
+    index = 0
+    size = len(flat)
+    while index < size:
+        tag = flat[index]
+        if tag == _END:
+            stack.pop()
+            index += 1
+        elif tag == _BLOCK:
+            node = BlockNode(flat[index + 1], [])
+            stack[-1].append(node)
+            stack.append(node.assignments)
+            index += 2
+        elif tag == _INCLUDE:
+            stack[-1].append(IncludeNode(flat[index + 1], flat[index + 2]))
+            index += 3
+        elif tag == _EXPRESSION:
+            stack[-1].append(AssignmentNode(flat[index + 1], ExpressionNode(*flat[index + 2:index + 5])))
+            index += 5
+        else:
+            stack[-1].append(AssignmentNode(flat[index + 1], ValueNode(flat[index + 2])))
+            index += 3
+
+
+def parse_parallel(source: str, jobs: Optional[int] = None,
+                   min_chars: int = MIN_CHUNK_CHARS) -> List[ASTNode]:
+    """
+    AST всего текста, как у Parser(Lexer(source).tokenize()).parse(), но
+    части разбираются в jobs процессах (по умолчанию - по числу ядер).
+    Если часть одна, пул не запускается. Если какая-то часть не
+    разбирается, текст разбирается заново целиком: результат или ошибка
+    те же, что у Parser, где бы ни прошла граница частей.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    # По несколько частей на процесс, чтобы выровнять нагрузку
+    chunks = split_chunks(source, jobs * 4, min_chars)
+    tasks = [(source[start:end], line, column) for start, end, line, column in chunks]
+    try:
+        if jobs == 1 or len(tasks) <= 1:
+            return [node for task in tasks for node in parse_chunk(task)]
+
+        ast = []
+        with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as executor:
+            # Части собираются в исходном порядке по мере готовности
+            for flat in executor.map(parse_chunk_flat, tasks):
+                decode_nodes(flat, ast)
+        return ast
+    except (ConfigError, SyntaxError, ChunkOverrun):
+        return Parser(Lexer(source).tokenize()).parse()
+
@@ -1,9 +1,19 @@
 """
 Парсер для построения AST из токенов.
 """
-from typing import List, Optional, Dict, Any
+import re
+from collections import deque
+from typing import Iterable, Iterator, List, Optional, Dict, Any
+from .errors import ExpressionError
+from .evaluator import find_stack_error
 from .lexer import Token
 
+# Токен конца ввода: один на все вызовы current()
+EOF = Token('EOF', '', 0, 0)
+
+# Лексема постфиксного выражения
+_WORD = re.compile(r'\S+')
+
 class ASTNode:
     pass
 
@@ -31,64 +41,139 @@ class ValueNode(ASTNode):
         return f"Value({self.value})"
 
 class ExpressionNode(ASTNode):
-    def __init__(self, expression: str):
+    def __init__(self, expression: str, line: int = 0, column: int = 0):
         self.expression = expression
+        # Позиция открывающего $ в исходном тексте
+        self.line = line
+        self.column = column
+        # Программа после Optimizer, если он подставил в неё значения
+        self.compiled = None
     
     def __repr__(self):
         return f"Expression({self.expression})"
 
+    def error(self, index: Optional[int], message: str) -> ExpressionError:
+        """Ошибка с позицией index-й лексемы выражения или, без index, его начала."""
+        text = f"${self.expression}$"
+        if index is None:
+            return ExpressionError(f"{message} {text}", self.line, self.column)
+        word = list(_WORD.finditer(self.expression))[index]
+        offset = word.start()
+        newline = self.expression.rfind('\n', 0, offset)
+        if newline < 0:
+            line, column = self.line, self.column + 1 + offset
+        else:
+            line = self.line + self.expression.count('\n', 0, offset)
+            column = offset - newline
+        return ExpressionError(f"{message} '{word.group()}' в выражении {text}", line, column)
+
+class IncludeNode(ASTNode):
+    """Подключение файла: `include [[путь]];`, путь - от каталога текущего файла."""
+    def __init__(self, path: str, line: int = 0):
+        self.path = path
+        self.line = line
+    
+    def __repr__(self):
+        return f"Include({self.path})"
+
 class Parser:
-    def __init__(self, tokens: List[Token]):
-        self.tokens = tokens
+    """
+    Парсер читает токены лениво из любого итерируемого источника (списка
+    или генератора tokenize_stream), держа в памяти только окно просмотра.
+    """
+    def __init__(self, tokens: Iterable[Token]):
+        self.tokens = iter(tokens)
+        self.lookahead = deque()
+        self.last = None
         self.position = 0
-    
+        self.includes = 0
+
     def parse(self) -> List[ASTNode]:
-        statements = []
-        
+        return list(self.iter_parse())
+
+    def iter_parse(self) -> Iterator[ASTNode]:
+        """Выдаёт инструкции верхнего уровня по одной, по мере разбора."""
         while not self.is_at_end():
             # Пропускаем пустые токены
             if self.current().type in ['NEWLINE', 'COMMENT']:
                 self.advance()
                 continue
-            
+
             # Блок @{ ... }
-            if self.check('IDENTIFIER') and self.peek_next() and self.peek_next().type == 'LBRACE':
-                statements.append(self.parse_block())
+            if self.check_block():
+                yield self.parse_block()
+            elif self.check_include():
+                yield self.parse_include()
             # Обычное присваивание
             elif self.check('IDENTIFIER') and self.peek_next() and self.peek_next().type == 'EQUALS':
-                statements.append(self.parse_assignment())
+                yield self.parse_assignment()
             else:
                 self.advance()
-        
-        return statements
-    
+
     def parse_assignment(self) -> AssignmentNode:
         key = self.consume('IDENTIFIER').value
         self.consume('EQUALS')
         value = self.parse_value()
-        self.consume('SEMICOLON')
+        # Точка с запятой - разделитель, лексер её не выдаёт
+        if self.check('SEMICOLON'):
+            self.advance()
         return AssignmentNode(key, value)
     
+    def check_include(self) -> bool:
+        """`include` не зарезервировано: директива, только если за ним строка."""
+        if not self.check('IDENTIFIER') or self.current().value != 'include':
+            return False
+        next_token = self.peek_next()
+        return next_token is not None and next_token.type == 'STRING'
+
+    def parse_include(self) -> IncludeNode:
+        line = self.consume('IDENTIFIER').line
+        path = self.consume('STRING').value
+        self.includes += 1
+        return IncludeNode(path, line)
+    
+    def check_block(self) -> bool:
+        """Блок записывается как `имя = @{ ... };` или `имя @{ ... };`."""
+        if not self.check('IDENTIFIER'):
+            return False
+        next_token = self.peek_next()
+        if next_token and next_token.type == 'EQUALS':
+            next_token = self.peek(2)
+        return next_token is not None and next_token.type == 'LBRACE'
+
     def parse_block(self) -> BlockNode:
-        key = self.consume('IDENTIFIER').value
-        self.consume('LBRACE')
-        
-        assignments = []
-        while not self.check('RBRACE') and not self.is_at_end():
+        """
+        Разбирает блок со всеми вложенными без рекурсии: открытые блоки
+        лежат в явном стеке, так что глубина ограничена только памятью.
+        """
+        stack = [self.open_block()]
+        while True:
+            if self.check('RBRACE') or self.is_at_end():
+                self.consume('RBRACE')
+                key, assignments = stack.pop()
+                node = BlockNode(key, assignments)
+                if not stack:
+                    return node
+                stack[-1][1].append(node)
             # Пропускаем комментарии и пустые строки
-            if self.current().type in ['NEWLINE', 'COMMENT']:
+            elif self.current().type in ['NEWLINE', 'COMMENT']:
                 self.advance()
-                continue
-            
-            if self.check('IDENTIFIER') and self.peek_next() and self.peek_next().type == 'EQUALS':
-                assignments.append(self.parse_assignment())
-            elif self.check('IDENTIFIER') and self.peek_next() and self.peek_next().type == 'LBRACE':
-                assignments.append(self.parse_block())
+            elif self.check_block():
+                stack.append(self.open_block())
+            elif self.check_include():
+                stack[-1][1].append(self.parse_include())
+            elif self.check('IDENTIFIER') and self.peek_next() and self.peek_next().type == 'EQUALS':
+                stack[-1][1].append(self.parse_assignment())
             else:
                 self.advance()
-        
-        self.consume('RBRACE')
-        return BlockNode(key, assignments)
+
+    def open_block(self):
+        """Читает `имя = @{` и возвращает (имя, список для содержимого)."""
+        key = self.consume('IDENTIFIER').value
+        if self.check('EQUALS'):
+            self.advance()
+        self.consume('LBRACE')
+        return key, []
     
     def parse_value(self) -> ASTNode:
         token = self.current()
@@ -112,7 +197,13 @@ class Parser:
             return ValueNode(token.value == 'true')
         elif token.type == 'EXPRESSION':
             self.advance()
-            return ExpressionNode(token.value)
+            node = ExpressionNode(token.value, token.line, token.column)
+            # Нехватка или избыток операндов - ошибка разбора, а не строка
+            # "${...}" при вычислении
+            problem = find_stack_error(token.value)
+            if problem is not None:
+                raise node.error(*problem)
+            return node
         else:
             # Если что-то пошло не так, возвращаем как есть
             self.advance()
@@ -120,31 +211,45 @@ class Parser:
     
     def current(self) -> Token:
         if self.is_at_end():
-            return Token('EOF', '', 0, 0)
-        return self.tokens[self.position]
-    
+            return EOF
+        return self.lookahead[0]
+
     def advance(self) -> Token:
         if not self.is_at_end():
+            self.last = self.lookahead.popleft()
             self.position += 1
         return self.previous()
-    
+
     def previous(self) -> Token:
-        return self.tokens[self.position - 1]
-    
+        return self.last
+
     def check(self, type: str) -> bool:
         if self.is_at_end():
             return False
         return self.current().type == type
-    
+
     def consume(self, type: str) -> Token:
         if self.check(type):
             return self.advance()
         raise SyntaxError(f"Expected {type}, got {self.current().type}")
-    
+
     def peek_next(self) -> Optional[Token]:
-        if self.position + 1 < len(self.tokens):
-            return self.tokens[self.position + 1]
+        return self.peek(1)
+
+    def peek(self, offset: int) -> Optional[Token]:
+        if self.fill(offset + 1):
+            return self.lookahead[offset]
         return None
-    
+
+    def fill(self, count: int) -> bool:
+        """Дочитывает окно просмотра до count токенов, если они есть."""
+        while len(self.lookahead) < count:
+            token = next(self.tokens, None)
+            if token is None:
+                return False
+            self.lookahead.append(token)
+        return True
+
     def is_at_end(self) -> bool:
-        return self.position >= len(self.tokens)
\ No newline at end of file
+        return not self.fill(1)
+
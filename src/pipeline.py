@@ -0,0 +1,187 @@
+"""
+Полный цикл трансляции: чтение .cfg, разбор, вычисление и запись в
+выбранном формате (см. formats).
+"""
+import os
+import shutil
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
+from .formats import OUTPUT_FORMATS, load_writer
+from .interning import Interner
+from .lexer import Lexer, MappedSource, tokenize_stream
+from .modules import resolve_includes
+from .parser import Parser
+from .profiling import Profiler, count_nodes, stage
+from .transformer import ConfigTransformer
+
+# Кэш, оптимизатор, пул процессов и эмиттеры нужны не каждому запуску и
+# импортируются в своих функциях
+if TYPE_CHECKING:
+    from .cache import TranslationCache
+    from .optimizer import Optimizer
+
+PathLike = Union[str, Path]
+
+
+def read_config(input_path: PathLike, stream: bool = False,
+                profiler: Optional[Profiler] = None, mapped: bool = False,
+                jobs: Optional[int] = None, included: Optional[List[str]] = None,
+                interner: Optional[Interner] = None) -> Dict[str, Any]:
+    """
+    Разбирает и вычисляет файл конфигурации. С mapped файл отображается в
+    память и разбирается как байты: текст целиком не декодируется. С jobs
+    текст разбирается по частям в пуле процессов (см. translate_source).
+    Пути подключённых файлов дописываются в included. С interner блоки
+    результата общие с другими конфигурациями, загруженными через него.
+    """
+    transformer = ConfigTransformer(interner)
+    path = os.fspath(input_path)
+
+    if mapped:
+        with MappedSource(input_path) as source:
+            with stage(profiler, 'lex') as current:
+                tokens = source.tokenize()
+                current.count(tokens=len(tokens))
+            return translate_tokens(tokens, transformer, profiler, path, included)
+
+    if stream:
+        # Токены и инструкции верхнего уровня разбираются по мере чтения,
+        # поэтому этапы замеряются вместе
+        with stage(profiler, 'stream') as current, open(input_path, 'r', encoding='utf-8') as f:
+            statements = resolve_includes(Parser(tokenize_stream(f)).iter_parse(), path,
+                                          included=included)
+            result = transformer.ast_to_dict(statements)
+            current.count(keys=len(result))
+            return result
+
+    # Читаем входной файл
+    with stage(profiler, 'read') as current, open(input_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+        current.count(chars=len(content))
+
+    return translate_source(content, transformer, profiler, jobs, path, included)
+
+
+def translate_source(content: str, transformer: Optional[ConfigTransformer] = None,
+                     profiler: Optional[Profiler] = None, jobs: Optional[int] = None,
+                     path: Optional[str] = None, included: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Разбирает и вычисляет текст конфигурации. При jobs > 1 лексический и
+    синтаксический анализ идут по частям в jobs процессах; вычисление
+    всё равно последовательное, результат тот же. path - файл, от
+    каталога которого ищутся подключаемые файлы (по умолчанию - текущий
+    каталог).
+    """
+    transformer = transformer or ConfigTransformer()
+
+    if jobs is not None and jobs > 1:
+        from .parallel import parse_parallel
+        with stage(profiler, 'parse') as current:
+            ast = list(resolve_includes(parse_parallel(content, jobs), path, included=included))
+            if profiler is not None:
+                nodes, expressions = count_nodes(ast)
+                current.count(nodes=nodes, expressions=expressions)
+        return evaluate_ast(ast, transformer, profiler)
+
+    # Лексический анализ
+    with stage(profiler, 'lex') as current:
+        tokens = Lexer(content).tokenize()
+        current.count(tokens=len(tokens))
+
+    return translate_tokens(tokens, transformer, profiler, path, included)
+
+
+def translate_tokens(tokens, transformer: ConfigTransformer, profiler: Optional[Profiler] = None,
+                     path: Optional[str] = None, included: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Разбирает и вычисляет уже выделенные токены."""
+    # Синтаксический анализ
+    with stage(profiler, 'parse') as current:
+        parser = Parser(tokens)
+        ast = parser.parse()
+        if parser.includes:
+            ast = list(resolve_includes(ast, path, included=included))
+        if profiler is not None:
+            nodes, expressions = count_nodes(ast)
+            current.count(nodes=nodes, expressions=expressions)
+
+    return evaluate_ast(ast, transformer, profiler)
+
+
+def evaluate_ast(ast, transformer: ConfigTransformer,
+                 profiler: Optional[Profiler] = None) -> Dict[str, Any]:
+    """Вычисляет инструкции по порядку."""
+    # Преобразование в словарь
+    with stage(profiler, 'evaluate') as current:
+        result = transformer.ast_to_dict(ast)
+        current.count(keys=len(result))
+    return result
+
+
+def lint_file(input_path: PathLike) -> 'Optimizer':
+    """Разбирает файл и прогоняет Optimizer без вычисления; отчёт - в нём."""
+    from .optimizer import Optimizer
+    path = os.fspath(input_path)
+    with open(path, 'r', encoding='utf-8') as f:
+        ast = Parser(Lexer(f.read()).tokenize()).parse()
+    optimizer = Optimizer()
+    optimizer.optimize(resolve_includes(ast, path))
+    return optimizer
+
+
+def write_output(config_dict: Dict[str, Any], output_path: PathLike, output_format: str = 'toml',
+                 profiler: Optional[Profiler] = None):
+    """Записывает вычисленную конфигурацию в файл в формате output_format."""
+    with stage(profiler, 'emit') as current:
+        _write_output(config_dict, output_path, output_format)
+        if profiler is not None:
+            current.count(bytes=os.path.getsize(output_path))
+
+
+def _write_output(config_dict: Dict[str, Any], output_path: PathLike, output_format: str):
+    writer, binary = load_writer(output_format)
+    if binary:
+        with open(output_path, 'wb') as f:
+            writer(config_dict, f)
+    else:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            writer(config_dict, f)
+
+
+def translate_file(input_path: PathLike, output_path: PathLike, stream: bool = False,
+                   cache: Optional['TranslationCache'] = None, output_format: str = 'toml',
+                   profiler: Optional[Profiler] = None, mapped: bool = False,
+                   jobs: Optional[int] = None) -> bool:
+    """
+    Транслирует файл .cfg в файл формата output_format (TOML, JSON,
+    MessagePack или двоичный снимок). С кэшем результат для уже
+    встречавшегося содержимого копируется из него; возвращает True, если
+    результат взят из кэша.
+    С profiler время, счётчики и память каждого этапа попадают в него.
+    mapped и jobs - способ разбора (см. read_config).
+    """
+    key = None
+    suffix = OUTPUT_FORMATS[output_format]
+    if cache is not None:
+        key = cache.make_key(Path(input_path), {'format': output_format})
+        cached = cache.lookup(key, suffix)
+        if cached is not None:
+            try:
+                with stage(profiler, 'cache'):
+                    shutil.copyfile(cached, output_path)
+                return True
+            except FileNotFoundError:
+                # Запись вытеснена другим процессом - транслируем заново
+                pass
+
+    included = []
+    config_dict = read_config(input_path, stream=stream, profiler=profiler, mapped=mapped,
+                              jobs=jobs, included=included)
+    write_output(config_dict, output_path, output_format, profiler)
+
+    # Ключ зависит только от текста самого файла, поэтому результат с
+    # подключениями не кэшируется: подключённые файлы могут измениться
+    if cache is not None and not included:
+        cache.put_file(key, output_path, suffix)
+        if cache.store_dicts:
+            cache.put_dict(key, config_dict)
+    return False
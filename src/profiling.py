@@ -0,0 +1,151 @@
+"""
+Замер этапов трансляции: время, счётчики (токены, узлы, выражения) и
+пик памяти на каждом этапе.
+"""
+import json
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from .parser import ASTNode, AssignmentNode, BlockNode, ExpressionNode
+
+
+class StageMetrics:
+    """Итог одного этапа."""
+    __slots__ = ('name', 'seconds', 'peak_bytes', 'counts')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.seconds = 0.0
+        self.peak_bytes = None   # None, если память не отслеживалась
+        self.counts: Dict[str, int] = {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'seconds': self.seconds,
+            'peak_bytes': self.peak_bytes,
+            'counts': dict(self.counts),
+        }
+
+    def __repr__(self):
+        return f"StageMetrics({self.name}, {self.seconds * 1000:.2f} мс, {self.counts})"
+
+
+class _Stage:
+    """Контекст замера одного этапа; создаётся Profiler.stage."""
+    __slots__ = ('profiler', 'metrics', 'start', 'memory_start', 'started_tracing')
+
+    def __init__(self, profiler: 'Profiler', name: str):
+        self.profiler = profiler
+        self.metrics = StageMetrics(name)
+
+    def count(self, **counts: int):
+        self.metrics.counts.update(counts)
+
+    def __enter__(self):
+        self.started_tracing = False
+        if self.profiler.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self.started_tracing = True
+            tracemalloc.reset_peak()
+            self.memory_start = tracemalloc.get_traced_memory()[0]
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.seconds = time.perf_counter() - self.start
+        if self.profiler.memory:
+            self.metrics.peak_bytes = max(0, tracemalloc.get_traced_memory()[1] - self.memory_start)
+            if self.started_tracing:
+                tracemalloc.stop()
+        self.profiler._finish(self.metrics)
+        return False
+
+
+class _NullStage:
+    """Заглушка этапа при выключенном профилировании: ничего не делает."""
+    __slots__ = ()
+
+    def count(self, **counts: int):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_STAGE = _NullStage()
+
+
+class Profiler:
+    """
+    Собирает StageMetrics по этапам. memory=True включает tracemalloc на
+    время этапа (это заметно замедляет разбор). on_stage вызывается после
+    каждого этапа - для передачи метрик во внешнюю систему.
+    """
+
+    def __init__(self, memory: bool = True,
+                 on_stage: Optional[Callable[[StageMetrics], None]] = None):
+        self.memory = memory
+        self.on_stage = on_stage
+        self.stages: List[StageMetrics] = []
+
+    def stage(self, name: str) -> _Stage:
+        return _Stage(self, name)
+
+    def _finish(self, metrics: StageMetrics):
+        self.stages.append(metrics)
+        if self.on_stage is not None:
+            self.on_stage(metrics)
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(metrics.seconds for metrics in self.stages)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'total_seconds': self.total_seconds,
+            'stages': [metrics.to_dict() for metrics in self.stages],
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+
+    def format_table(self) -> str:
+        rows = [('Этап', 'Время, мс', 'Пик памяти, КБ', 'Счётчики')]
+        for metrics in self.stages:
+            memory = '-' if metrics.peak_bytes is None else f"{metrics.peak_bytes / 1024:.1f}"
+            counts = ', '.join(f"{key}={value}" for key, value in metrics.counts.items())
+            rows.append((metrics.name, f"{metrics.seconds * 1000:.2f}", memory, counts))
+        rows.append(('итого', f"{self.total_seconds * 1000:.2f}", '', ''))
+
+        widths = [max(len(row[column]) for row in rows) for column in range(3)]
+        lines = []
+        for row in rows:
+            cells = [row[0].ljust(widths[0]), row[1].rjust(widths[1]), row[2].rjust(widths[2]), row[3]]
+            lines.append('  '.join(cells).rstrip())
+        return '\n'.join(lines)
+
+
+def stage(profiler: Optional[Profiler], name: str):
+    """Этап profiler или пустая заглушка, если профилирование выключено."""
+    return NULL_STAGE if profiler is None else profiler.stage(name)
+
+
+def count_nodes(nodes: Iterable[ASTNode]) -> Tuple[int, int]:
+    """Число узлов AST и число выражений среди них."""
+    total = expressions = 0
+    stack = list(nodes)
+    while stack:
+        node = stack.pop()
+        total += 1
+        if isinstance(node, BlockNode):
+            stack.extend(node.assignments)
+        elif isinstance(node, AssignmentNode):
+            stack.append(node.value)
+        elif isinstance(node, ExpressionNode):
+            expressions += 1
+    return total, expressions
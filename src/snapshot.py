@@ -0,0 +1,307 @@
+"""
+Двоичный снимок вычисленной конфигурации для быстрого старта сервисов.
+
+Формат (все числа little-endian):
+    заголовок   magic 'CFGS', версия, число строк, смещения таблицы
+                строк, данных строк, таблиц, корня и CRC32 всего, что
+                идёт после заголовка;
+    смещения    (число строк + 1) x u32 - границы строк в данных;
+    данные      UTF-8 всех различных строк (и ключей, и значений) подряд;
+    таблицы     u32 число записей, затем записи по 13 байт в исходном
+                порядке (u32 номер строки ключа, u8 тип, 8 байт значения)
+                и u32 номера записей, упорядоченных по байтам ключа, -
+                для двоичного поиска без построения словаря.
+
+Значение записи - bool/int (q), float (d), номер строки или смещение
+вложенной таблицы (Q). Вложенная таблица записывается раньше
+содержащей, поэтому корень оказывается последним.
+"""
+import mmap
+import os
+import struct
+import zlib
+from collections.abc import Mapping
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Union
+from .errors import SnapshotError
+
+MAGIC = b'CFGS'
+SNAPSHOT_VERSION = 1
+
+HEADER = struct.Struct('<4sHHIQQQQI')
+_COUNT = struct.Struct('<I')
+_ENTRY_KEY = struct.Struct('<IB')
+_INT = struct.Struct('<q')
+_FLOAT = struct.Struct('<d')
+_INDEX = struct.Struct('<Q')
+ENTRY_SIZE = _ENTRY_KEY.size + 8
+
+# Типы значений в записях
+TAG_FALSE = 0
+TAG_TRUE = 1
+TAG_INT = 2
+TAG_FLOAT = 3
+TAG_STRING = 4
+TAG_TABLE = 5
+
+
+class SnapshotWriter:
+    """Собирает снимок из словаря конфигурации (результата ast_to_dict)."""
+
+    def __init__(self):
+        self.strings: Dict[str, int] = {}
+        self.tables = bytearray()
+
+    def intern(self, value: str) -> int:
+        index = self.strings.get(value)
+        if index is None:
+            index = self.strings[value] = len(self.strings)
+        return index
+
+    def dump(self, config: Dict[str, Any]) -> bytes:
+        root = self._write_tables(config)
+
+        encoded = [string.encode('utf-8') for string in self.strings]
+        offsets = [0]
+        for data in encoded:
+            offsets.append(offsets[-1] + len(data))
+
+        strings_offset = HEADER.size
+        data_offset = strings_offset + 4 * len(offsets)
+        tables_offset = data_offset + offsets[-1]
+        body = b''.join([
+            struct.pack(f'<{len(offsets)}I', *offsets),
+            *encoded,
+            self.tables,
+        ])
+        header = HEADER.pack(MAGIC, SNAPSHOT_VERSION, 0, len(encoded), strings_offset,
+                             data_offset, tables_offset, root, zlib.crc32(body))
+        return header + body
+
+    def _write_tables(self, config: Dict[str, Any]) -> int:
+        # Обход в обратном порядке без рекурсии: таблица пишется после
+        # всех вложенных, одинаковые объекты словарей - один раз
+        written: Dict[int, int] = {}
+        stack = [(config, False)]
+        while stack:
+            table, ready = stack.pop()
+            if id(table) in written:
+                continue
+            if not ready:
+                stack.append((table, True))
+                stack.extend((value, False) for value in table.values()
+                             if isinstance(value, dict) and id(value) not in written)
+                continue
+
+            offset = len(self.tables)
+            self.tables += _COUNT.pack(len(table))
+            for key, value in table.items():
+                self.tables += self._entry(key, value, written)
+            keys = [str(key).encode('utf-8') for key in table]
+            order = sorted(range(len(keys)), key=keys.__getitem__)
+            self.tables += struct.pack(f'<{len(order)}I', *order)
+            written[id(table)] = offset
+        return written[id(config)]
+
+    def _entry(self, key: str, value: Any, written: Dict[int, int]) -> bytes:
+        key_index = self.intern(str(key))
+        if isinstance(value, bool):
+            return _ENTRY_KEY.pack(key_index, TAG_TRUE if value else TAG_FALSE) + bytes(8)
+        if isinstance(value, int):
+            try:
+                return _ENTRY_KEY.pack(key_index, TAG_INT) + _INT.pack(value)
+            except struct.error:
+                raise SnapshotError(f"Число {key} = {value} не помещается в 64 бита") from None
+        if isinstance(value, float):
+            return _ENTRY_KEY.pack(key_index, TAG_FLOAT) + _FLOAT.pack(value)
+        if isinstance(value, str):
+            return _ENTRY_KEY.pack(key_index, TAG_STRING) + _INDEX.pack(self.intern(value))
+        if isinstance(value, dict):
+            return _ENTRY_KEY.pack(key_index, TAG_TABLE) + _INDEX.pack(written[id(value)])
+        raise SnapshotError(f"Значение типа {type(value).__name__} нельзя записать в снимок")
+
+
+def dump_snapshot(config: Dict[str, Any]) -> bytes:
+    return SnapshotWriter().dump(config)
+
+
+def write_snapshot(config: Dict[str, Any], stream: BinaryIO):
+    stream.write(dump_snapshot(config))
+
+
+class SnapshotReader:
+    """
+    Читает снимок из буфера (bytes или mmap) без разбора целиком: строки
+    декодируются при первом обращении, ключи ищутся двоичным поиском.
+    """
+
+    def __init__(self, buffer, verify: bool = True):
+        self.buffer = buffer
+        if len(buffer) < HEADER.size:
+            raise SnapshotError("Файл слишком мал для снимка конфигурации")
+        (magic, version, _, self.string_count, self.strings_offset, self.data_offset,
+         self.tables_offset, self.root_offset, checksum) = HEADER.unpack_from(buffer)
+
+        if magic != MAGIC:
+            raise SnapshotError("Файл не является снимком конфигурации")
+        if version != SNAPSHOT_VERSION:
+            raise SnapshotError(f"Неподдерживаемая версия снимка: {version} "
+                                f"(ожидается {SNAPSHOT_VERSION})")
+        if verify:
+            with memoryview(buffer) as view:
+                actual = zlib.crc32(view[HEADER.size:])
+            if actual != checksum:
+                raise SnapshotError("Контрольная сумма снимка не совпадает")
+
+        self._strings: Dict[int, str] = {}
+
+    @classmethod
+    def open(cls, path, verify: bool = True) -> 'SnapshotReader':
+        """Отображает файл в память; страницы читаются по мере обращения."""
+        with open(path, 'rb') as f:
+            try:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Пустой файл нельзя отобразить
+                raise SnapshotError("Файл слишком мал для снимка конфигурации") from None
+        try:
+            return cls(buffer, verify=verify)
+        except BaseException:
+            buffer.close()
+            raise
+
+    def raw_string(self, index: int) -> bytes:
+        """Байты строки index в UTF-8, без декодирования."""
+        if index >= self.string_count:
+            raise SnapshotError(f"Номер строки {index} вне таблицы строк")
+        start, end = struct.unpack_from('<II', self.buffer, self.strings_offset + 4 * index)
+        return self.buffer[self.data_offset + start:self.data_offset + end]
+
+    def string(self, index: int) -> str:
+        value = self._strings.get(index)
+        if value is None:
+            value = self._strings[index] = str(self.raw_string(index), 'utf-8')
+        return value
+
+    @property
+    def root(self) -> 'SnapshotTable':
+        return SnapshotTable(self, self.root_offset)
+
+    def close(self):
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SnapshotTable(Mapping):
+    """Таблица снимка как неизменяемый словарь с ленивыми значениями."""
+    __slots__ = ('reader', 'offset', 'position', 'count')
+
+    def __init__(self, reader: SnapshotReader, offset: int):
+        self.reader = reader
+        self.offset = offset
+        self.position = reader.tables_offset + offset
+        self.count = _COUNT.unpack_from(reader.buffer, self.position)[0]
+
+    def _entry_position(self, number: int) -> int:
+        return self.position + _COUNT.size + number * ENTRY_SIZE
+
+    def _find(self, key: str) -> Optional[int]:
+        """Позиция записи с ключом key: двоичный поиск по порядку ключей."""
+        buffer = self.reader.buffer
+        target = key.encode('utf-8')
+        order = self._entry_position(self.count)
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            (number,) = _COUNT.unpack_from(buffer, order + 4 * middle)
+            position = self._entry_position(number)
+            current = self.reader.raw_string(_ENTRY_KEY.unpack_from(buffer, position)[0])
+            if current == target:
+                return position
+            if current < target:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def _items(self) -> Iterator[tuple]:
+        """Пары (ключ, позиция записи) в исходном порядке."""
+        buffer = self.reader.buffer
+        position = self._entry_position(0)
+        for _ in range(self.count):
+            key_index, _ = _ENTRY_KEY.unpack_from(buffer, position)
+            yield self.reader.string(key_index), position
+            position += ENTRY_SIZE
+
+    def _value(self, position: int) -> Any:
+        buffer = self.reader.buffer
+        _, tag = _ENTRY_KEY.unpack_from(buffer, position)
+        position += _ENTRY_KEY.size
+        if tag == TAG_FALSE:
+            return False
+        if tag == TAG_TRUE:
+            return True
+        if tag == TAG_INT:
+            return _INT.unpack_from(buffer, position)[0]
+        if tag == TAG_FLOAT:
+            return _FLOAT.unpack_from(buffer, position)[0]
+        if tag == TAG_STRING:
+            return self.reader.string(_INDEX.unpack_from(buffer, position)[0])
+        if tag == TAG_TABLE:
+            return SnapshotTable(self.reader, _INDEX.unpack_from(buffer, position)[0])
+        raise SnapshotError(f"Неизвестный тип значения {tag} в снимке")
+
+    def __getitem__(self, key: str) -> Any:
+        position = self._find(key)
+        if position is None:
+            raise KeyError(key)
+        return self._value(position)
+
+    def __iter__(self) -> Iterator[str]:
+        for key, _ in self._items():
+            yield key
+
+    def __len__(self) -> int:
+        return self.count
+
+    def lookup(self, path: str) -> Any:
+        """Значение по пути через точку: table.lookup('server.ssl.enabled')."""
+        value = self
+        for part in path.split('.'):
+            if not isinstance(value, SnapshotTable):
+                raise KeyError(path)
+            value = value[part]
+        return value
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Полностью разворачивает таблицу в обычные словари."""
+        result: Dict[str, Any] = {}
+        stack: List[tuple] = [(self, result)]
+        while stack:
+            table, target = stack.pop()
+            for key, position in table._items():
+                value = table._value(position)
+                if isinstance(value, SnapshotTable):
+                    target[key] = {}
+                    stack.append((value, target[key]))
+                else:
+                    target[key] = value
+        return result
+
+    def __repr__(self):
+        return f"SnapshotTable(offset={self.offset}, keys={len(self)})"
+
+
+def load_snapshot(source: Union[str, bytes, os.PathLike], verify: bool = True) -> SnapshotTable:
+    """
+    Корневая таблица снимка: из bytes - напрямую, из пути - через mmap.
+    Отображение закрывается вместе с последней ссылкой на таблицы.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return SnapshotReader(source, verify=verify).root
+    return SnapshotReader.open(source, verify=verify).root
@@ -0,0 +1,382 @@
+"""
+Перебор параметров: один шаблон конфигурации и таблица из N наборов
+значений констант. Каждое выражение $...$ вычисляется один раз над
+столбцами NumPy длины N, а не N раз по отдельности.
+
+NumPy - необязательная зависимость: модуль импортируется и без неё,
+а sweep() сообщает, что её нужно установить.
+"""
+import io
+import math
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Union
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .emitter import write_toml
+from .evaluator import OP_CONST, OP_LOAD, _divide, _modulo, compile_expression
+from .lexer import Lexer
+from .modules import resolve_includes
+from .parser import ASTNode, AssignmentNode, BlockNode, ExpressionNode, Parser, ValueNode
+from .transformer import ConfigTransformer, _block_of
+
+_INT64_MIN = -2 ** 63
+_INT64_MAX = 2 ** 63 - 1
+# Целый результат не меньше этого по модулю проверяется на переполнение
+# int64 точной арифметикой Python
+_INT64_SAFE = 2.0 ** 62
+
+_MISSING = object()
+
+Overrides = Union[Mapping[str, Sequence[Any]], Iterable[Mapping[str, Any]]]
+
+
+class SweepResult:
+    """
+    Результат перебора: дерево как у ConfigTransformer.ast_to_dict, где
+    значение, одинаковое во всех вариантах, хранится один раз, а
+    различающееся - столбцом numpy.ndarray длины size.
+    """
+
+    def __init__(self, tree: Dict[str, Any], size: int, vectorized: int = 0, fallbacks: int = 0):
+        self.tree = tree
+        self.size = size
+        # Выражения, вычисленные над столбцами, и выражения, для которых
+        # пришлось вычислить каждый вариант отдельно
+        self.vectorized = vectorized
+        self.fallbacks = fallbacks
+
+    def variant(self, index: int) -> Dict[str, Any]:
+        """Словарь index-го варианта с обычными значениями Python."""
+        if not -self.size <= index < self.size:
+            raise IndexError(index)
+        return _variant(self.tree, index)
+
+    def variants(self) -> Iterator[Dict[str, Any]]:
+        # Столбцы один раз переводятся в списки: индексировать их дешевле
+        tree = _tolists(self.tree)
+        for index in range(self.size):
+            yield _variant(tree, index)
+
+    def to_toml(self, index: int) -> str:
+        buffer = io.StringIO()
+        write_toml(self.variant(index), buffer)
+        return buffer.getvalue()
+
+    def columns(self) -> Dict[str, 'np.ndarray']:
+        """Столбцовый вид: путь через точку -> массив из size значений."""
+        result = {}
+        stack = [('', iter(self.tree.items()))]
+        while stack:
+            prefix, items = stack[-1]
+            item = next(items, None)
+            if item is None:
+                stack.pop()
+                continue
+            key, value = item
+            if isinstance(value, dict):
+                stack.append((f"{prefix}{key}.", iter(value.items())))
+            elif isinstance(value, np.ndarray):
+                result[prefix + key] = value
+            else:
+                column = np.empty(self.size, dtype=object)
+                column.fill(value)
+                result[prefix + key] = column
+        return result
+
+
+def sweep(source: str, overrides: Overrides, path: Optional[str] = None) -> SweepResult:
+    """
+    Вычисляет шаблон source для каждого набора overrides. Наборы - список
+    словарей с одинаковыми ключами или словарь столбцов; ключ - имя
+    константы, для констант в блоках - путь через точку (server.port).
+    Набор заменяет значение каждого присваивания с этим путём. Результат
+    каждого варианта совпадает с трансляцией шаблона с этими значениями,
+    включая целочисленное деление и деление на ноль.
+    """
+    if np is None:
+        raise ImportError("Для перебора параметров нужен NumPy: pip install numpy")
+
+    size, columns = _override_columns(overrides)
+    ast = Parser(Lexer(source).tokenize()).parse()
+    ast = apply_overrides(resolve_includes(ast, path),
+                          {name: _column(values) for name, values in columns.items()})
+
+    transformer = SweepTransformer(size)
+    tree = transformer.ast_to_dict(ast)
+    return SweepResult(tree, size, transformer.vectorized, transformer.fallbacks)
+
+
+def apply_overrides(nodes: Iterable[ASTNode], values: Mapping[str, Any]) -> List[ASTNode]:
+    """
+    AST, в котором присваивания с путями из values получают эти значения.
+    Исходные узлы не меняются; путь, которого нет в AST, - ValueError.
+    """
+    found = set()
+    result = []
+    # (итератор содержимого, собираемый список, путь блока с точкой)
+    stack = [(iter(nodes), result, '')]
+    while stack:
+        pending, target, prefix = stack[-1]
+        node = next(pending, None)
+        if node is None:
+            stack.pop()
+            continue
+
+        block = _block_of(node)
+        if block is not None:
+            rebuilt = BlockNode(block.key, [])
+            if isinstance(node, AssignmentNode):
+                target.append(AssignmentNode(node.key, rebuilt))
+            else:
+                target.append(rebuilt)
+            stack.append((iter(block.assignments), rebuilt.assignments, f"{prefix}{node.key}."))
+        elif isinstance(node, AssignmentNode) and prefix + node.key in values:
+            found.add(prefix + node.key)
+            target.append(AssignmentNode(node.key, ValueNode(values[prefix + node.key])))
+        else:
+            target.append(node)
+
+    missing = [name for name in values if name not in found]
+    if missing:
+        raise ValueError("В конфигурации нет констант: " + ", ".join(missing))
+    return result
+
+
+class SweepTransformer(ConfigTransformer):
+    """
+    ConfigTransformer, в котором значение константы - скаляр или столбец
+    numpy.ndarray длины size. Выражение выполняется один раз над
+    столбцами; если это невозможно без расхождения со скалярным
+    вычислением, каждый вариант вычисляется обычной программой.
+    """
+
+    def __init__(self, size: int):
+        super().__init__()
+        self.size = size
+        self.vectorized = 0
+        self.fallbacks = 0
+
+    def node_to_value(self, node: ASTNode) -> Any:
+        if not isinstance(node, ExpressionNode):
+            return super().node_to_value(node)
+
+        program = node.compiled or compile_expression(node.expression)
+        symbols = self.evaluator.symbols
+        if not any(_varies(symbols.get(name, name)) for name in program.names):
+            # Все значения одинаковы во всех вариантах - обычное вычисление
+            return super().node_to_value(node)
+
+        try:
+            with np.errstate(all='ignore'):
+                value = self._evaluate_columns(program)
+        except Exception:
+            # В том числе _Fallback и ошибки типов: их даст и обычное вычисление
+            value = _MISSING
+        if value is not _MISSING:
+            self.vectorized += 1
+            return value
+
+        self.fallbacks += 1
+        values = []
+        for index in range(self.size):
+            try:
+                values.append(program.evaluate(_Variant(symbols, index)))
+            except Exception:
+                values.append(f"${{{node.expression}}}")
+        return _column(values)
+
+    def _evaluate_columns(self, program) -> Any:
+        symbols = self.evaluator.symbols
+        stack = []
+        for op, arg in program.code:
+            if op == OP_CONST:
+                stack.append(arg)
+            elif op == OP_LOAD:
+                stack.append(symbols.get(arg, arg))
+            else:
+                if len(stack) < 2:
+                    raise _Fallback()
+                b = stack.pop()
+                stack[-1] = _apply(arg, stack[-1], b)
+        return stack[0] if stack else 0
+
+
+class _Fallback(Exception):
+    """Операция над столбцами разошлась бы со скалярной семантикой."""
+
+
+class _Variant:
+    """Имена одного варианта для CompiledExpression.evaluate."""
+    __slots__ = ('symbols', 'index')
+
+    def __init__(self, symbols, index: int):
+        self.symbols = symbols
+        self.index = index
+
+    def get(self, name: str, default: Any = None) -> Any:
+        value = self.symbols.get(name, _MISSING)
+        if value is _MISSING:
+            return default
+        if isinstance(value, dict):
+            return _variant(value, self.index)
+        return _item(value, self.index)
+
+
+def _override_columns(overrides: Overrides):
+    """(число вариантов, имя -> список значений по вариантам)."""
+    if isinstance(overrides, Mapping):
+        columns = {name: list(values) for name, values in overrides.items()}
+        sizes = {len(values) for values in columns.values()}
+        if len(sizes) != 1 or 0 in sizes:
+            raise ValueError("Столбцы наборов должны быть непустыми и одной длины")
+    else:
+        rows = list(overrides)
+        if not rows:
+            raise ValueError("Нужен хотя бы один набор значений")
+        names = list(rows[0])
+        for row in rows:
+            if set(row) != set(names):
+                raise ValueError("Во всех наборах должны быть одни и те же константы")
+        columns = {name: [row[name] for row in rows] for name in names}
+        sizes = {len(rows)}
+
+    # Значения могут прийти из массивов NumPy: приводим к обычным
+    for values in columns.values():
+        values[:] = [value.item() if isinstance(value, np.generic) else value for value in values]
+    return sizes.pop(), columns
+
+
+def _column(values: List[Any]) -> Any:
+    """Скаляр, если все значения одинаковы, иначе столбец подходящего типа."""
+    first = values[0]
+    kind = type(first)
+    if all(type(value) is kind and value == first for value in values):
+        # 0.0 == -0.0, но в выводе они различаются
+        if kind is not float or len({math.copysign(1.0, value) for value in values}) == 1:
+            return first
+    kinds = {type(value) for value in values}
+    if kinds == {int} and _INT64_MIN <= min(values) and max(values) <= _INT64_MAX:
+        return np.array(values, dtype=np.int64)
+    if kinds == {float}:
+        return np.array(values, dtype=np.float64)
+    if kinds == {bool}:
+        return np.array(values, dtype=np.bool_)
+    column = np.empty(len(values), dtype=object)
+    column[:] = values
+    return column
+
+
+def _varies(value: Any) -> bool:
+    return isinstance(value, (np.ndarray, dict))
+
+
+def _item(value: Any, index: int) -> Any:
+    """Значение index-го варианта как обычный объект Python."""
+    if isinstance(value, list):
+        return value[index]
+    if isinstance(value, np.ndarray):
+        value = value[index]
+        if isinstance(value, np.generic):
+            return value.item()
+    return value
+
+
+def _tolists(tree: Dict[str, Any]) -> Dict[str, Any]:
+    """Копия дерева, в которой столбцы - списки значений Python."""
+    result = {}
+    stack = [(tree, result)]
+    while stack:
+        source, target = stack.pop()
+        for key, value in source.items():
+            if isinstance(value, dict):
+                target[key] = {}
+                stack.append((value, target[key]))
+            elif isinstance(value, np.ndarray):
+                target[key] = value.tolist()
+            else:
+                target[key] = value
+    return result
+
+
+def _variant(tree: Dict[str, Any], index: int) -> Dict[str, Any]:
+    result = {}
+    stack = [(tree, result)]
+    while stack:
+        source, target = stack.pop()
+        for key, value in source.items():
+            if isinstance(value, dict):
+                target[key] = {}
+                stack.append((value, target[key]))
+            else:
+                target[key] = _item(value, index)
+    return result
+
+
+def _operand(value: Any):
+    """(значение для NumPy, 'i' или 'f') или None для поэлементного пути."""
+    if isinstance(value, np.ndarray):
+        kind = value.dtype.kind
+        if kind == 'b':
+            # В Python True + True == 2, а в NumPy - логическое «или»
+            return value.astype(np.int64), 'i'
+        if kind == 'i' or kind == 'f':
+            return value, kind
+        return None
+    if isinstance(value, int):
+        if _INT64_MIN <= value <= _INT64_MAX:
+            return int(value), 'i'
+        return None
+    if isinstance(value, float):
+        return value, 'f'
+    return None
+
+
+def _apply(func, a: Any, b: Any) -> Any:
+    """Операция над скалярами и столбцами с семантикой OPERATORS."""
+    if not isinstance(a, np.ndarray) and not isinstance(b, np.ndarray):
+        return func(a, b)
+
+    left, right = _operand(a), _operand(b)
+    result = None
+    if left is not None and right is not None:
+        result = _numeric(func, *left, *right)
+    if result is None:
+        # Строки, большие целые и смешанные типы - функция Python
+        # для каждого элемента
+        result = np.frompyfunc(func, 2, 1)(_objects(a), _objects(b))
+    return result
+
+
+def _numeric(func, a, a_kind: str, b, b_kind: str):
+    """Результат NumPy или None, если он разошёлся бы с Python."""
+    ints = a_kind == 'i' and b_kind == 'i'
+    if func is _divide or func is _modulo:
+        zero = np.equal(b, 0)
+        if not ints:
+            # Деление на ноль даёт целый 0 среди дробных результатов
+            if np.any(zero):
+                return None
+            return np.true_divide(a, b) if func is _divide else np.mod(a, b)
+        if func is _divide and np.any(np.equal(a, _INT64_MIN) & np.equal(b, -1)):
+            return None
+        divisor = np.where(zero, 1, b)
+        result = np.floor_divide(a, divisor) if func is _divide else np.mod(a, divisor)
+        return np.where(zero, 0, result)
+
+    result = func(np.asarray(a), np.asarray(b))
+    if ints:
+        estimate = func(np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64))
+        if np.any(np.abs(estimate) >= _INT64_SAFE):
+            return None
+    return result
+
+
+def _objects(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return value.astype(object)
+    column = np.empty((), dtype=object)
+    column[()] = value
+    return column
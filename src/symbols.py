@@ -0,0 +1,83 @@
+"""
+Таблица имён с вложенными областями видимости для вычислителя.
+"""
+from typing import Any, Dict, List, Mapping
+
+_MISSING = object()
+
+
+class SymbolTable:
+    """
+    Области видимости по схеме shallow binding: для каждого имени хранится
+    стек значений из вложенных областей, вершина стека - видимое значение.
+    Поиск имени не зависит ни от размера конфигурации, ни от глубины
+    вложенности; выход из области снимает только её собственные имена.
+    """
+    def __init__(self):
+        self.bindings: Dict[str, List[Any]] = {}
+        # Имена, определённые в каждой открытой области
+        self.frames: List[Dict[str, None]] = [{}]
+
+    @property
+    def depth(self) -> int:
+        return len(self.frames) - 1
+
+    def push_scope(self):
+        self.frames.append({})
+
+    def pop_scope(self):
+        if len(self.frames) == 1:
+            raise RuntimeError('Нельзя закрыть глобальную область видимости')
+        for name in self.frames.pop():
+            stack = self.bindings[name]
+            stack.pop()
+            if not stack:
+                del self.bindings[name]
+
+    def define(self, name: str, value: Any):
+        """Определяет (или переопределяет) имя в текущей области."""
+        frame = self.frames[-1]
+        if name in frame:
+            self.bindings[name][-1] = value
+        else:
+            frame[name] = None
+            self.bindings.setdefault(name, []).append(value)
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """
+        Возвращает видимое значение имени. Составное имя вида server.port
+        разрешается по первой части, остальные части - ключи вложенных блоков.
+        """
+        stack = self.bindings.get(name)
+        if stack is not None:
+            return stack[-1]
+        if '.' not in name:
+            return default
+
+        head, *parts = name.split('.')
+        stack = self.bindings.get(head)
+        if stack is None:
+            return default
+        value = stack[-1]
+        for part in parts:
+            if not isinstance(value, Mapping) or part not in value:
+                return default
+            value = value[part]
+        return value
+
+    def __getitem__(self, name: str) -> Any:
+        value = self.get(name, _MISSING)
+        if value is _MISSING:
+            raise KeyError(name)
+        return value
+
+    def __contains__(self, name: str) -> bool:
+        try:
+            self[name]
+        except KeyError:
+            return False
+        return True
+
+    def visible(self) -> Dict[str, Any]:
+        """Снимок всех видимых сейчас имён."""
+        return {name: stack[-1] for name, stack in self.bindings.items()}
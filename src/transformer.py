@@ -1,60 +1,145 @@
 """
 Преобразователь AST в Python-словарь.
 """
-import tomlkit
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterable, List, Optional, Set, TextIO
+from .interning import Interner
 from .parser import ASTNode, AssignmentNode, BlockNode, ValueNode, ExpressionNode
-from .evaluator import Evaluator
+from .evaluator import Evaluator, compile_expression
 
 class ConfigTransformer:
-    def __init__(self):
+    def __init__(self, interner: Optional[Interner] = None):
         self.evaluator = Evaluator()
+        # С Interner вычисленные блоки становятся общими FrozenDict, а
+        # ключи и короткие строки интернируются
+        self.interner = interner
     
-    def ast_to_dict(self, nodes: List[ASTNode]) -> Dict[str, Any]:
+    def ast_to_dict(self, nodes: Iterable[ASTNode]) -> Dict[str, Any]:
+        """
+        Вычисляет инструкции по порядку. Вложенные блоки обходятся через
+        явный стек (итератор содержимого, словарь, ключ), без рекурсии.
+        """
         result = {}
+        stack = [(iter(nodes), result, None)]
+        try:
+            while stack:
+                pending, target, key = stack[-1]
+                node = next(pending, None)
+                
+                if node is None:
+                    stack.pop()
+                    if stack:
+                        # Блок закончился: закрываем его область видимости
+                        self.evaluator.pop_scope()
+                        if self.interner is not None:
+                            target = self.interner.block(target)
+                        stack[-1][1][key] = target
+                        # Для evaluator сохраняем как namespace: server.port
+                        self.evaluator.set_variable(key, target)
+                    continue
+                
+                block = _block_of(node)
+                if block is not None:
+                    self.evaluator.push_scope()
+                    stack.append((iter(block.assignments), {}, node.key))
+                elif isinstance(node, AssignmentNode):
+                    value = self.node_to_value(node.value)
+                    target[node.key] = value
+                    # Сохраняем для evaluator
+                    self.evaluator.set_variable(node.key, value)
+        finally:
+            # При ошибке закрываем области ещё открытых блоков
+            for _ in range(len(stack) - 1):
+                self.evaluator.pop_scope()
         
-        for node in nodes:
-            if isinstance(node, AssignmentNode):
-                value = self.node_to_value(node.value)
-                result[node.key] = value
-                # Сохраняем для evaluator
-                self.evaluator.set_variable(node.key, value)
-            
-            elif isinstance(node, BlockNode):
-                block_dict = self.ast_to_dict(node.assignments)
-                result[node.key] = block_dict
-                # Для evaluator сохраняем как namespace
-                self.evaluator.set_variable(node.key, block_dict)
-        
+        if self.interner is not None:
+            return self.interner.root(result)
         return result
     
+    def block_to_dict(self, node: BlockNode) -> Dict[str, Any]:
+        """Вычисляет блок в собственной области видимости."""
+        self.evaluator.push_scope()
+        try:
+            return self.ast_to_dict(node.assignments)
+        finally:
+            self.evaluator.pop_scope()
+    
     def node_to_value(self, node: ASTNode) -> Any:
         if isinstance(node, ValueNode):
             return node.value
         elif isinstance(node, ExpressionNode):
             # Пробуем вычислить выражение
             try:
+                if node.compiled is not None:
+                    return self.evaluator.evaluate_compiled(node.compiled)
                 return self.evaluator.evaluate_expression(node.expression)
             except:
                 # Если не получилось, возвращаем как строку
                 return f"${{{node.expression}}}"  # Делаем более читаемым
         elif isinstance(node, BlockNode):
-            return self.ast_to_dict(node.assignments)
+            return self.block_to_dict(node)
         
         return str(node)
     
     def to_toml(self, config_dict: Dict[str, Any]) -> str:
         """Преобразует словарь в TOML строку."""
+        import tomlkit  # нужен только здесь, импорт заметно удлиняет запуск
         doc = tomlkit.document()
         
-        def add_to_doc(data, doc_part):
-            for key, value in data.items():
-                if isinstance(value, dict):
-                    table = tomlkit.table()
-                    add_to_doc(value, table)
-                    doc_part[key] = table
-                else:
-                    doc_part[key] = value
+        # Таблица присоединяется к родителю после заполнения, как и раньше,
+        # но обход идёт по явному стеку
+        stack = [(iter(config_dict.items()), doc, None, None)]
+        while stack:
+            items, doc_part, parent, key = stack[-1]
+            item = next(items, None)
+            if item is None:
+                stack.pop()
+                if parent is not None:
+                    parent[key] = doc_part
+                continue
+            
+            child_key, value = item
+            if isinstance(value, dict):
+                stack.append((iter(value.items()), tomlkit.table(), doc_part, child_key))
+            else:
+                doc_part[child_key] = value
         
-        add_to_doc(config_dict, doc)
-        return tomlkit.dumps(doc)
\ No newline at end of file
+        return tomlkit.dumps(doc)
+    
+    def write_toml(self, config_dict: Dict[str, Any], stream: TextIO):
+        """Пишет словарь в поток как TOML напрямую, без документа tomlkit."""
+        from .emitter import write_toml
+        write_toml(config_dict, stream)
+
+
+def evaluate_statement(node: ASTNode, config: Dict[str, Any], names) -> Any:
+    """Вычисляет инструкцию, видя из верхнего уровня только её внешние имена."""
+    transformer = ConfigTransformer()
+    for name in names:
+        if name in config:
+            transformer.evaluator.set_variable(name, config[name])
+    return transformer.ast_to_dict([node])[node.key]
+
+
+def free_names(node: ASTNode) -> Set[str]:
+    """Первые части всех имён из выражений инструкции (с запасом)."""
+    names = set()
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, BlockNode):
+            stack.extend(current.assignments)
+        elif isinstance(current, AssignmentNode):
+            stack.append(current.value)
+        elif isinstance(current, ExpressionNode):
+            for name in compile_expression(current.expression).names:
+                names.add(name.split('.', 1)[0])
+    return names
+
+
+def _block_of(node: ASTNode):
+    """BlockNode для блока или присваивания блока, иначе None."""
+    if isinstance(node, BlockNode):
+        return node
+    if isinstance(node, AssignmentNode) and isinstance(node.value, BlockNode):
+        return node.value
+    return None
@@ -0,0 +1,116 @@
+"""
+Скомпилированная конфигурация: разбор и анализ зависимостей один раз,
+затем сколько угодно вычислений с разными значениями констант.
+"""
+import io
+import os
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+from .emitter import write_toml
+from .graph import Definition, DependencyGraph
+from .lexer import Lexer
+from .modules import resolve_includes
+from .parser import Parser
+
+
+class Translator:
+    """
+    Шаблон конфигурации, готовый к многократному вычислению.
+
+    При создании текст разбирается, строится DependencyGraph (с той же
+    видимостью имён, что у последовательного вычисления) и один раз
+    вычисляются все ключи. render(overrides) заменяет значения
+    присваиваний с указанными путями, как apply_overrides, и заново
+    вычисляет только ключи, зависящие от них, в топологическом порядке;
+    остальные значения берутся из базового вычисления.
+
+    После создания объект не меняется: каждый вызов хранит свои значения
+    в собственном словаре, поэтому один Translator можно вызывать из
+    нескольких потоков без блокировок. Блоки, не затронутые заменой,
+    в результатах разных вызовов - общие объекты; менять результат нельзя.
+    """
+
+    def __init__(self, source: str, path: Optional[str] = None):
+        ast = Parser(Lexer(source).tokenize()).parse()
+        self.graph = DependencyGraph(resolve_includes(ast, path), forward_references=False)
+
+        # Путь -> все присваивания значения с этим путём (не блоки)
+        self._constants: Dict[str, List[Definition]] = {}
+        definitions = [self.graph.root]
+        stack = [self.graph.root]
+        while stack:
+            for definition in stack.pop().members:
+                definitions.append(definition)
+                if definition.is_block:
+                    stack.append(definition)
+                else:
+                    self._constants.setdefault(definition.path, []).append(definition)
+
+        # Порядок нужен для всех определений, в том числе переопределённых
+        # позже, которых нет среди зависимостей корня
+        order = self.graph.order(definitions)
+        self._position: Dict[Definition, int] = {d: index for index, d in enumerate(order)}
+        self._base: Dict[Definition, Any] = {}
+        self._dependents: Dict[Definition, List[Definition]] = {}
+        for definition in order:
+            self._base[definition] = self.graph.compute(definition, self._base)
+            for dep in definition.deps:
+                self._dependents.setdefault(dep, []).append(definition)
+
+    @classmethod
+    def from_file(cls, input_path) -> 'Translator':
+        path = os.fspath(input_path)
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(f.read(), path)
+
+    def render(self, overrides: Optional[Mapping[str, Any]] = None) -> Dict[str, Any]:
+        """Словарь конфигурации, как у ConfigTransformer, с заменёнными константами."""
+        memo = _Overlay(self._base)
+        replaced = []
+        for path, value in (overrides or {}).items():
+            for definition in self._definitions(path):
+                memo[definition] = value
+                replaced.append(definition)
+
+        for definition in self._affected(replaced):
+            if definition not in memo:
+                memo[definition] = self.graph.compute(definition, memo)
+        return memo[self.graph.root]
+
+    def render_toml(self, overrides: Optional[Mapping[str, Any]] = None) -> str:
+        buffer = io.StringIO()
+        write_toml(self.render(overrides), buffer)
+        return buffer.getvalue()
+
+    def affected(self, paths: Iterable[str]) -> List[str]:
+        """Ключи, которые render пересчитывает при замене paths, в порядке вычисления."""
+        replaced = {d for path in paths for d in self._definitions(path)}
+        return [d.path for d in self._affected(replaced)
+                if d is not self.graph.root and d not in replaced]
+
+    def _definitions(self, path: str) -> List[Definition]:
+        try:
+            return self._constants[path]
+        except KeyError:
+            raise ValueError(f"В конфигурации нет констант: {path}") from None
+
+    def _affected(self, replaced: List[Definition]) -> List[Definition]:
+        seen = set(replaced)
+        stack = list(replaced)
+        while stack:
+            for dependent in self._dependents.get(stack.pop(), ()):
+                if dependent not in seen:
+                    seen.add(dependent)
+                    stack.append(dependent)
+        return sorted(seen, key=self._position.__getitem__)
+
+
+class _Overlay(dict):
+    """Значения одного вызова render поверх общего базового вычисления."""
+    __slots__ = ('base',)
+
+    def __init__(self, base: Dict[Definition, Any]):
+        super().__init__()
+        self.base = base
+
+    def __missing__(self, definition: Definition) -> Any:
+        return self.base[definition]
@@ -0,0 +1,339 @@
+"""
+Режим наблюдения: повторная трансляция изменённых файлов, при которой
+заново разбираются и вычисляются только затронутые инструкции.
+"""
+import os
+import sys
+import time
+from bisect import bisect_left, bisect_right
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from .lexer import Lexer, iter_statement_spans
+from .modules import resolve_includes
+from .parser import ASTNode, BlockNode, IncludeNode, Parser
+from .pipeline import write_output
+from .transformer import ConfigTransformer, evaluate_statement, free_names
+
+
+_MISSING = object()
+
+
+class UpdateReport:
+    """Итог одного обновления: сколько участков разобрано и инструкций вычислено."""
+    def __init__(self, seconds: float, chunks: int, reparsed: int, statements: int, evaluated: int):
+        self.seconds = seconds
+        self.chunks = chunks
+        self.reparsed = reparsed
+        self.statements = statements
+        self.evaluated = evaluated
+
+    def __str__(self):
+        return (f"{self.seconds * 1000:.1f} мс (разобрано участков: {self.reparsed}/{self.chunks}, "
+                f"вычислено инструкций: {self.evaluated}/{self.statements})")
+
+
+class _Statement:
+    """Инструкция верхнего уровня с её внешними именами и последним значением."""
+    __slots__ = ('node', 'names', 'value', 'includes')
+
+    def __init__(self, node: ASTNode):
+        self.node = node
+        self.names = frozenset(free_names(node))
+        self.value = None
+        self.includes = _has_include(node)
+
+
+class IncrementalTranslator:
+    """
+    Хранит разбор предыдущей версии текста по участкам верхнего уровня
+    (split_statements). При обновлении текст сравнивается с предыдущим:
+    участки до первого различия остаются как есть, участки после него
+    сдвигаются, как только граница в новом тексте совпадёт со старой.
+    Заново разбираются только участки между ними. Инструкция вычисляется
+    заново, если она новая или ссылается на имя, значение которого
+    изменилось; семантика совпадает с последовательным ConfigTransformer.
+    Если в тексте есть include, вычисляется всё заново: подключённые файлы
+    меняются независимо от текста (разбор участков всё равно переиспользуется).
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path                   # файл, от каталога которого ищутся include
+        self.source = ''
+        self.ends: List[int] = []          # конец каждого участка; участки идут подряд
+        self.counts: List[int] = []        # число инструкций в участке
+        self.statements: List[_Statement] = []
+        self.config: Dict[str, Any] = {}
+        self.included: List[str] = []      # файлы, подключённые при последнем обновлении
+
+    def update(self, source: str) -> UpdateReport:
+        start_time = time.perf_counter()
+        old, old_ends = self.source, self.ends
+        if old_ends and source == old and not self.included:
+            return UpdateReport(time.perf_counter() - start_time, len(old_ends), 0,
+                                len(self.statements), 0)
+
+        prefix = _common_prefix(old, source)
+        suffix = _common_suffix(old, source, min(len(old), len(source)) - prefix)
+        delta = len(source) - len(old)
+
+        # Участки, целиком лежащие до первого различия; последний участок
+        # может не заканчиваться границей, поэтому его всегда разбираем заново
+        keep = min(bisect_right(old_ends, prefix), max(len(old_ends) - 1, 0))
+        rescan_from = old_ends[keep - 1] if keep else 0
+
+        spans = []
+        resume = len(old_ends)
+        for span in iter_statement_spans(source, rescan_from):
+            spans.append(span)
+            end = span[1]
+            if end >= len(source) - suffix:
+                index = bisect_left(old_ends, end - delta, keep)
+                if index < len(old_ends) and old_ends[index] == end - delta:
+                    resume = index + 1
+                    break
+
+        head = sum(self.counts[:keep])
+        tail = head + sum(self.counts[keep:resume])
+
+        # Разбор изменившихся участков; совпавшие по тексту берутся из старых
+        known = {}
+        position = head
+        for index in range(keep, resume):
+            chunk_start = old_ends[index - 1] if index else 0
+            count = self.counts[index]
+            known[old[chunk_start:old_ends[index]]] = self.statements[position:position + count]
+            position += count
+
+        middle = []
+        counts = []
+        line = source.count('\n', 0, rescan_from) + 1
+        position = rescan_from
+        reparsed = 0
+        for span_start, span_end in spans:
+            line += source.count('\n', position, span_start)
+            position = span_start
+            text = source[span_start:span_end]
+            if text in known:
+                nodes = [statement.node for statement in known[text]]
+            else:
+                # Участок обычно начинается посреди строки, сразу после ';'
+                column = span_start - source.rfind('\n', 0, span_start)
+                nodes = Parser(Lexer(text, line=line, column=column).tokenize()).parse()
+                reparsed += 1
+            middle.extend(_Statement(node) for node in nodes)
+            counts.append(len(nodes))
+
+        statements = self.statements[:head] + middle + self.statements[tail:]
+        if any(statement.includes for statement in statements):
+            included = []
+            nodes = resolve_includes([statement.node for statement in statements], self.path,
+                                     included=included)
+            config = ConfigTransformer().ast_to_dict(nodes)
+            evaluated = len(statements)
+        else:
+            included = config = None
+            if self.included or any(statement.includes for statement in self.statements):
+                # После полного вычисления значения инструкций не сохранены
+                evaluated = _evaluate(statements, 0, len(statements), {}, set())
+            else:
+                # Значения имён на границе с неизменным хвостом в прошлый раз
+                previous = {statement.node.key: statement.value for statement in self.statements[:tail]}
+                changed = {statement.node.key for statement in self.statements[head:tail]}
+                evaluated = _evaluate(statements, head, head + len(middle), previous, changed)
+
+        self.source = source
+        self.ends = (old_ends[:keep] + [end for _, end in spans] +
+                     [end + delta for end in old_ends[resume:]])
+        self.counts = self.counts[:keep] + counts + self.counts[resume:]
+        self.statements = statements
+        self.included = included or []
+        if config is None:
+            config = {statement.node.key: statement.value for statement in statements}
+        self.config = config
+        return UpdateReport(time.perf_counter() - start_time, len(self.ends), reparsed,
+                            len(statements), evaluated)
+
+
+def _evaluate(statements: List[_Statement], start: int, stop: int,
+              previous: Dict[str, Any], changed: Set[str]) -> int:
+    """
+    Вычисляет инструкции [start, stop) и те последующие, что зависят от
+    изменившихся имён; до start значения берутся из прошлого обновления.
+    previous - значения имён после stop в прошлый раз, changed - ключи
+    заменённых инструкций.
+    """
+    config = {statement.node.key: statement.value for statement in statements[:start]}
+    evaluated = 0
+    for statement in statements[start:stop]:
+        statement.value = evaluate_statement(statement.node, config, statement.names)
+        config[statement.node.key] = statement.value
+        changed.add(statement.node.key)
+        evaluated += 1
+
+    dirty = {key for key in changed
+             if not _same_value(config.get(key, _MISSING), previous.get(key, _MISSING))}
+
+    # Когда изменившихся имён не осталось, дальше всё совпадает с прошлым разом
+    index = stop
+    while dirty and index < len(statements):
+        statement = statements[index]
+        key = statement.node.key
+        if not statement.names.isdisjoint(dirty):
+            previous = statement.value
+            statement.value = evaluate_statement(statement.node, config, statement.names)
+            evaluated += 1
+            if _same_value(statement.value, previous):
+                dirty.discard(key)
+            else:
+                dirty.add(key)
+        else:
+            dirty.discard(key)
+        config[key] = statement.value
+        index += 1
+    return evaluated
+
+
+def _same_value(a: Any, b: Any) -> bool:
+    """
+    Равенство с учётом типов, в том числе во вложенных словарях: для
+    зависимых выражений 1, 1.0 и True - разные значения.
+    """
+    stack = [(a, b)]
+    while stack:
+        a, b = stack.pop()
+        if a is b:
+            continue
+        if type(a) is not type(b):
+            return False
+        if isinstance(a, dict):
+            if list(a) != list(b):
+                return False
+            stack.extend((a[key], b[key]) for key in a)
+        elif a != b:
+            return False
+    return True
+
+
+def _common_prefix(a: str, b: str, step: int = 1 << 16) -> int:
+    """Длина общего начала строк: сравнение блоками, затем двоичный поиск в блоке."""
+    limit = min(len(a), len(b))
+    low = 0
+    while low < limit:
+        high = min(low + step, limit)
+        if a[low:high] != b[low:high]:
+            break
+        low = high
+    else:
+        return limit
+
+    while high - low > 1:
+        middle = (low + high) // 2
+        if a[low:middle] == b[low:middle]:
+            low = middle
+        else:
+            high = middle
+    return low
+
+
+def _common_suffix(a: str, b: str, limit: int, step: int = 1 << 16) -> int:
+    """Длина общего конца строк, не больше limit."""
+    length = 0
+    while length < limit:
+        next_length = min(length + step, limit)
+        if a[len(a) - next_length:len(a) - length] != b[len(b) - next_length:len(b) - length]:
+            break
+        length = next_length
+    else:
+        return limit
+
+    while next_length - length > 1:
+        middle = (length + next_length) // 2
+        if a[len(a) - middle:len(a) - length] == b[len(b) - middle:len(b) - length]:
+            length = middle
+        else:
+            next_length = middle
+    return length
+
+
+def _has_include(node: ASTNode) -> bool:
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, IncludeNode):
+            return True
+        if isinstance(current, BlockNode):
+            stack.extend(current.assignments)
+    return False
+
+
+class Watcher:
+    """
+    Опрашивает входные файлы по mtime и размеру (без внешних служб) и при
+    изменении пересобирает выход через IncrementalTranslator.
+    """
+
+    def __init__(self, collect: Callable[[], List[Tuple[str, str]]], interval: float = 0.5,
+                 on_update: Optional[Callable[[str, Optional[UpdateReport], Optional[Exception]], None]] = None,
+                 output_format: str = 'toml'):
+        self.collect = collect
+        self.output_format = output_format
+        self.interval = interval
+        self.on_update = on_update
+        self.translators: Dict[str, IncrementalTranslator] = {}
+        self.signatures: Dict[str, tuple] = {}
+
+    def poll(self) -> int:
+        """Проверяет файлы один раз; возвращает число обработанных изменений."""
+        changed = 0
+        for input_path, output_path in self.collect():
+            translator = self.translators.get(input_path)
+            own = _signature(input_path)
+            if own == (None,):
+                continue
+            # Изменение подключённого файла тоже пересобирает выход
+            included = translator.included if translator is not None else []
+            if self.signatures.get(input_path) == own + _signatures(included):
+                continue
+            changed += 1
+
+            if translator is None:
+                translator = self.translators[input_path] = IncrementalTranslator(input_path)
+            try:
+                with open(input_path, 'r', encoding='utf-8') as f:
+                    report = translator.update(f.read())
+                os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+                write_output(translator.config, output_path, self.output_format)
+                error = None
+            except Exception as e:
+                report, error = None, e
+            self.signatures[input_path] = own + _signatures(translator.included)
+            if self.on_update:
+                self.on_update(input_path, report, error)
+        return changed
+
+    def run(self):
+        try:
+            while True:
+                self.poll()
+                time.sleep(self.interval)
+        except KeyboardInterrupt:
+            pass
+
+
+def _signature(path: str) -> tuple:
+    """mtime и размер файла; для исчезнувшего подключённого файла - None."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return (None,)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _signatures(paths: List[str]) -> tuple:
+    return tuple(_signature(path) for path in paths)
+
+
+def print_update(input_path: str, report: Optional[UpdateReport], error: Optional[Exception]):
+    if error is not None:
+        print(f'❌ {input_path}: {error}', file=sys.stderr)
+    else:
+        print(f'🔄 {input_path}: {report}')
@@ -0,0 +1,49 @@
+import pytest
+from src.batch import collect_inputs, run_batch
+
+def make_tree(root):
+    (root / 'tenants' / 'eu').mkdir(parents=True)
+    (root / 'tenants' / 'a.cfg').write_text('port = 8080;', encoding='utf-8')
+    (root / 'tenants' / 'eu' / 'b.cfg').write_text('srv = @{ port = $1 2 +$; };', encoding='utf-8')
+    (root / 'tenants' / 'broken.cfg').write_text('name = [[oops', encoding='utf-8')
+    (root / 'tenants' / 'notes.txt').write_text('не конфигурация', encoding='utf-8')
+
+def test_batch_collect_inputs(tmp_path):
+    make_tree(tmp_path)
+    out = tmp_path / 'out'
+
+    pairs = collect_inputs([str(tmp_path / 'tenants')], str(out))
+    assert [(source[len(str(tmp_path)):], target[len(str(out)):]) for source, target in pairs] == [
+        ('/tenants/a.cfg', '/a.toml'),
+        ('/tenants/broken.cfg', '/broken.toml'),
+        ('/tenants/eu/b.cfg', '/eu/b.toml'),
+    ]
+
+    pairs = collect_inputs([str(tmp_path / 'tenants' / '**' / 'b.cfg')], str(out))
+    assert pairs == [(str(tmp_path / 'tenants' / 'eu' / 'b.cfg'), str(out / 'eu' / 'b.toml'))]
+
+def test_batch_errors_do_not_abort(tmp_path):
+    make_tree(tmp_path)
+    pairs = collect_inputs([str(tmp_path / 'tenants')], str(tmp_path / 'out'))
+
+    results = run_batch(pairs, jobs=2)
+
+    assert [result.ok for result in results] == [True, False, True]
+    assert 'Незакрытая строка' in results[1].error
+    assert (tmp_path / 'out' / 'eu' / 'b.toml').read_text(encoding='utf-8') == '[srv]\nport = 3\n'
+
+def test_batch_duplicate_targets(tmp_path):
+    for tenant in ('a', 'b'):
+        (tmp_path / tenant).mkdir()
+        (tmp_path / tenant / 'config.cfg').write_text(f'name = [[{tenant}]];', encoding='utf-8')
+    out = tmp_path / 'out'
+
+    pairs = collect_inputs([str(tmp_path / '*' / 'config.cfg')], str(out))
+    assert [target for _, target in pairs] == [str(out / 'a' / 'config.toml'),
+                                               str(out / 'b' / 'config.toml')]
+
+    pairs = collect_inputs([str(tmp_path / 'a'), str(tmp_path / 'b')], str(out))
+    results = run_batch(pairs, jobs=2)
+    assert [result.ok for result in results] == [True, False]
+    assert 'уже занят' in results[1].error
+    assert (out / 'config.toml').read_text(encoding='utf-8') == 'name = "a"\n'
@@ -0,0 +1,36 @@
+import pytest
+from src.cache import TranslationCache
+from src.pipeline import translate_file
+
+def test_cache_roundtrip_and_stats(tmp_path):
+    cache = TranslationCache(tmp_path / 'cache', store_dicts=True)
+    key = cache.make_key(b'port = 1;', {'format': 'toml'})
+
+    assert key != cache.make_key(b'port = 2;', {'format': 'toml'})
+    assert key != cache.make_key(b'port = 1;', {'format': 'json'})
+    assert cache.get(key) is None
+
+    cache.put(key, 'port = 1\n', {'port': 1})
+    assert cache.get(key) == 'port = 1\n'
+    assert cache.get_dict(key) == {'port': 1}
+    assert cache.stats() == {'hits': 2, 'misses': 1, 'writes': 2, 'evictions': 0}
+    assert not list((tmp_path / 'cache').glob('*/.tmp-*'))
+
+def test_cache_eviction(tmp_path):
+    cache = TranslationCache(tmp_path, max_bytes=250)
+    keys = [cache.make_key(str(i).encode()) for i in range(5)]
+    for key in keys:
+        cache.put(key, 'x' * 100)
+
+    assert cache.evictions == 3
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[-1]) == 'x' * 100
+
+def test_cache_translate_file(tmp_path):
+    source = tmp_path / 'a.cfg'
+    source.write_text('port = $8000 80 +$;', encoding='utf-8')
+    cache = TranslationCache(tmp_path / 'cache')
+
+    assert translate_file(source, tmp_path / 'first.toml', cache=cache) is False
+    assert translate_file(source, tmp_path / 'second.toml', cache=cache) is True
+    assert (tmp_path / 'second.toml').read_text(encoding='utf-8') == 'port = 8080\n'
@@ -0,0 +1,64 @@
+import asyncio
+import pytest
+from src.client import request
+from src.daemon import TranslationServer, percentile
+
+def run_with_server(socket_path, scenario, **kwargs):
+    async def main():
+        server = TranslationServer(str(socket_path), **kwargs)
+        await server.start()
+        try:
+            return await scenario(server)
+        finally:
+            await server.close()
+    return asyncio.run(main())
+
+def call(payload_path, payload):
+    return asyncio.get_running_loop().run_in_executor(None, request, str(payload_path), payload)
+
+def test_daemon_translate_source_and_path(tmp_path):
+    socket_path = tmp_path / 'cfg.sock'
+    source = tmp_path / 'a.cfg'
+    source.write_text('base = 8000; port = $base 80 +$;', encoding='utf-8')
+
+    async def scenario(server):
+        by_source = await call(socket_path, {'op': 'translate', 'source': 'x = 1;', 'id': 7})
+        by_path = await call(socket_path, {'op': 'translate', 'path': str(source)})
+        broken = await call(socket_path, {'op': 'translate', 'source': 'x = [[1'})
+        return by_source, by_path, broken
+
+    by_source, by_path, broken = run_with_server(socket_path, scenario)
+    assert by_source == {'ok': True, 'toml': 'x = 1\n', 'id': 7}
+    assert by_path['toml'] == 'base = 8000\nport = 8080\n'
+    assert not broken['ok'] and 'Незакрытая строка' in broken['error']
+    assert not socket_path.exists()
+
+def test_daemon_concurrency_and_stats(tmp_path):
+    socket_path = tmp_path / 'cfg.sock'
+
+    async def scenario(server):
+        payloads = [{'source': f'v = ${i} 2 *$;'} for i in range(20)]
+        responses = await asyncio.gather(*(call(socket_path, payload) for payload in payloads))
+        stats = await call(socket_path, {'op': 'stats'})
+        return responses, stats
+
+    responses, stats = run_with_server(socket_path, scenario, max_concurrency=2)
+    assert [response['toml'] for response in responses] == [f'v = {i * 2}\n' for i in range(20)]
+    stats = stats['stats']
+    assert stats['requests'] == 20 and stats['errors'] == 0 and stats['active'] == 0
+    assert stats['latency_ms']['p50'] <= stats['latency_ms']['p99'] <= stats['latency_ms']['max']
+
+def test_daemon_percentile():
+    values = [float(i) for i in range(1, 101)]
+    assert percentile(values, 0.5) == 50.0
+    assert percentile(values, 0.99) == 99.0
+    assert percentile([], 0.5) == 0.0
+
+def test_daemon_client_without_server(tmp_path, monkeypatch, capsys):
+    from src.cli import main
+    monkeypatch.setattr('sys.argv', ['cli.py', '--connect', str(tmp_path / 'none.sock'), '--stats'])
+
+    with pytest.raises(SystemExit) as exit_info:
+        main()
+    assert exit_info.value.code == 1
+    assert 'недоступен' in capsys.readouterr().err
@@ -0,0 +1,34 @@
+import io
+import json
+from src.emitter import write_json
+from src.pipeline import read_config
+
+
+def test_json_emitter_matches_json_dumps():
+    configs = [
+        read_config('examples/game_settings.cfg'),
+        {},
+        {'empty': {}, 'nested': {'inner': {}}, 'after': 1},
+        {'text': 'Игра "Epic"\n\t\\2\x01', 'flag': True, 'off': False, 'zero': -0.0,
+         'big': 10 ** 30, 'nan': float('nan'), 'inf': float('-inf')},
+    ]
+    for config in configs:
+        stream = io.StringIO()
+        write_json(config, stream)
+        assert stream.getvalue() == json.dumps(config, ensure_ascii=False, indent=2) + '\n'
+
+
+def test_json_emitter_deep_nesting_without_recursion():
+    config = {}
+    table = config
+    for _ in range(5000):
+        table['k'] = {}
+        table = table['k']
+    table['value'] = 1
+
+    stream = io.StringIO()
+    write_json(config, stream)
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 1 + 5000 + 1 + 5001
+    assert lines[5001] == '  ' * 5001 + '"value": 1'
+    assert lines[-1] == '}'
@@ -1,5 +1,6 @@
 import pytest
-from src.evaluator import Evaluator
+from src.evaluator import Evaluator, compile_expression
+from src.errors import EvaluatorError
 
 def test_evaluator_simple():
     evaluator = Evaluator()
@@ -15,4 +16,52 @@ def test_evaluator_variables():
     evaluator.set_variable('port', 8080)
     
     result = evaluator.evaluate_expression("port 1000 +")
-    assert result == 9080
\ No newline at end of file
+    assert result == 9080
+
+def test_evaluator_mod_and_integer_division():
+    evaluator = Evaluator()
+
+    assert evaluator.evaluate_expression("8080 443 mod") == 106
+    assert evaluator.evaluate_expression("8080 1000 /") == 8
+    assert evaluator.evaluate_expression("7.5 2 /") == 3.75
+    assert evaluator.evaluate_expression("5 0 /") == 0
+    assert evaluator.evaluate_expression("5 0 mod") == 0
+
+
+def test_evaluator_names_are_not_substituted_as_text():
+    evaluator = Evaluator()
+    evaluator.set_variable('port', 8080)
+    evaluator.set_variable('port_offset', 80)
+
+    assert evaluator.evaluate_expression("port port_offset +") == 8160
+    assert evaluator.evaluate_expression("port_offset") == 80
+
+
+def test_evaluator_stack_underflow():
+    evaluator = Evaluator()
+
+    with pytest.raises(EvaluatorError):
+        evaluator.evaluate_expression("1 +")
+
+
+def test_evaluator_compiled_expression_cache():
+    compile_expression.cache_clear()
+    evaluator = Evaluator()
+
+    for value in range(3):
+        evaluator.set_variable('x', value)
+        assert evaluator.evaluate_expression("x 2 *") == value * 2
+
+    info = Evaluator.cache_info()
+    assert info.misses == 1
+    assert info.hits == 2
+    assert compile_expression("x 2 *").names == ('x',)
+
+def test_evaluator_signed_literals():
+    from src.evaluator import OP_BINARY, OP_CONST
+    from src.pipeline import translate_source
+
+    result = translate_source('x = $-5$; y = $+3 2 +$; z = $-1.5$; w = $10 -2 -$;')
+    assert result == {'x': -5, 'y': 5, 'z': -1.5, 'w': 12}
+    assert type(result['x']) is int and type(result['z']) is float
+    assert [op for op, _ in compile_expression('-5 +3 -').code] == [OP_CONST, OP_CONST, OP_BINARY]
@@ -0,0 +1,46 @@
+import pytest
+from src.errors import DependencyCycleError
+from src.graph import DependencyGraph
+from src.lexer import Lexer
+from src.parser import Parser
+from src.transformer import ConfigTransformer
+
+def parse(source):
+    return Parser(Lexer(source).tokenize()).parse()
+
+def test_graph_matches_sequential_evaluation():
+    for name in ('app_config', 'game_settings'):
+        with open(f'examples/{name}.cfg', encoding='utf-8') as f:
+            ast = parse(f.read())
+        assert DependencyGraph(ast).to_dict() == ConfigTransformer().ast_to_dict(ast)
+
+def test_graph_lazy_evaluation():
+    graph = DependencyGraph(parse("""
+        base = 10;
+        unused = $base 2 *$;
+        server = @{ port = $base 8000 +$; other = $port 1 +$; };
+        db = @{ pool = $server.port 2 /$; };
+    """))
+
+    assert graph['db.pool'] == 4005
+    assert graph.evaluation_order(['db.pool']) == ['base', 'server.port', 'db.pool']
+    # Вычислены только нужные ключи
+    assert {d.path for d in graph._memo} == {'base', 'server.port', 'db.pool'}
+
+def test_graph_forward_references_and_cycles():
+    graph = DependencyGraph(parse("a = $b 1 +$; b = 2; x = $y$; y = $x$;"))
+
+    assert graph['a'] == 3
+    with pytest.raises(DependencyCycleError) as info:
+        graph['x']
+    assert info.value.cycle == ['x', 'y', 'x']
+
+def test_graph_order_and_compute():
+    graph = DependencyGraph(parse("base = 10; server = @{ port = $base 1 +$; };"))
+
+    order = graph.order([graph.definition('server')])
+    assert [d.path for d in order] == ['base', 'server.port', 'server']
+    values = {}
+    for definition in order:
+        values[definition] = graph.compute(definition, values)
+    assert values[graph.definition('server')] == {'port': 11}
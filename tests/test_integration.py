@@ -1,7 +1,13 @@
+import json
 import pytest
+import subprocess
 import tempfile
 import os
 from src.cli import main
+from src.formats import FORMATS, OUTPUT_FORMATS, register_format
+from src.packing import load_msgpack
+from src.pipeline import read_config
+from src.snapshot import load_snapshot
 import sys
 from io import StringIO
 
@@ -39,4 +45,120 @@ def test_integration_basic():
         # Удаляем временные файлы
         os.unlink(cfg_path)
         if os.path.exists(toml_path):
-            os.unlink(toml_path)
\ No newline at end of file
+            os.unlink(toml_path)
+
+def run_cli(*args):
+    old_argv = sys.argv
+    old_stdout = sys.stdout
+    sys.argv = ['cli.py', *args]
+    sys.stdout = StringIO()
+    try:
+        main()
+        return sys.stdout.getvalue()
+    finally:
+        sys.argv = old_argv
+        sys.stdout = old_stdout
+
+
+def test_integration_stream_matches_default(tmp_path):
+    default_out = tmp_path / 'default.toml'
+    stream_out = tmp_path / 'stream.toml'
+
+    run_cli('-i', 'examples/app_config.cfg', '-o', str(default_out))
+    run_cli('-i', 'examples/app_config.cfg', '-o', str(stream_out), '--stream')
+
+    assert stream_out.read_text(encoding='utf-8') == default_out.read_text(encoding='utf-8')
+
+
+def test_integration_mmap_matches_default(tmp_path):
+    for name in ('app_config', 'game_settings'):
+        path = f'examples/{name}.cfg'
+        assert read_config(path, mapped=True) == read_config(path)
+
+    default_out = tmp_path / 'default.toml'
+    mapped_out = tmp_path / 'mapped.toml'
+    run_cli('-i', 'examples/game_settings.cfg', '-o', str(default_out))
+    run_cli('-i', 'examples/game_settings.cfg', '-o', str(mapped_out), '--mmap')
+    assert mapped_out.read_text(encoding='utf-8') == default_out.read_text(encoding='utf-8')
+
+
+def test_integration_mmap_crlf_matches_default(tmp_path):
+    path = tmp_path / 'crlf.cfg'
+    path.write_bytes('text = [[первая\r\nвторая]];\r\nn = $2\r\n3 +$;\r\nbad = $n\r\nx +$;\r\n'.encode('utf-8'))
+
+    expected = read_config(path)
+    assert expected['text'] == 'первая\nвторая'
+    assert read_config(path, mapped=True) == expected
+
+
+def test_integration_batch_mode(tmp_path):
+    out_dir = tmp_path / 'out'
+
+    output = run_cli('--batch', 'examples', '--output-dir', str(out_dir), '--jobs', '2')
+
+    assert 'Итого файлов: 2, успешно: 2, с ошибками: 0' in output
+    assert (out_dir / 'app_config.toml').exists()
+    assert (out_dir / 'game_settings.toml').exists()
+
+
+def test_integration_cache_dir(tmp_path):
+    args = ['-i', 'examples/game_settings.cfg', '-o', str(tmp_path / 'game.toml'),
+            '--cache-dir', str(tmp_path / 'cache')]
+
+    assert 'из кэша' not in run_cli(*args)
+    assert 'из кэша' in run_cli(*args)
+    assert 'из кэша' not in run_cli(*args, '--no-cache')
+
+
+def test_integration_snapshot_format(tmp_path):
+    output = tmp_path / 'game.cfgsnap'
+
+    run_cli('-i', 'examples/game_settings.cfg', '-o', str(output), '--format', 'snapshot')
+
+    assert load_snapshot(output.read_bytes()).to_dict() == read_config('examples/game_settings.cfg')
+
+
+def test_integration_json_and_msgpack_formats(tmp_path):
+    config = read_config('examples/game_settings.cfg')
+
+    run_cli('-i', 'examples/game_settings.cfg', '-o', str(tmp_path / 'game.json'), '--format', 'json')
+    run_cli('-i', 'examples/game_settings.cfg', '-o', str(tmp_path / 'game.msgpack'), '--format', 'msgpack')
+
+    assert json.loads((tmp_path / 'game.json').read_text(encoding='utf-8')) == config
+    assert load_msgpack((tmp_path / 'game.msgpack').read_bytes()) == config
+
+
+def test_integration_registered_format(tmp_path, monkeypatch):
+    # monkeypatch удалит формат из обоих реестров после теста
+    monkeypatch.setitem(FORMATS, 'keys', None)
+    monkeypatch.setitem(OUTPUT_FORMATS, 'keys', None)
+    register_format('keys', '.txt', lambda config, stream: stream.write('\n'.join(config)))
+
+    run_cli('-i', 'examples/game_settings.cfg', '-o', str(tmp_path / 'keys.txt'), '--format', 'keys')
+
+    assert (tmp_path / 'keys.txt').read_text(encoding='utf-8').splitlines() == list(
+        read_config('examples/game_settings.cfg'))
+
+
+def test_integration_check_mode(tmp_path):
+    output = run_cli('-i', 'examples/app_config.cfg', '--check')
+    assert 'корректна' in output
+
+    broken = tmp_path / 'broken.cfg'
+    broken.write_text('a = $1 +$;', encoding='utf-8')
+    with pytest.raises(SystemExit):
+        run_cli('-i', str(broken), '--check')
+
+
+# Запуск --check (cli и конвейер без вывода) в миллисекундах
+def test_integration_startup_imports():
+    # Проверяется набор загруженных модулей, а не время: оно зависит от машины
+    heavy = ['tomlkit', 'numpy', 'src.cache', 'src.snapshot', 'src.emitter',
+             'asyncio', 'multiprocessing', 'concurrent', 'tempfile']
+    for module in ('src.cli', 'src.pipeline'):
+        code = f"import sys, {module}; print(','.join(sorted(sys.modules)))"
+        result = subprocess.run([sys.executable, '-c', code],
+                                capture_output=True, text=True, check=True)
+        loaded = set(result.stdout.strip().split(','))
+        assert module in loaded
+        assert not loaded & set(heavy), module
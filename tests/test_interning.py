@@ -0,0 +1,52 @@
+import pickle
+import pytest
+from src.interning import FrozenDict, Interner, deep_size
+from src.lexer import Lexer
+from src.parser import Parser
+from src.pipeline import read_config
+from src.transformer import ConfigTransformer
+
+COMMON = '''
+db = @{ engine = [[postgres]]; pool = 10; replica = @{ host = [[db2]]; port = 5432; }; };
+cache = @{ engine = [[redis]]; ttl = $60 60 *$; };
+'''
+
+
+def translate(source, interner=None):
+    return ConfigTransformer(interner).ast_to_dict(Parser(Lexer(source).tokenize()).parse())
+
+
+def test_interner_shares_identical_blocks():
+    interner = Interner()
+    first = translate(f'name = [[api]]; {COMMON}', interner)
+    second = translate(f'name = [[web]]; {COMMON}', interner)
+
+    assert first == translate(f'name = [[api]]; {COMMON}')
+    assert first['db'] is second['db'] and first['cache'] is second['cache']
+    assert isinstance(first['db'], FrozenDict) and type(first) is dict
+    key = next(k for k in second['db'] if k == 'engine')
+    assert key is next(k for k in first['db'] if k == 'engine')
+    assert interner.unique == 3
+
+    with pytest.raises(TypeError):
+        first['db']['pool'] = 11
+    assert pickle.loads(pickle.dumps(first)) == first
+
+
+def test_interner_distinguishes_value_types():
+    interner = Interner()
+    config = interner.freeze({'a': {'x': 1}, 'b': {'x': 1.0}, 'c': {'x': True},
+                              'd': {'x': 0.0}, 'e': {'x': -0.0}, 'f': {'x': 1}})
+
+    assert config['a'] is config['f']
+    assert len({id(block) for block in config.values()}) == 5
+    assert read_config('examples/app_config.cfg', interner=interner) == read_config('examples/app_config.cfg')
+
+
+def test_interner_saves_memory_across_corpus():
+    plain = [translate(f'port = {index}; {COMMON}') for index in range(50)]
+    interner = Interner()
+    shared = [translate(f'port = {index}; {COMMON}', interner) for index in range(50)]
+
+    assert shared == plain
+    assert deep_size(shared) * 3 < deep_size(plain)
@@ -0,0 +1,59 @@
+import os
+import pytest
+from src.lazy import INDEX_SUFFIX, LazyConfig
+from src.pipeline import translate_source
+
+
+def test_lazy_matches_full_translation():
+    for name in ('app_config', 'game_settings'):
+        with open(f'examples/{name}.cfg', encoding='utf-8') as f:
+            source = f.read()
+        expected = translate_source(source)
+        config = LazyConfig(source)
+        assert list(config) == list(expected)
+        for key in reversed(list(expected)):
+            assert config[key] == expected[key]
+
+
+def test_lazy_evaluates_only_what_is_needed():
+    source = ("base = 10;\nunused = @{ x = $base 1 +$; };\nbase = 20;\n"
+              "server = @{ port = $base 80 +$; ssl = @{ on = true; }; };\n"
+              "late = $server.port 1 +$; a = 1 b = 2;")
+    config = LazyConfig(source)
+
+    assert config['server']['port'] == 100
+    assert config.evaluated == 2
+    assert config.lookup('server.ssl.on') is True
+    assert config.lookup('late') == 101
+    assert config.evaluated == 3
+    assert config['b'] == 2
+    with pytest.raises(KeyError):
+        config.lookup('server.port.x')
+    assert config.to_dict() == translate_source(source)
+
+
+def test_lazy_index_persisted_next_to_source(tmp_path):
+    path = tmp_path / 'big.cfg'
+    path.write_text('a = 1;\nblock = @{ b = $a 1 +$; };\n', encoding='utf-8')
+
+    assert LazyConfig.open(path)['block'] == {'b': 2}
+    assert os.path.exists(str(path) + INDEX_SUFFIX)
+
+    reopened = LazyConfig.open(path)
+    assert reopened._source is None
+    assert reopened['block'] == {'b': 2}
+
+    # Изменённый файл не совпадает с индексом по размеру - индекс строится заново
+    path.write_text('a = 5;\nblock = @{ b = $a 1 +$; };\nc = 3;\n', encoding='utf-8')
+    assert LazyConfig.open(path).to_dict() == {'a': 5, 'block': {'b': 6}, 'c': 3}
+
+
+def test_lazy_include_index_not_persisted(tmp_path):
+    (tmp_path / 'shared.cfg').write_text('port = $base 1 +$;', encoding='utf-8')
+    path = tmp_path / 'main.cfg'
+    path.write_text('base = 1;\ninclude [[shared.cfg]];', encoding='utf-8')
+
+    config = LazyConfig.open(path)
+    assert config['port'] == 2
+    assert not config.persistable
+    assert not os.path.exists(str(path) + INDEX_SUFFIX)
@@ -1,5 +1,7 @@
 import pytest
-from src.lexer import Lexer
+import io
+from src.lexer import Lexer, MappedSource, tokenize_stream
+from src.errors import LexerError
 
 def test_lexer_basic():
     source = "name = [[test]];"
@@ -30,4 +32,84 @@ def test_lexer_comment():
     
     # Комментарий должен быть пропущен
     assert len(tokens) == 3
-    assert tokens[0].value == 'name'
\ No newline at end of file
+    assert tokens[0].value == 'name'
+
+def test_lexer_regex_matches_scan():
+    with open('examples/app_config.cfg', encoding='utf-8') as f:
+        source = f.read()
+    source += "\nnote = [[две\nстроки]]; total = $a\n b +$;\nflag = true; x = 1.5; }; ~ @{ };"
+
+    def stream(mode):
+        tokens = Lexer(source, mode=mode).tokenize()
+        return [(t.type, t.value, t.line, t.column) for t in tokens]
+
+    assert stream('regex') == stream('scan')
+
+    tail = stream('regex')[-12:]
+    line = tail[0][2]
+    assert tail[2] == ('EXPRESSION', 'a\n b +', line, 19)
+    assert tail[5] == ('BOOLEAN', 'true', line + 2, 8)
+    assert tail[-3:] == [
+        ('RBRACE', '};', line + 2, 23),
+        ('LBRACE', '@{', line + 2, 28),
+        ('RBRACE', '};', line + 2, 31),
+    ]
+
+
+def test_lexer_unterminated_string():
+    for mode in Lexer.MODES:
+        with pytest.raises(LexerError) as info:
+            Lexer("a = 1;\nb = [[oops", mode=mode).tokenize()
+        assert info.value.line == 2
+        assert info.value.column == 5
+
+
+def test_lexer_stream_chunk_boundaries():
+    with open('examples/game_settings.cfg', encoding='utf-8') as f:
+        source = f.read()
+    source += "\nnote = [[длинная\n]строка]]; expr = $a\nb +$; tail = 12345"
+    expected = [(t.type, t.value, t.line, t.column) for t in Lexer(source).tokenize()]
+
+    for chunk_size in (1, 2, 3, 7, 64, 1 << 16):
+        tokens = tokenize_stream(io.StringIO(source), chunk_size=chunk_size)
+        assert [(t.type, t.value, t.line, t.column) for t in tokens] == expected
+
+
+def test_lexer_compact_store_matches_tokens():
+    with open('examples/app_config.cfg', encoding='utf-8') as f:
+        source = f.read()
+    tokens = Lexer(source).tokenize()
+    store = Lexer(source).tokenize_compact()
+
+    assert len(store) == len(tokens)
+    assert [(t.type, t.value, t.line, t.column) for t in store] == \
+        [(t.type, t.value, t.line, t.column) for t in tokens]
+    assert store[-1].type == 'RBRACE'
+    assert store.types.itemsize == 1
+
+
+def test_lexer_mapped_bytes_match_text(tmp_path):
+    with open('examples/app_config.cfg', encoding='utf-8') as f:
+        source = f.read()
+    # Столбцы считаются в символах, а не в байтах UTF-8
+    source += "\n% комментарий\nимя = [[много\nбайт]]; ключ = $a 1 +$; «x» = 5٣; й = true;"
+    path = tmp_path / 'config.cfg'
+    path.write_bytes(source.encode('utf-8'))
+    expected = [(t.type, t.value, t.line, t.column) for t in Lexer(source).tokenize()]
+
+    with MappedSource(path) as mapped:
+        tokens = mapped.tokenize()
+        assert [(t.type, t.value, t.line, t.column) for t in tokens] == expected
+    assert expected[-1][1:] == ('true', expected[-1][2], 39)
+
+    (tmp_path / 'empty.cfg').write_bytes(b'')
+    with MappedSource(tmp_path / 'empty.cfg') as mapped:
+        assert len(mapped.tokenize()) == 0
+
+
+def test_lexer_mapped_error_column(tmp_path):
+    path = tmp_path / 'broken.cfg'
+    path.write_bytes('имя = 1;\nключ = [[oops'.encode('utf-8'))
+    with MappedSource(path) as mapped, pytest.raises(LexerError) as info:
+        mapped.tokenize()
+    assert (info.value.line, info.value.column) == (2, 8)
@@ -0,0 +1,88 @@
+import os
+import pytest
+from src.errors import IncludeError
+from src.lexer import Lexer
+from src.modules import ModuleCache, resolve_includes
+from src.parser import IncludeNode, Parser
+from src.pipeline import read_config, translate_file, translate_source
+from src.cache import TranslationCache
+
+
+def write(path, text):
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+
+def test_include_parsed_in_place_and_in_blocks(tmp_path):
+    (tmp_path / 'shared').mkdir()
+    write(tmp_path / 'shared' / 'db.cfg', 'database = @{ port = $base 1 +$; include [[pool.cfg]]; };')
+    write(tmp_path / 'shared' / 'pool.cfg', 'size = 8;')
+    main = write(tmp_path / 'main.cfg',
+                 'base = 5431;\ninclude [[shared/db.cfg]];\nserver = @{ include [[shared/pool.cfg]]; };')
+
+    ast = Parser(Lexer(open(main, encoding='utf-8').read()).tokenize()).parse()
+    assert isinstance(ast[1], IncludeNode) and ast[1].line == 2
+
+    included = []
+    assert read_config(main, included=included) == {
+        'base': 5431,
+        'database': {'port': 5432, 'size': 8},
+        'server': {'size': 8},
+    }
+    assert [os.path.basename(path) for path in included] == ['db.cfg', 'pool.cfg', 'pool.cfg']
+    assert read_config(main, stream=True) == read_config(main, mapped=True) == read_config(main)
+
+
+def test_include_cycle_and_missing_file(tmp_path):
+    write(tmp_path / 'a.cfg', 'x = 1; include [[b.cfg]];')
+    write(tmp_path / 'b.cfg', 'include [[a.cfg]];')
+    with pytest.raises(IncludeError, match=r'a\.cfg -> b\.cfg -> a\.cfg'):
+        read_config(tmp_path / 'a.cfg')
+
+    write(tmp_path / 'c.cfg', 'y = 2;\ninclude [[нет.cfg]];')
+    with pytest.raises(IncludeError, match='строка 2'):
+        read_config(tmp_path / 'c.cfg')
+
+
+def test_include_is_an_ordinary_key():
+    assert translate_source('include = 5;') == {'include': 5}
+    assert translate_source('include = 5; b = @{ include = $include 1 +$; };') == {
+        'include': 5, 'b': {'include': 6}}
+    assert translate_source('include = 5;', jobs=2) == {'include': 5}
+
+
+def test_module_cache_reuses_ast_until_file_changes(tmp_path):
+    shared = write(tmp_path / 'shared.cfg', 'value = 1;')
+    os.utime(shared, ns=(10 ** 9, 10 ** 9))
+    modules = ModuleCache()
+
+    first = modules.load(shared)
+    assert modules.load(shared) is first
+    assert modules.stats() == {'hits': 1, 'misses': 1, 'size': 1}
+
+    # Та же длина и тот же mtime заметны по содержимому только для свежих
+    # файлов; здесь mtime меняется явно
+    write(tmp_path / 'shared.cfg', 'value = 2;')
+    os.utime(shared, ns=(2 * 10 ** 9, 2 * 10 ** 9))
+    second = modules.load(shared)
+    assert second is not first and second[0].value.value == 2
+
+    # Новый mtime при том же содержимом: сверка по хэшу, без разбора
+    os.utime(shared, ns=(3 * 10 ** 9, 3 * 10 ** 9))
+    assert modules.load(shared) is second
+    assert modules.stats()['misses'] == 2
+
+    nodes = Parser(Lexer('include [[shared.cfg]]; after = 3;').tokenize()).parse()
+    config_nodes = list(resolve_includes(nodes, str(tmp_path / 'main.cfg'), modules))
+    assert [node.key for node in config_nodes] == ['value', 'after']
+
+
+def test_include_results_skip_disk_cache(tmp_path):
+    write(tmp_path / 'shared.cfg', 'value = 1;')
+    main = write(tmp_path / 'main.cfg', 'include [[shared.cfg]];')
+    cache = TranslationCache(tmp_path / 'cache')
+
+    assert translate_file(main, tmp_path / 'out.toml', cache=cache) is False
+    write(tmp_path / 'shared.cfg', 'value = 22;')
+    assert translate_file(main, tmp_path / 'out.toml', cache=cache) is False
+    assert (tmp_path / 'out.toml').read_text(encoding='utf-8') == 'value = 22\n'
@@ -0,0 +1,67 @@
+import pytest
+from src.errors import ExpressionError
+from src.evaluator import OP_BINARY, OP_CONST, OP_LOAD
+from src.lexer import Lexer
+from src.optimizer import Optimizer
+from src.parser import AssignmentNode, ExpressionNode, Parser, ValueNode
+from src.pipeline import translate_source
+from src.transformer import ConfigTransformer
+
+
+def parse(source):
+    return Parser(Lexer(source).tokenize()).parse()
+
+
+def test_optimizer_folds_constants_and_keeps_semantics():
+    source = ('w = "web"; a = 2; b = $a 3 *$; s = @{ a = 10; c = $a b +$; };\n'
+              't = $s.c 1 +$; u = $w 1 +$; e = $$; f = $7.5 2 / 5 0 mod +$;')
+    ast = parse(source)
+    optimizer = Optimizer()
+    optimized = optimizer.optimize(ast)
+
+    assert ConfigTransformer().ast_to_dict(optimized) == ConfigTransformer().ast_to_dict(ast)
+    assert all(isinstance(node.value, ValueNode) for node in optimized if node.key != 's')
+    assert optimized[2].value.value == 6
+    assert optimized[5].value.value == '${w 1 +}'
+    assert optimizer.folded == 6 and optimizer.dynamic == 0
+    # Исходный AST не меняется
+    assert isinstance(ast[2].value, ExpressionNode)
+
+
+def test_optimizer_inlines_into_dynamic_expressions():
+    ast = parse('a = 2; b = @{ x = $undefined 60 60 * * a +$; };')
+    optimizer = Optimizer()
+    node = optimizer.optimize(ast)[1].assignments[0].value
+
+    assert optimizer.dynamic == 1 and optimizer.inlined == 1
+    code = node.compiled.code
+    assert len(code) == 5
+    assert [(op, arg) for op, arg in code if op != OP_BINARY] == [
+        (OP_LOAD, 'undefined'), (OP_CONST, 3600), (OP_CONST, 2)]
+    assert translate_source('undefined = 1; a = 2; b = $undefined 60 60 * * a +$;')['b'] == 3602
+
+
+def test_malformed_programs_are_rejected_with_positions():
+    with pytest.raises(ExpressionError) as error:
+        parse('a = 1;\nb = $a\n  1 + +$;')
+    assert (error.value.line, error.value.column) == (3, 7)
+    assert "'+'" in str(error.value)
+
+    with pytest.raises(ExpressionError) as error:
+        translate_source('x = @{\n  y = $1 2$;\n};')
+    assert (error.value.line, error.value.column) == (2, 7)
+
+    for jobs in (None, 2):
+        with pytest.raises(ExpressionError):
+            translate_source('a = $1 +$;', jobs=jobs)
+    # Узлы, построенные не парсером, проверяет Optimizer
+    with pytest.raises(ExpressionError):
+        Optimizer().optimize([AssignmentNode('a', ExpressionNode('a 1 2 +'))])
+
+
+def test_optimizer_reports_unused_constants():
+    optimizer = Optimizer()
+    optimizer.optimize(parse('base = 1; base = 2; port = $base 80 +$; s = @{ p = $port$; };'))
+
+    assert optimizer.unused == ['base']
+    assert 'base' in optimizer.report()
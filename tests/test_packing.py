@@ -0,0 +1,32 @@
+import pytest
+from src.packing import dump_msgpack, load_msgpack, pack_int
+from src.pipeline import read_config
+
+
+def test_msgpack_roundtrip():
+    for name in ('app_config', 'game_settings'):
+        config = read_config(f'examples/{name}.cfg')
+        data = dump_msgpack(config)
+        assert load_msgpack(data) == config
+        assert list(load_msgpack(data)) == list(config)
+
+    config = {'s': 'ы' * 200, 'f': 1.5, 't': True, 'empty': {}, 'wide': {str(i): i for i in range(20)}}
+    assert load_msgpack(dump_msgpack(config)) == config
+
+
+def test_msgpack_encoding_is_standard():
+    assert dump_msgpack({'a': 1}) == b'\x81\xa1a\x01'
+    assert dump_msgpack({'b': {'c': True}}) == b'\x81\xa1b\x81\xa1c\xc3'
+    assert dump_msgpack({'x': 1.5}) == b'\x81\xa1x\xcb\x3f\xf8' + bytes(6)
+    assert pack_int(-32) == b'\xe0'
+    assert pack_int(200) == b'\xcc\xc8'
+    assert pack_int(-129) == b'\xd1\xff\x7f'
+    assert pack_int(2 ** 64 - 1) == b'\xcf' + b'\xff' * 8
+
+
+def test_msgpack_errors():
+    with pytest.raises(ValueError):
+        dump_msgpack({'huge': 2 ** 64})
+    for data in (b'\x81\xa1a', b'\x81\xa1a\x01\x00', b'\x01', b'\x81\x01\x01'):
+        with pytest.raises(ValueError):
+            load_msgpack(data)
@@ -0,0 +1,69 @@
+import pytest
+from benchmarks.generator import generate_config
+from src.errors import LexerError
+from src.lexer import Lexer
+from src.parallel import decode_nodes, encode_nodes, parse_parallel, split_chunks
+from src.parser import Parser
+from src.pipeline import translate_source
+
+
+def test_split_chunks_respects_strings_and_comments():
+    source = "a = [[x; y]];\n% c; @{\nb = $a 1 +$;\nблок = @{ c = 1; d = @{ e = 2; }; };\nf = 3;"
+    chunks = split_chunks(source, parts=100, min_chars=1)
+
+    assert [source[start:end].strip() for start, end, _, _ in chunks] == [
+        'a = [[x; y]];', '% c; @{\nb = $a 1 +$;',
+        'блок = @{ c = 1; d = @{ e = 2; }; };', 'f = 3;',
+    ]
+    assert chunks[0][0] == 0 and chunks[-1][1] == len(source)
+    assert [(line, column) for _, _, line, column in chunks] == [(1, 1), (1, 14), (3, 13), (4, 37)]
+
+
+def test_parse_parallel_matches_serial():
+    source = generate_config(3000, depth=3, seed=7)
+    expected = translate_source(source)
+
+    assert translate_source(source, jobs=3) == expected
+    ast = parse_parallel(source, jobs=2, min_chars=2000)
+    assert len(ast) == len(Parser(Lexer(source).tokenize()).parse())
+
+
+def test_parse_parallel_error_position():
+    source = 'a = 1;\n' * 5000 + 'b = [[незакрыто'
+    with pytest.raises(LexerError) as info:
+        parse_parallel(source, jobs=2, min_chars=1000)
+    assert (info.value.line, info.value.column) == (5001, 5)
+
+
+def test_parse_parallel_errors_match_serial():
+    failing = ['a = 1; ' * 2000 + 'x = @{ y = 1; ', 'a = 1;\n' * 3000 + 'e = $1 +$;']
+    for source in failing:
+        with pytest.raises(Exception) as serial:
+            Parser(Lexer(source).tokenize()).parse()
+        for jobs, min_chars in ((1, 1), (2, 1), (2, 1000)):
+            with pytest.raises(type(serial.value)) as parallel:
+                parse_parallel(source, jobs=jobs, min_chars=min_chars)
+            assert str(parallel.value) == str(serial.value)
+
+    # Parser читает `a = ;` как `a = b`, а отдельная часть `a = ;` не
+    # разбирается - результат не должен зависеть от границы частей
+    lenient = ['a = ; b = 1;', 'a; = 1;', 'a = 1;\n' * 3000 + 'b = ;\nc = 2;']
+    for source in lenient:
+        expected = repr(Parser(Lexer(source).tokenize()).parse())
+        for jobs, min_chars in ((1, 1), (2, 1), (2, 1000)):
+            assert repr(parse_parallel(source, jobs=jobs, min_chars=min_chars)) == expected
+
+
+def test_encode_nodes_deep_roundtrip():
+    depth = 5000
+    source = ''.join(f"b{i} = @{{ v = $x {i} +$; s = [[{i}]]; " for i in range(depth)) + '};' * depth
+    ast = Parser(Lexer(source).tokenize()).parse()
+    restored = []
+    decode_nodes(encode_nodes(ast), restored)
+
+    node = restored[0]
+    for i in range(depth - 1):
+        assert node.key == f'b{i}'
+        assert node.assignments[0].value.expression == f'x {i} +'
+        assert node.assignments[1].value.value == str(i)
+        node = node.assignments[2]
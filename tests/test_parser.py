@@ -23,4 +23,46 @@ def test_parser_block():
     assert len(ast) == 1
     assert ast[0].key == 'config'
     assert len(ast[0].assignments) == 1
-    assert ast[0].assignments[0].key == 'key'
\ No newline at end of file
+    assert ast[0].assignments[0].key == 'key'
+
+def test_parser_iter_parse_is_lazy():
+    source = "a = 1; b = @{ c = [[x]]; }; d = $a 1 +$;"
+    pulled = []
+
+    def tokens():
+        for token in Lexer(source).tokenize():
+            pulled.append(token)
+            yield token
+
+    statements = Parser(tokens()).iter_parse()
+    first = next(statements)
+    assert first.key == 'a'
+    # Для первой инструкции прочитано только окно просмотра, а не весь файл
+    assert len(pulled) <= 5
+    assert [node.key for node in statements] == ['b', 'd']
+
+
+def test_parser_consumes_token_store():
+    source = "config = @{ key = [[value]]; nested = @{ flag = true; }; }; n = 5;"
+    ast = Parser(Lexer(source).tokenize_compact()).parse()
+
+    assert [node.key for node in ast] == ['config', 'n']
+    assert ast[0].assignments[1].assignments[0].value.value is True
+    assert ast[1].value.value == 5
+
+def test_parser_deep_nesting_without_recursion():
+    depth = 10000
+    source = ''.join(f"b{i} = @{{ v{i} = {i}; " for i in range(depth)) + '};' * depth
+    ast = Parser(Lexer(source).tokenize()).parse()
+
+    node = ast[0]
+    for i in range(depth - 1):
+        assert node.key == f'b{i}'
+        assert node.assignments[0].value.value == i
+        node = node.assignments[1]
+    assert node.key == f'b{depth - 1}'
+
+def test_parser_unclosed_block_reports_eof():
+    tokens = Lexer("a = @{ b = @{ c = 1;").tokenize()
+    with pytest.raises(SyntaxError, match='EOF'):
+        Parser(tokens).parse()
@@ -0,0 +1,38 @@
+import json
+import pytest
+from src.pipeline import translate_file
+from src.profiling import NULL_STAGE, Profiler, count_nodes, stage
+from src.lexer import Lexer
+from src.parser import Parser
+
+def test_profiling_stages_and_callback(tmp_path):
+    seen = []
+    profiler = Profiler(on_stage=seen.append)
+    output = tmp_path / 'app.toml'
+
+    translate_file('examples/app_config.cfg', output, profiler=profiler)
+
+    assert [metrics.name for metrics in seen] == ['read', 'lex', 'parse', 'evaluate', 'emit']
+    counts = {metrics.name: metrics.counts for metrics in profiler.stages}
+    assert counts['lex']['tokens'] > 0
+    assert counts['parse']['expressions'] == 6
+    assert counts['emit']['bytes'] == output.stat().st_size
+    assert all(metrics.peak_bytes is not None for metrics in profiler.stages)
+
+    report = json.loads(profiler.to_json())
+    assert [item['name'] for item in report['stages']] == ['read', 'lex', 'parse', 'evaluate', 'emit']
+    assert 'итого' in profiler.format_table()
+
+def test_profiling_disabled_is_noop():
+    assert stage(None, 'lex') is NULL_STAGE
+    with stage(None, 'lex') as current:
+        current.count(tokens=1)
+
+    profiler = Profiler(memory=False)
+    with profiler.stage('lex'):
+        pass
+    assert profiler.stages[0].peak_bytes is None
+
+def test_profiling_count_nodes():
+    nodes = Parser(Lexer('a = 1; s = @{ b = $a 1 +$; c = @{ d = $b$; }; };').tokenize()).parse()
+    assert count_nodes(nodes) == (8, 2)
@@ -0,0 +1,36 @@
+import pytest
+from src.errors import SnapshotError
+from src.pipeline import read_config
+from src.snapshot import HEADER, SnapshotReader, SnapshotWriter, dump_snapshot, load_snapshot
+
+def test_snapshot_roundtrip():
+    config = read_config('examples/app_config.cfg')
+    table = load_snapshot(dump_snapshot(config))
+
+    assert table.to_dict() == config
+    assert list(table) == list(config)
+    assert table.lookup('server.ssl.enabled') is True
+    assert table['server']['workers'] == config['server']['workers']
+
+def test_snapshot_string_table_is_deduplicated():
+    config = {'a': {'name': 'x', 'x': 'name'}, 'b': {'name': 'x'}, 'x': 1.5}
+    writer = SnapshotWriter()
+    writer.dump(config)
+
+    assert sorted(writer.strings) == ['a', 'b', 'name', 'x']
+
+def test_snapshot_mmap_and_corruption(tmp_path):
+    path = tmp_path / 'config.cfgsnap'
+    data = bytearray(dump_snapshot({'port': 8080, 'title': 'Тест'}))
+    path.write_bytes(data)
+
+    with SnapshotReader.open(path) as reader:
+        assert reader.root['title'] == 'Тест'
+
+    data[-1] ^= 0xFF
+    with pytest.raises(SnapshotError, match='Контрольная сумма'):
+        load_snapshot(bytes(data))
+    with pytest.raises(SnapshotError, match='версия'):
+        load_snapshot(HEADER.pack(b'CFGS', 99, 0, 0, 0, 0, 0, 0, 0))
+    with pytest.raises(SnapshotError):
+        load_snapshot(b'port = 8080\n')
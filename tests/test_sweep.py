@@ -0,0 +1,74 @@
+import io
+import pytest
+import src.sweep
+from src.emitter import write_toml
+from src.lexer import Lexer
+from src.parser import Parser
+from src.sweep import apply_overrides, sweep
+from src.transformer import ConfigTransformer
+
+TEMPLATE = '''
+base_port = 8000; workers = 4; ratio = 1.5; name = [[web]]; debug = false;
+server = @{
+    port = $base_port 80 +$;
+    per_worker = $port workers /$;
+    rest = $port workers mod$;
+    share = $ratio workers /$;
+    ratio_rest = $ratio workers mod$;
+    huge = $base_port base_port * base_port * base_port * base_port *$;
+    label = $name 1 +$;
+    title = $name name +$;
+    flag = $debug debug +$;
+};
+check = $server.per_worker 2 * server.rest -$;
+fixed = $10 3 /$;
+'''
+
+ROWS = [
+    {'base_port': 8000, 'workers': 4, 'ratio': 1.5, 'name': 'web', 'debug': False},
+    {'base_port': -17, 'workers': 0, 'ratio': 0.0, 'name': 'api', 'debug': True},
+    {'base_port': 0, 'workers': -3, 'ratio': -2.25, 'name': 'x', 'debug': True},
+    {'base_port': 123456789, 'workers': 7, 'ratio': 1e300, 'name': 'y', 'debug': False},
+    {'base_port': 5, 'workers': True, 'ratio': 2, 'name': 'z', 'debug': False},
+]
+
+
+def scalar_toml(row):
+    ast = Parser(Lexer(TEMPLATE).tokenize()).parse()
+    buffer = io.StringIO()
+    write_toml(ConfigTransformer().ast_to_dict(apply_overrides(ast, row)), buffer)
+    return buffer.getvalue()
+
+
+def test_sweep_matches_scalar_evaluator():
+    np = pytest.importorskip('numpy')
+    result = sweep(TEMPLATE, ROWS)
+
+    assert result.size == len(ROWS)
+    for index, row in enumerate(ROWS):
+        # TOML различает 0 и 0.0, true и 1
+        assert result.to_toml(index) == scalar_toml(row)
+    assert result.vectorized > 0
+    assert result.tree['fixed'] == 3
+
+    columns = result.columns()
+    assert isinstance(columns['server.port'], np.ndarray)
+    assert list(columns['server.port']) == [8080, 63, 80, 123456869, 85]
+    assert len(columns['fixed']) == len(ROWS)
+
+
+def test_sweep_accepts_columns():
+    np = pytest.importorskip('numpy')
+    result = sweep(TEMPLATE, {'workers': np.arange(1, 6), 'server.port': [1, 2, 3, 4, 5]})
+
+    assert [variant['server']['per_worker'] for variant in result.variants()] == [1, 1, 1, 1, 1]
+    assert type(result.variant(0)['workers']) is int
+
+
+def test_sweep_validates_overrides(monkeypatch):
+    with pytest.raises(ValueError):
+        apply_overrides(Parser(Lexer(TEMPLATE).tokenize()).parse(), {'missing': 1})
+
+    monkeypatch.setattr(src.sweep, 'np', None)
+    with pytest.raises(ImportError):
+        sweep(TEMPLATE, ROWS)
@@ -0,0 +1,26 @@
+import pytest
+from src.symbols import SymbolTable
+
+def test_symbols_shadowing():
+    symbols = SymbolTable()
+    symbols.define('port', 80)
+
+    symbols.push_scope()
+    symbols.define('port', 8080)
+    symbols.define('host', 'localhost')
+    assert symbols['port'] == 8080
+    symbols.pop_scope()
+
+    assert symbols['port'] == 80
+    assert 'host' not in symbols
+    assert symbols.depth == 0
+
+def test_symbols_dotted_names():
+    symbols = SymbolTable()
+    symbols.define('server', {'port': 8080, 'ssl': {'enabled': True}})
+
+    assert symbols['server.port'] == 8080
+    assert symbols['server.ssl.enabled'] is True
+    assert symbols.get('server.missing', 'x') == 'x'
+    with pytest.raises(KeyError):
+        symbols['server.port.value']
@@ -1,6 +1,7 @@
+import io
 import pytest
 from src.transformer import ConfigTransformer
-from src.parser import AssignmentNode, ValueNode, BlockNode
+from src.parser import AssignmentNode, ValueNode, BlockNode, ExpressionNode
 
 def test_transformer_simple():
     transformer = ConfigTransformer()
@@ -28,4 +29,71 @@ def test_transformer_block():
     
     assert 'server' in result
     assert result['server']['host'] == 'localhost'
-    assert result['server']['port'] == 8080
\ No newline at end of file
+    assert result['server']['port'] == 8080
+
+def test_transformer_block_scopes():
+    transformer = ConfigTransformer()
+
+    nodes = [
+        AssignmentNode('port', ValueNode(80)),
+        BlockNode('server', [
+            AssignmentNode('port', ValueNode(8080)),
+            AssignmentNode('next', ExpressionNode('port 1 +')),
+        ]),
+        AssignmentNode('outer', ExpressionNode('port 1 +')),
+        AssignmentNode('dotted', ExpressionNode('server.next 1 +')),
+    ]
+
+    result = transformer.ast_to_dict(nodes)
+
+    assert result['server']['next'] == 8081
+    # Ключи блока не перекрывают внешние имена
+    assert result['outer'] == 81
+    assert result['dotted'] == 8082
+
+
+def test_transformer_write_toml_matches_tomlkit():
+    transformer = ConfigTransformer()
+    config = {
+        'title': 'Игра "Epic"\n\tверсия\\2',
+        'ratio': 0.5,
+        'enabled': False,
+        'server': {
+            'ssl': {'enabled': True},
+            'port': 8080,
+            'limits': {'inner': {'max': 10}},
+        },
+        'ключ с пробелом': {},
+        'after': 1,
+    }
+
+    stream = io.StringIO()
+    transformer.write_toml(config, stream)
+
+    assert stream.getvalue() == transformer.to_toml(config)
+
+
+def test_transformer_deep_nesting_without_recursion():
+    from src.lexer import Lexer
+    from src.parser import Parser
+
+    depth = 10000
+    source = ('base = 5;\n' + ''.join(f"b{i} = @{{ v = $base {i} +$; " for i in range(depth))
+              + '};' * depth + '\nlast = $b0.v 1 +$;')
+    transformer = ConfigTransformer()
+    result = transformer.ast_to_dict(Parser(Lexer(source).tokenize()).parse())
+
+    table = result
+    for i in range(depth):
+        table = table[f'b{i}']
+        assert table['v'] == 5 + i
+    assert result['last'] == 6
+
+    # Заголовок пишется только у таблицы со значениями, иначе вывод квадратичен
+    config = leaf = {}
+    for i in range(depth):
+        leaf['t'] = leaf = {}
+    leaf['v'] = 1
+    stream = io.StringIO()
+    transformer.write_toml(config, stream)
+    assert stream.getvalue() == '[' + '.'.join(['t'] * depth) + ']\nv = 1\n'
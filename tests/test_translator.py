@@ -0,0 +1,57 @@
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from src.lexer import Lexer
+from src.parser import Parser
+from src.pipeline import translate_source
+from src.sweep import apply_overrides
+from src.transformer import ConfigTransformer
+from src.translator import Translator
+
+TEMPLATE = '''
+base_port = 8000; workers = 4; name = [[web]];
+server = @{ port = $base_port 80 +$; per_worker = $port workers /$; };
+db = @{ pool = $workers 2 *$; label = $name$; };
+early = $late 1 +$; late = 5;
+'''
+
+
+def expected(overrides):
+    ast = Parser(Lexer(TEMPLATE).tokenize()).parse()
+    return ConfigTransformer().ast_to_dict(apply_overrides(ast, overrides))
+
+
+def test_translator_matches_transformer():
+    for name in ('app_config', 'game_settings'):
+        with open(f'examples/{name}.cfg', encoding='utf-8') as f:
+            source = f.read()
+        assert Translator(source).render() == translate_source(source)
+
+    translator = Translator(TEMPLATE)
+    # Ссылка вперёд не разрешается, как и при последовательном вычислении
+    assert translator.render()['early'] == '${late 1 +}'
+    for overrides in ({'workers': 8}, {'base_port': 1, 'server.port': 10}, {'name': 'api', 'late': 0}):
+        assert translator.render(overrides) == expected(overrides)
+
+    with pytest.raises(ValueError):
+        translator.render({'server': 1})
+
+
+def test_translator_recomputes_only_affected_keys():
+    translator = Translator(TEMPLATE)
+
+    assert translator.affected(['base_port']) == ['server.port', 'server.per_worker', 'server']
+    assert translator.affected(['name']) == ['db.label', 'db']
+    before = translator.render()
+    after = translator.render({'base_port': 9000})
+    # Незатронутый блок не пересчитывается, базовый результат не меняется
+    assert after['db'] is before['db']
+    assert after['server']['port'] == 9080 and before['server']['port'] == 8080
+
+
+def test_translator_is_thread_safe():
+    translator = Translator(TEMPLATE)
+    rows = [{'workers': index % 7 + 1, 'base_port': index} for index in range(200)]
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(translator.render, rows))
+    assert results == [expected(row) for row in rows]
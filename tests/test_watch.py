@@ -0,0 +1,125 @@
+import os
+import pytest
+from src.lexer import Lexer, split_statements
+from src.parser import Parser
+from src.transformer import ConfigTransformer
+from src.watch import IncrementalTranslator, Watcher
+
+def full_run(source):
+    return ConfigTransformer().ast_to_dict(Parser(Lexer(source).tokenize()).parse())
+
+def test_watch_split_statements():
+    source = "a = 1; s = @{ x = [[;]]; y = $a 1 +$; % ;\n }; b = 2"
+    spans = split_statements(source)
+
+    assert [source[start:end] for start, end in spans] == [
+        "a = 1;", " s = @{ x = [[;]]; y = $a 1 +$; % ;\n };", " b = 2",
+    ]
+
+def test_watch_incremental_update():
+    with open('examples/game_settings.cfg', encoding='utf-8') as f:
+        source = f.read()
+    translator = IncrementalTranslator()
+
+    report = translator.update(source)
+    assert translator.config == full_run(source)
+    assert report.evaluated == report.statements
+
+    # Меняется константа, от которой зависят graphics и mechanics, но не game_title
+    changed = source.replace('difficulty_mod = 2;', 'difficulty_mod = 3;')
+    report = translator.update(changed)
+    assert translator.config == full_run(changed)
+    assert report.reparsed == 1
+    assert report.evaluated == 4
+
+    # Изменение внутри блока, от которого никто не зависит
+    changed = changed.replace('resolution = [[1920x1080]];', 'resolution = [[800x600]];')
+    report = translator.update(changed)
+    assert translator.config == full_run(changed)
+    assert (report.reparsed, report.evaluated) == (1, 1)
+
+def test_watch_poll(tmp_path):
+    source = tmp_path / 'a.cfg'
+    output = tmp_path / 'a.toml'
+    source.write_text('port = 1;', encoding='utf-8')
+    updates = []
+    watcher = Watcher(lambda: [(str(source), str(output))],
+                      on_update=lambda path, report, error: updates.append(error))
+
+    assert watcher.poll() == 1
+    assert watcher.poll() == 0
+    source.write_text('port = $1 1 +$;', encoding='utf-8')
+    os.utime(source, ns=(1, 1))
+    assert watcher.poll() == 1
+    assert output.read_text(encoding='utf-8') == 'port = 2\n'
+    assert updates == [None, None]
+
+def test_watch_insert_and_remove_statements():
+    source = "a = 1;\nb = $a 1 +$;\ns = @{ x = $b$; };\nc = 5;\n"
+    translator = IncrementalTranslator()
+    translator.update(source)
+
+    # Вставка перед хвостом сдвигает участки, но не требует их разбора
+    changed = source.replace("b = $a 1 +$;", "b = 7; a = 2;")
+    report = translator.update(changed)
+    assert translator.config == full_run(changed)
+    assert report.reparsed == 2
+
+    changed = changed.replace("c = 5;\n", "")
+    report = translator.update(changed)
+    assert translator.config == full_run(changed)
+    assert report.evaluated == 0
+
+def test_watch_type_changes_propagate():
+    translator = IncrementalTranslator()
+    versions = [
+        "b = 1; a = $b 1 +$; y = $a$;",
+        "b = 1.0; a = $b 1 +$; y = $a$;",
+        "b = true; a = $b$; y = $a$;",
+        "b = 1; a = $b$; y = $a$;",
+        "b = 1.0; a = $b$; y = $a$;",
+    ]
+    for source in versions:
+        translator.update(source)
+        expected = full_run(source)
+        assert translator.config == expected
+        assert [type(value) for value in translator.config.values()] == \
+            [type(value) for value in expected.values()]
+
+def test_watch_error_position_matches_full_run():
+    source = "a = 1;\nb = 2; c = [[x"
+    with pytest.raises(Exception) as full_error:
+        full_run(source)
+
+    translator = IncrementalTranslator()
+    with pytest.raises(Exception) as watch_error:
+        translator.update(source)
+    assert str(watch_error.value) == str(full_error.value)
+    assert 'позиция 12' in str(watch_error.value)
+
+
+def test_watch_rebuilds_when_included_file_changes(tmp_path):
+    shared = tmp_path / 'shared.cfg'
+    source = tmp_path / 'a.cfg'
+    output = tmp_path / 'a.toml'
+    shared.write_text('port = $base 1 +$;', encoding='utf-8')
+    source.write_text('base = 1;\ninclude [[shared.cfg]];\nnext = $port 1 +$;', encoding='utf-8')
+    updates = []
+    watcher = Watcher(lambda: [(str(source), str(output))],
+                      on_update=lambda path, report, error: updates.append(error))
+
+    assert watcher.poll() == 1
+    assert output.read_text(encoding='utf-8') == 'base = 1\nport = 2\nnext = 3\n'
+    assert watcher.poll() == 0
+
+    shared.write_text('port = $base 10 +$;', encoding='utf-8')
+    os.utime(shared, ns=(1, 1))
+    assert watcher.poll() == 1
+    assert output.read_text(encoding='utf-8') == 'base = 1\nport = 11\nnext = 12\n'
+
+    # Без include снова работает пошаговое вычисление
+    source.write_text('base = 1;\nport = 5;\nnext = $port 1 +$;', encoding='utf-8')
+    os.utime(source, ns=(1, 1))
+    assert watcher.poll() == 1
+    assert output.read_text(encoding='utf-8') == 'base = 1\nport = 5\nnext = 6\n'
+    assert updates == [None, None, None]